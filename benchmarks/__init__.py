@@ -0,0 +1,13 @@
+"""
+Performance benchmarks for duosida-ev
+
+Run from the repository root:
+
+    python -m benchmarks                      # all benchmarks, JSON on stdout
+    python -m benchmarks -o results.json      # write to a file
+    python -m benchmarks parse_status -r 10   # selected benchmarks
+"""
+
+from .suite import BENCHMARKS, run_suite
+
+__all__ = ["BENCHMARKS", "run_suite"]
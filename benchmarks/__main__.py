@@ -0,0 +1,50 @@
+"""
+Command-line entry point: python -m benchmarks
+"""
+
+import argparse
+import json
+import sys
+
+from .suite import BENCHMARKS, run_suite
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Run the duosida-ev benchmarks")
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Samples per benchmark (default: 5)')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='Write the JSON results to FILE instead of stdout')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, unit, description) in BENCHMARKS.items():
+            print(f"{name:22} {unit:14} {description}")
+        return 0
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {unknown[0]!r} (see --list)")
+
+    results = run_suite(args.names or None, repeat=args.repeat,
+                        progress=lambda name: print(f"Running {name}...", file=sys.stderr))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    failed = [name for name, result in results['benchmarks'].items() if 'error' in result]
+    for name in failed:
+        print(f"{name} failed: {results['benchmarks'][name]['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
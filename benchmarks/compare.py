@@ -0,0 +1,264 @@
+"""
+Performance regression gate: compare benchmark runs to a stored baseline
+
+    python -m benchmarks -o baseline.json           # on the reference version
+    python -m benchmarks.compare baseline.json      # on the candidate
+
+The candidate runs the benchmarks of the baseline several times, after
+discarded warm-up runs, and pools the samples. A benchmark regressed
+when its median is more than threshold slower than the baseline's and a
+one-sided Mann-Whitney U test says the slowdown is significant at alpha.
+Requiring both keeps noise from failing the gate and keeps tiny but
+consistent differences from failing it as well. Exits with 1 on any
+regression, and on benchmarks that failed or are missing in the
+candidate run unless --allow-missing is given.
+"""
+
+import argparse
+import json
+import math
+import statistics
+import sys
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence
+
+from .suite import BENCHMARKS, run_suite
+
+# Exact U distribution up to this many samples in total, normal
+# approximation beyond
+_EXACT_LIMIT = 40
+
+
+class Comparison(NamedTuple):
+    """Outcome for one benchmark"""
+    name: str
+    unit: str
+    baseline: float   # Median seconds per operation
+    current: float
+    ratio: float      # current / baseline
+    p_slower: float   # p-value of "current is slower"
+    p_faster: float   # p-value of "current is faster"
+    verdict: str      # 'regression', 'improvement', 'unchanged', 'error' or 'missing'
+
+
+@lru_cache(maxsize=None)
+def _u_distribution(m: int, n: int) -> tuple:
+    """Number of orderings of m + n distinct values giving each U
+
+    U counts the pairs in which the value from the n group is the larger
+    one. Whichever group the largest value belongs to fixes its share.
+    """
+    if m == 0 or n == 0:
+        return (1,)
+    larger_in_n = _u_distribution(m, n - 1)
+    larger_in_m = _u_distribution(m - 1, n)
+    counts = [0] * (m * n + 1)
+    for u, count in enumerate(larger_in_n):
+        counts[u + m] += count
+    for u, count in enumerate(larger_in_m):
+        counts[u] += count
+    return tuple(counts)
+
+
+def mann_whitney_greater(a: Sequence[float], b: Sequence[float]) -> float:
+    """One-sided Mann-Whitney U test that values in b tend to exceed those in a
+
+    Returns:
+        The p-value: exact for small samples without ties, from the normal
+        approximation with tie and continuity correction otherwise
+    """
+    m, n = len(a), len(b)
+    if m == 0 or n == 0:
+        return 1.0
+
+    ranked = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+    rank_sum_b = 0.0
+    tie_term = 0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_sum_b += rank * sum(1 for k in range(i, j + 1) if ranked[k][1])
+        tied = j - i + 1
+        tie_term += tied ** 3 - tied
+        i = j + 1
+    u = rank_sum_b - n * (n + 1) / 2
+
+    if tie_term == 0 and m + n <= _EXACT_LIMIT:
+        counts = _u_distribution(m, n)
+        return sum(counts[int(round(u)):]) / sum(counts)
+
+    total = m + n
+    variance = m * n / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - m * n / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10,
+            alpha: float = 0.01) -> List[Comparison]:
+    """Compare two run_suite() results benchmark by benchmark
+
+    Args:
+        baseline: Reference results
+        current: Results of the candidate
+        threshold: Relative change of the median that matters (0.10 = 10%)
+        alpha: Significance level of the U test
+
+    Returns:
+        One Comparison per benchmark of the baseline. Benchmarks that
+        failed in the current run get the verdict 'error', those without
+        samples on either side 'missing'.
+    """
+    comparisons = []
+    for name, reference in baseline['benchmarks'].items():
+        result = current['benchmarks'].get(name, {})
+        if 'samples' not in reference or 'samples' not in result:
+            verdict = 'error' if 'error' in result else 'missing'
+            comparisons.append(Comparison(name, reference.get('unit', ''), math.nan, math.nan,
+                                          math.nan, math.nan, math.nan, verdict))
+            continue
+
+        before = statistics.median(reference['samples'])
+        after = statistics.median(result['samples'])
+        ratio = after / before if before > 0 else math.inf
+        p_slower = mann_whitney_greater(reference['samples'], result['samples'])
+        p_faster = mann_whitney_greater(result['samples'], reference['samples'])
+
+        if ratio > 1 + threshold and p_slower < alpha:
+            verdict = 'regression'
+        elif ratio < 1 / (1 + threshold) and p_faster < alpha:
+            verdict = 'improvement'
+        else:
+            verdict = 'unchanged'
+        comparisons.append(Comparison(name, reference.get('unit', ''), before, after,
+                                      ratio, p_slower, p_faster, verdict))
+    return comparisons
+
+
+def merge_runs(runs: List[Dict]) -> Dict:
+    """Pool the samples of several run_suite() results"""
+    merged = dict(runs[0], benchmarks={})
+    for name in runs[0]['benchmarks']:
+        results = [run['benchmarks'][name] for run in runs]
+        errors = [result['error'] for result in results if 'error' in result]
+        if errors:
+            merged['benchmarks'][name] = dict(results[0], error=errors[0])
+            continue
+        samples = [sample for result in results for sample in result['samples']]
+        merged['benchmarks'][name] = dict(results[0], samples=samples,
+                                          median=statistics.median(samples))
+    return merged
+
+
+def _format_time(seconds: float) -> str:
+    if math.isnan(seconds):
+        return "-"
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def format_report(comparisons: List[Comparison]) -> str:
+    """Render comparisons as a text table"""
+    lines = [f"{'benchmark':22} {'baseline':>10} {'current':>10} {'change':>8} "
+             f"{'p':>8}  verdict"]
+    for c in comparisons:
+        change = "-" if math.isnan(c.ratio) else f"{(c.ratio - 1) * 100:+.1f}%"
+        p = c.p_faster if c.verdict == 'improvement' else c.p_slower
+        p_text = "-" if math.isnan(p) else f"{p:.4f}"
+        lines.append(f"{c.name:22} {_format_time(c.baseline):>10} {_format_time(c.current):>10} "
+                     f"{change:>8} {p_text:>8}  {c.verdict}")
+    return "\n".join(lines)
+
+
+def _environment_differences(baseline: Dict, current: Dict) -> List[str]:
+    before, after = baseline.get('environment', {}), current.get('environment', {})
+    return [f"{key}: {before.get(key)} -> {after.get(key)}"
+            for key in ('python', 'implementation', 'platform', 'machine')
+            if before.get(key) != after.get(key)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare",
+                                     description="Compare benchmarks to a stored baseline")
+    parser.add_argument('baseline', help='JSON written by python -m benchmarks')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help='Benchmarks to compare (default: all in the baseline)')
+    parser.add_argument('--current', metavar='FILE',
+                        help='Compare to stored results instead of running the suite')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='Suite runs whose samples are pooled (default: 3)')
+    parser.add_argument('--warmup', type=int, default=1,
+                        help='Discarded suite runs before measuring (default: 1)')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Samples per benchmark and run (default: 5)')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown that counts as regression (default: 0.10)')
+    parser.add_argument('--alpha', type=float, default=0.01,
+                        help='Significance level (default: 0.01)')
+    parser.add_argument('--allow-missing', action='store_true',
+                        help='Do not fail on benchmarks that errored or are missing')
+    parser.add_argument('-o', '--output', metavar='FILE',
+                        help='Write the pooled current results as JSON, e.g. as next baseline')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {unknown[0]!r} (see python -m benchmarks --list)")
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    names = args.names or list(baseline['benchmarks'])
+    baseline = dict(baseline, benchmarks={name: baseline['benchmarks'][name] for name in names
+                                          if name in baseline['benchmarks']})
+    # Baseline benchmarks that were renamed or removed since are not run,
+    # which makes them 'missing' in the comparison
+    runnable = [name for name in names if name in BENCHMARKS]
+
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        def progress(label):
+            return lambda name: print(f"{label} {name}...", file=sys.stderr)
+
+        for run in range(args.warmup):
+            run_suite(runnable, repeat=1, progress=progress("Warming up"))
+        runs = [run_suite(runnable, repeat=args.repeat,
+                          progress=progress(f"Run {run + 1}/{args.runs}:"))
+                for run in range(args.runs)]
+        current = merge_runs(runs)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(current, indent=2) + "\n")
+
+    for difference in _environment_differences(baseline, current):
+        print(f"Warning: environment differs from the baseline ({difference})", file=sys.stderr)
+
+    comparisons = compare(baseline, current, threshold=args.threshold, alpha=args.alpha)
+    print(format_report(comparisons))
+    failed = False
+    regressions = [c.name for c in comparisons if c.verdict == 'regression']
+    if regressions:
+        print(f"\nRegressed: {', '.join(regressions)}", file=sys.stderr)
+        failed = True
+    for c in comparisons:
+        if c.verdict == 'error':
+            print(f"{c.name} failed: {current['benchmarks'][c.name]['error']}", file=sys.stderr)
+        elif c.verdict == 'missing':
+            reason = "no samples" if c.name in BENCHMARKS else "no such benchmark"
+            print(f"{c.name} not compared: {reason}", file=sys.stderr)
+        else:
+            continue
+        failed = failed or not args.allow_missing
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
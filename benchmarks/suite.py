@@ -0,0 +1,306 @@
+"""
+Benchmarks of the codec, status parsing and charger round trips
+
+Micro benchmarks time a hot path in batches sized with
+timeit.Timer.autorange(). End-to-end benchmarks run against a local
+ChargerSimulator and time whole operations. Both record one sample per
+repetition, in seconds per operation.
+"""
+
+import asyncio
+import itertools
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import timeit
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import duosida_ev
+from duosida_ev.charger import (DuosidaCharger, _ConfigTemplates, _build_config_command,
+                                _parse_status_frame)
+from duosida_ev.discovery import iter_discover
+from duosida_ev.protobuf import ProtobufDecoder, ProtobufEncoder
+from duosida_ev.simulator import ChargerSimulator
+from duosida_ev.transport import FaultInjector
+
+FORMAT_VERSION = 1
+
+# Name -> (function taking the repeat count and returning samples, unit, description)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, unit: str, description: str):
+    """Register a benchmark function"""
+    def register(func):
+        BENCHMARKS[name] = (func, unit, description)
+        return func
+    return register
+
+
+def measure(func: Callable[[], object], repeat: int) -> List[float]:
+    """Time a fast operation in batches, return seconds per call per batch"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    # One untimed batch to warm up caches
+    timer.timeit(number)
+    return [elapsed / number for elapsed in timer.repeat(repeat, number)]
+
+
+def measure_each(func: Callable[[], object], repeat: int, number: int = 1) -> List[float]:
+    """Time a slow operation number times per repetition, return seconds per call"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+def status_frame(voltage: float = 230.4, current: float = 15.8, sequence: int = 5) -> bytes:
+    """A DataVendorStatusReq frame as pushed by a charger, device info included"""
+    device_info = (
+        ProtobufEncoder.encode_string(2, "DUOSIDA SmartCharger") +
+        ProtobufEncoder.encode_string(3, "0310107112122360374") +
+        ProtobufEncoder.encode_string(4, "UCHEN") +
+        ProtobufEncoder.encode_string(5, "V1.2.3")
+    )
+    status_data = (
+        ProtobufEncoder.encode_float(1, voltage) +
+        ProtobufEncoder.encode_float(2, current) +
+        ProtobufEncoder.encode_float(4, 3.21) +
+        ProtobufEncoder.encode_float(7, 41.5) +
+        ProtobufEncoder.encode_float(8, 33.0) +
+        ProtobufEncoder.encode_float(9, 6.1) +
+        ProtobufEncoder.encode_varint_field(17, 2) +
+        ProtobufEncoder.encode_varint_field(18, 1700000000)
+    )
+    payload = (
+        ProtobufEncoder.encode_string(2, "DataVendorStatusReq") +
+        ProtobufEncoder.encode_embedded_message(10, status_data)
+    )
+    return (
+        ProtobufEncoder.encode_embedded_message(4, device_info) +
+        ProtobufEncoder.encode_embedded_message(16, payload) +
+        ProtobufEncoder.encode_string(100, "0310107112122360374") +
+        ProtobufEncoder.encode_varint_field(101, sequence)
+    )
+
+
+class _ReplaySocket:
+    """Socket stand-in returning the same frame on every recv()"""
+
+    def __init__(self, frame: bytes):
+        self.frame = frame
+
+    def recv(self, _size: int) -> bytes:
+        return self.frame
+
+    def gettimeout(self):
+        return None
+
+    def settimeout(self, _timeout):
+        pass
+
+
+@contextmanager
+def running_simulator(**kwargs):
+    """Run a ChargerSimulator on an event loop in a background thread"""
+    simulator = ChargerSimulator(**kwargs)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(simulator.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield simulator
+    finally:
+        asyncio.run_coroutine_threadsafe(simulator.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+@benchmark('encode_message', 's/message', "ProtobufEncoder: build a status frame field by field")
+def bench_encode_message(repeat: int) -> List[float]:
+    return measure(status_frame, repeat)
+
+
+@benchmark('build_command', 's/command', "_build_config_command(): encode a config command from scratch")
+def bench_build_command(repeat: int) -> List[float]:
+    return measure(lambda: _build_config_command("VendorMaxWorkCurrent", "16",
+                                                 "0310107112122360374", 42), repeat)
+
+
+@benchmark('build_command_templates', 's/command',
+           "Build a config command from the per-charger templates")
+def bench_build_command_templates(repeat: int) -> List[float]:
+    templates = _ConfigTemplates()
+    # Only the sequence number changes between commands, as in a session
+    sequences = itertools.count(1)
+    return measure(lambda: templates.build("VendorMaxWorkCurrent", "16",
+                                           "0310107112122360374", next(sequences)), repeat)
+
+
+@benchmark('decode_message', 's/frame', "ProtobufDecoder.decode_message() of a status frame")
+def bench_decode_message(repeat: int) -> List[float]:
+    frame = status_frame()
+    return measure(lambda: ProtobufDecoder.decode_message(frame), repeat)
+
+
+@benchmark('parse_status', 's/frame', "_parse_status_frame() of a status frame")
+def bench_parse_status(repeat: int) -> List[float]:
+    frame = status_frame()
+    cache = {}
+    return measure(lambda: _parse_status_frame(frame, cache), repeat)
+
+
+@benchmark('get_status_once', 's/frame', "DuosidaCharger._get_status_once(): framing and parsing")
+def bench_get_status_once(repeat: int) -> List[float]:
+    charger = DuosidaCharger(host="127.0.0.1", device_id="0310107112122360374")
+    charger.sock = _ReplaySocket(status_frame())
+    return measure(charger._get_status_once, repeat)
+
+
+@benchmark('handshake_to_status', 's/connection',
+           "Connect, handshake and first status from a simulated charger")
+def bench_handshake_to_status(repeat: int) -> List[float]:
+    with running_simulator(count=1, push_interval=0.01) as simulator:
+        virtual = simulator.chargers[0]
+
+        def connect_and_poll():
+            charger = DuosidaCharger(virtual.host, virtual.port, device_id=virtual.device_id)
+            try:
+                if not charger.connect() or charger.get_status(use_cache=False) is None:
+                    raise RuntimeError("No status from the simulator")
+            finally:
+                charger.disconnect()
+
+        return measure_each(connect_and_poll, repeat)
+
+
+@benchmark('command_round_trip', 's/command',
+           "set_max_current() until acknowledged by a simulated charger")
+def bench_command_round_trip(repeat: int) -> List[float]:
+    # Long push interval, so status frames do not queue up in the backlog
+    with running_simulator(count=1, push_interval=3600.0) as simulator:
+        virtual = simulator.chargers[0]
+        charger = DuosidaCharger(virtual.host, virtual.port, device_id=virtual.device_id)
+        if not charger.connect():
+            raise RuntimeError("Could not connect to the simulator")
+        try:
+            def command():
+                if not charger.set_max_current(16):
+                    raise RuntimeError("Command not acknowledged")
+                charger._backlog.clear()
+            # Warm-up
+            command()
+            return measure_each(command, repeat, number=20)
+        finally:
+            charger.disconnect()
+
+
+@benchmark('status_under_faults', 's/status',
+           "get_status() over a connection with injected jitter, segmenting and resets")
+def bench_status_under_faults(repeat: int) -> List[float]:
+    # Seeded, so every run sees the same faults in the same order
+    faults = FaultInjector(jitter=0.002, segment_size=32, drop_rate=0.01,
+                           disconnect_rate=0.01, seed=2024)
+    with running_simulator(count=1, push_interval=0.01, seed=1) as simulator:
+        virtual = simulator.chargers[0]
+        charger = DuosidaCharger(virtual.host, virtual.port, device_id=virtual.device_id,
+                                 auto_reconnect=True, reconnect_delay=0.01,
+                                 socket_factory=faults)
+        try:
+            def poll():
+                if charger.get_status(retries=5, use_cache=False) is None:
+                    raise RuntimeError("No status despite retries")
+            return measure_each(poll, repeat, number=20)
+        finally:
+            charger.disconnect()
+
+
+@benchmark('discovery', 's/search', "Discovery broadcast until all simulated chargers answered")
+def bench_discovery(repeat: int) -> List[float]:
+    # Discovery deduplicates by IP, so each charger needs its own address
+    hosts = ([f'127.0.0.{i}' for i in range(1, 11)] if sys.platform.startswith('linux')
+             else ['127.0.0.1'])
+    with running_simulator(count=len(hosts), host=hosts, discovery_port=0,
+                           discovery_host='127.0.0.1') as simulator:
+        def search():
+            devices = list(iter_discover(
+                timeout=5, interface='127.0.0.1', get_device_id=False,
+                expected_count=len(hosts), broadcast_address='127.0.0.1',
+                port=simulator.discovery_port))
+            if len(devices) != len(hosts):
+                raise RuntimeError(f"Found {len(devices)} of {len(hosts)} chargers")
+
+        return measure_each(search, repeat)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics of per-operation samples"""
+    median = statistics.median(samples)
+    return {
+        'mean': statistics.mean(samples),
+        'median': median,
+        'min': min(samples),
+        'max': max(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'ops_per_sec': 1.0 / median if median > 0 else 0.0,
+    }
+
+
+def environment() -> Dict[str, object]:
+    """Describe where the benchmarks ran"""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'library_version': duosida_ev.__version__,
+    }
+
+
+def run_suite(names: Optional[Iterable[str]] = None, repeat: int = 5,
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, object]:
+    """Run benchmarks and return the results as a JSON-serializable dict
+
+    Args:
+        names: Benchmarks to run (default all, in registration order)
+        repeat: Samples per benchmark
+        progress: Called with each benchmark name before it runs
+
+    Returns:
+        Dict with 'format', 'created', 'environment' and 'benchmarks',
+        the latter mapping each name to its unit, description, samples
+        (seconds per operation) and summary statistics. A benchmark that
+        fails is reported with an 'error' instead.
+    """
+    results = {}
+    for name in (list(BENCHMARKS) if names is None else names):
+        func, unit, description = BENCHMARKS[name]
+        if progress:
+            progress(name)
+        result = {'unit': unit, 'description': description}
+        try:
+            samples = func(repeat)
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        else:
+            result['samples'] = samples
+            result.update(summarize(samples))
+        results[name] = result
+
+    return {
+        'format': FORMAT_VERSION,
+        'created': time.time(),
+        'environment': environment(),
+        'benchmarks': results,
+    }
@@ -20,8 +20,25 @@ Example usage:
     charger.disconnect()
 """
 
-from .charger import DuosidaCharger, ChargerStatus
-from .discovery import discover_chargers
+from .charger import DuosidaCharger, ChargerStatus, StatusFilter
+from .async_charger import AsyncDuosidaCharger
+from .fleet import ChargerFleet, FleetStats
+from .balancer import LoadBalancer, allocate_current
+from .solar import (
+    SurplusController,
+    PowerSource,
+    FilePowerSource,
+    CallablePowerSource,
+    UnixSocketPowerSource,
+)
+from .discovery import discover_chargers, iter_discover, find_chargers
+from .cache import DiscoveryCache
+from .recorder import TelemetryRecorder, TelemetryLog, TelemetrySample
+from .history import StatusHistory, WindowStats
+from .batch import StatusDecoder, decode_status_frames, decode_status_file
+from .simulator import ChargerSimulator, VirtualCharger
+from .transport import FaultInjector
+from .stats import ConnectionStats, StatsSnapshot, LatencyHistogram, LatencyStats
 from .exceptions import (
     DuosidaError,
     ConnectionError,
@@ -35,8 +52,37 @@ from .exceptions import (
 __version__ = "0.1.1"
 __all__ = [
     "DuosidaCharger",
+    "AsyncDuosidaCharger",
+    "ChargerFleet",
+    "FleetStats",
+    "LoadBalancer",
+    "allocate_current",
+    "SurplusController",
+    "PowerSource",
+    "FilePowerSource",
+    "CallablePowerSource",
+    "UnixSocketPowerSource",
     "ChargerStatus",
+    "StatusFilter",
     "discover_chargers",
+    "iter_discover",
+    "find_chargers",
+    "DiscoveryCache",
+    "TelemetryRecorder",
+    "TelemetryLog",
+    "TelemetrySample",
+    "StatusHistory",
+    "WindowStats",
+    "StatusDecoder",
+    "decode_status_frames",
+    "decode_status_file",
+    "ChargerSimulator",
+    "VirtualCharger",
+    "FaultInjector",
+    "ConnectionStats",
+    "StatsSnapshot",
+    "LatencyHistogram",
+    "LatencyStats",
     "DuosidaError",
     "ConnectionError",
     "CommunicationError",
@@ -0,0 +1,630 @@
+"""
+Duosida EV Charger - asyncio TCP communication
+"""
+
+import asyncio
+import socket
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from .charger import (
+    ChargerStatus,
+    StatusFilter,
+    HANDSHAKE_HELLO,
+    HANDSHAKE_REGISTER,
+    _ConnectionState,
+    _ConnectionStateMixin,
+    _ack_sequence,
+    _build_start_command,
+    _build_stop_command,
+)
+from .exceptions import (
+    ConnectionError as ChargerConnectionError,
+    CommunicationError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _is_connection_lost(error: Exception) -> bool:
+    """True if an exception means the TCP connection is gone"""
+    if isinstance(error, (asyncio.TimeoutError, socket.timeout)):
+        return False
+    return isinstance(error, (OSError, asyncio.IncompleteReadError, ChargerConnectionError))
+
+
+class AsyncDuosidaCharger(_ConnectionStateMixin):
+    """asyncio communication with Duosida EV Charger
+
+    Mirrors the DuosidaCharger API with coroutines, so a single event loop
+    can drive many chargers without a thread per connection. Both share
+    their protocol state and decisions through _ConnectionState and only
+    differ in how they do I/O.
+
+    Example:
+        async with AsyncDuosidaCharger("192.168.1.100", device_id="...") as charger:
+            status = await charger.get_status()
+    """
+
+    def __init__(self, host: str, port: int = 9988, device_id: str = "",
+                 timeout: float = 5.0, debug: bool = False,
+                 ack_timeout: Optional[float] = 1.0, auto_reconnect: bool = False,
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0,
+                 history_size: int = 0):
+        """Arguments are the same as for DuosidaCharger"""
+        self.host = host
+        self.port = port
+        self.device_id = device_id
+        self.timeout = timeout
+        self.ack_timeout = ack_timeout
+        self.auto_reconnect = auto_reconnect
+        self._state = _ConnectionState(reconnect_delay, max_reconnect_delay, history_size)
+        self.debug = debug
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._subscribers: List[Callable[[ChargerStatus], Any]] = []
+        self._listening = False
+        self._listener_active = False
+        # Futures resolved by the listener, by command sequence number
+        self._ack_waiters: Dict[int, asyncio.Future] = {}
+        self._status_waiters: List[asyncio.Future] = []
+
+    async def __aenter__(self):
+        if not await self.connect():
+            raise ChargerConnectionError(f"Could not connect to {self.host}:{self.port}")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+
+    @property
+    def connected(self) -> bool:
+        """True if a connection is open"""
+        return self._writer is not None
+
+    @property
+    def listening(self) -> bool:
+        """True while listen() reads the connection"""
+        return self._listening
+
+    async def connect(self) -> bool:
+        """Connect to charger"""
+        state = self._state
+        try:
+            start = time.monotonic()
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+            connected = time.monotonic()
+            state.connected(start, connected)
+            logger.info(f"Connected to {self.host}:{self.port}")
+            await self._send_handshake()
+            state.handshake_done(connected)
+            return True
+        except asyncio.TimeoutError as e:
+            logger.error(f"Connection timed out: {e}")
+            state.connect_failed(e)
+        except OSError as e:
+            logger.error(f"Connection failed: {e}")
+            state.connect_failed(e)
+        except Exception as e:
+            logger.error(f"Unexpected error connecting: {e}")
+            state.connect_failed(e)
+        await self.disconnect()
+        return False
+
+    async def disconnect(self):
+        """Disconnect from charger"""
+        writer = self._writer
+        if writer:
+            self._drop_connection()
+            if hasattr(writer, 'wait_closed'):
+                try:
+                    await writer.wait_closed()
+                except Exception:
+                    pass
+            logger.info("Disconnected")
+
+    def _drop_connection(self):
+        """Close the stream and discard buffered data"""
+        if self._writer:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+        self._reader = None
+        self._writer = None
+        self._state.dropped()
+
+    async def _reconnect(self) -> bool:
+        """Re-establish a dropped connection, including the handshake
+
+        Failed attempts back off as _ConnectionState.reconnect_backoff()
+        decides.
+        """
+        self._drop_connection()
+        delay = self._state.reconnect_backoff()
+        if delay:
+            await asyncio.sleep(delay)
+
+        logger.info(f"Reconnecting to {self.host}:{self.port}")
+        return self._state.reconnected(await self.connect())
+
+    async def _ensure_connected(self) -> bool:
+        """Reconnect first if the connection was lost and auto_reconnect is on"""
+        if self._writer is None and self.auto_reconnect:
+            return await self._reconnect()
+        return self._writer is not None
+
+    async def _send_handshake(self):
+        """Send initial handshake messages"""
+        await self._send_raw(HANDSHAKE_HELLO)
+        await asyncio.sleep(0.1)
+
+        try:
+            await self._recv_frame(timeout=1.0)
+        except Exception:
+            pass
+
+        await self._send_raw(HANDSHAKE_REGISTER)
+        await asyncio.sleep(0.2)
+        self._state.next_sequence()
+
+    async def _send_raw(self, data: bytes):
+        """Send raw protobuf data"""
+        if not self._writer:
+            raise ChargerConnectionError("Not connected")
+        self._writer.write(data)
+        await self._writer.drain()
+        self._state.stats.bytes_sent += len(data)
+
+    async def _recv_raw(self, timeout: Optional[float] = None) -> bytes:
+        """Receive raw data from charger"""
+        if not self._reader:
+            raise ChargerConnectionError("Not connected")
+        if timeout is None:
+            timeout = self.timeout
+        return await asyncio.wait_for(self._reader.read(4096), timeout)
+
+    async def _recv_frame(self, timeout: Optional[float] = None) -> bytes:
+        """Receive one complete protobuf message from charger
+
+        Frames set aside while waiting for a command acknowledgement are
+        returned first. Returns b'' if the connection was closed.
+
+        Raises:
+            asyncio.TimeoutError: If no complete message arrived in time
+        """
+        if self._state.backlog:
+            return self._state.backlog.popleft()
+        return await self._read_frame(timeout)
+
+    async def _read_frame(self, timeout: Optional[float] = None) -> bytes:
+        """Read the next complete message from the stream"""
+        state = self._state
+        frame = state.frames.next_frame()
+        if frame is not None:
+            return state.frame_read(frame)
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            wait, settling = state.frame_wait(deadline)
+            try:
+                if wait <= 0:
+                    raise asyncio.TimeoutError()
+                data = await self._recv_raw(timeout=wait)
+            except asyncio.TimeoutError:
+                if settling:
+                    return state.frame_read(state.frames.flush())
+                raise
+
+            frame = state.received(data)
+            if frame is not None:
+                return state.frame_read(frame)
+
+    async def get_status(self, retries: int = 3, use_cache: bool = True) -> Optional[ChargerStatus]:
+        """Get charger status
+
+        While listen() runs, this waits for the next status it receives.
+        """
+        state = self._state
+        stats = state.stats
+        stats.status_requests += 1
+        start = time.monotonic()
+        if self._listening:
+            return await self._next_pushed_status(use_cache, start)
+
+        for attempt in range(retries):
+            if attempt:
+                stats.retries += 1
+            try:
+                if self.auto_reconnect and not await self._ensure_connected():
+                    continue
+                status = await self._get_status_once()
+                if status:
+                    state.status_read(status, start)
+                    return status
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    stats.timeouts += 1
+                else:
+                    stats.error(e)
+                if self.auto_reconnect and _is_connection_lost(e):
+                    self._drop_connection()
+                if attempt == retries - 1:
+                    cached = state.fallback(use_cache)
+                    if cached:
+                        return cached
+                    raise
+
+        return state.fallback(use_cache)
+
+    async def _next_pushed_status(self, use_cache: bool, start: float) -> Optional[ChargerStatus]:
+        waiter = asyncio.get_event_loop().create_future()
+        self._status_waiters.append(waiter)
+        try:
+            status = await asyncio.wait_for(waiter, timeout=2.0)
+            self._state.latency.status.record(time.monotonic() - start)
+            return status
+        except asyncio.TimeoutError:
+            self._state.stats.timeouts += 1
+            return self._state.fallback(use_cache)
+        finally:
+            if waiter in self._status_waiters:
+                self._status_waiters.remove(waiter)
+
+    async def _get_status_once(self) -> Optional[ChargerStatus]:
+        """Internal method to get status once"""
+        try:
+            response = await self._recv_frame(timeout=2.0)
+            if not response:
+                if self.auto_reconnect and self._writer is not None:
+                    # Charger closed the connection
+                    self._drop_connection()
+                return None
+
+            return self._state.parse(response)
+
+        except Exception as e:
+            logger.error(f"Error getting status: {e}")
+            raise
+
+    async def _send_command(self, build) -> bool:
+        """Send a command and wait until the charger acknowledges it
+
+        The reply is matched by _ConnectionState.is_ack(); frames received
+        in the meantime are kept for get_status(). Waiting is skipped if
+        ack_timeout is None or 0.
+
+        With auto_reconnect, a lost connection is re-established and the
+        command sent once more with a fresh sequence number. While listen()
+        runs, it reads the acknowledgement and the command is not resent;
+        the listener takes care of reconnecting.
+
+        Args:
+            build: Function returning the message for a sequence number
+
+        Raises:
+            ChargerConnectionError: If there is no connection
+            ChargerTimeoutError: If no acknowledgement arrived in time
+            CommunicationError: If the connection was closed
+        """
+        if self._listening:
+            return await self._send_command_listening(build)
+
+        state = self._state
+        if not await self._ensure_connected():
+            raise ChargerConnectionError(f"Not connected to {self.host}:{self.port}")
+        sequence = state.sequence
+        start = time.monotonic()
+        try:
+            await self._send_raw(build(sequence))
+        except OSError as e:
+            if not (self.auto_reconnect and _is_connection_lost(e)):
+                raise
+            logger.info(f"Connection lost while sending command: {e}")
+            if not await self._reconnect():
+                raise ChargerConnectionError(f"Could not reconnect to {self.host}:{self.port}")
+            sequence = state.sequence
+            await self._send_raw(build(sequence))
+        state.command_sent(sequence)
+
+        if not self.ack_timeout:
+            return True
+
+        deadline = time.monotonic() + self.ack_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise state.ack_timed_out(sequence, self.ack_timeout)
+            try:
+                frame = await self._read_frame(timeout=remaining)
+            except asyncio.TimeoutError:
+                continue
+            if not frame:
+                raise CommunicationError("Connection closed while waiting for acknowledgement")
+            if state.is_ack(frame, sequence, start):
+                return True
+
+    async def _send_command_listening(self, build) -> bool:
+        """Send a command and wait for the listener to see its acknowledgement"""
+        state = self._state
+        sequence = state.next_sequence()
+        waiter = asyncio.get_event_loop().create_future()
+        # Registered before sending, as the listener may read the ack first
+        self._ack_waiters[sequence] = waiter
+        start = time.monotonic()
+        try:
+            await self._send_raw(build(sequence))
+            state.command_sent(sequence)
+            if not self.ack_timeout:
+                return True
+            try:
+                acknowledged = await asyncio.wait_for(waiter, timeout=self.ack_timeout)
+            except asyncio.TimeoutError:
+                raise state.ack_timed_out(sequence, self.ack_timeout)
+            state.acknowledged(start)
+            return acknowledged
+        finally:
+            self._ack_waiters.pop(sequence, None)
+
+    async def set_max_current(self, amps: int) -> bool:
+        """Set maximum charging current (6-32A)"""
+        if not 6 <= amps <= 32:
+            return False
+
+        try:
+            return await self._send_command(lambda sequence: self._config_templates.build(
+                "VendorMaxWorkCurrent", str(amps), self.device_id, sequence))
+        except Exception as e:
+            logger.error(f"Error setting max current: {e}")
+            return False
+
+    async def set_config(self, key: str, value: str) -> bool:
+        """Set a configuration value on the charger
+
+        Args:
+            key: Configuration key name (e.g., 'VendorMaxWorkCurrent')
+            value: Configuration value as string
+
+        Returns:
+            True if the charger acknowledged the command
+        """
+        try:
+            return await self._send_command(lambda sequence: self._config_templates.build(
+                key, value, self.device_id, sequence))
+        except Exception as e:
+            logger.error(f"Error setting config: {e}")
+            return False
+
+    async def set_connection_timeout(self, seconds: int) -> bool:
+        """Set connection timeout (30-900 seconds)"""
+        if not 30 <= seconds <= 900:
+            logger.warning("Connection timeout must be between 30 and 900 seconds")
+            return False
+
+        return await self.set_config("ConnectionTimeOut", str(seconds))
+
+    async def set_max_temperature(self, celsius: int) -> bool:
+        """Set maximum working temperature (85-95°C)"""
+        if not 85 <= celsius <= 95:
+            logger.warning("Max temperature must be between 85 and 95°C")
+            return False
+
+        return await self.set_config("VendorMaxWorkTemperature", str(celsius))
+
+    async def set_max_voltage(self, voltage: int) -> bool:
+        """Set maximum working voltage (265-290V)"""
+        if not 265 <= voltage <= 290:
+            logger.warning("Max voltage must be between 265 and 290V")
+            return False
+
+        return await self.set_config("VendorMaxWorkVoltage", str(voltage))
+
+    async def set_min_voltage(self, voltage: int) -> bool:
+        """Set minimum working voltage (70-110V)"""
+        if not 70 <= voltage <= 110:
+            logger.warning("Min voltage must be between 70 and 110V")
+            return False
+
+        return await self.set_config("VendorMinWorkVoltage", str(voltage))
+
+    async def set_direct_work_mode(self, enabled: bool) -> bool:
+        """Set direct work mode (plug and charge)"""
+        return await self.set_config("VendorDirectWorkMode", "1" if enabled else "0")
+
+    async def set_led_brightness(self, level: int) -> bool:
+        """Set LED/screen brightness level (0=off, 1=low, 3=high)"""
+        if level not in (0, 1, 3):
+            logger.warning("LED brightness must be 0, 1, or 3")
+            return False
+
+        return await self.set_config("VendorLEDStrength", str(level))
+
+    async def set_stop_on_disconnect(self, enabled: bool) -> bool:
+        """Set whether to stop transaction when EV side disconnects"""
+        return await self.set_config("StopTransactionOnEVSideDisconnect", "1" if enabled else "0")
+
+    async def start_charging(self) -> bool:
+        """Start a charging session
+
+        Returns:
+            True if the charger acknowledged the command
+        """
+        try:
+            return await self._send_command(lambda sequence: _build_start_command(
+                self.device_id, sequence))
+        except Exception as e:
+            logger.error(f"Error starting charge: {e}")
+            return False
+
+    async def stop_charging(self, session_id: Optional[int] = None) -> bool:
+        """Stop the current charging session
+
+        Args:
+            session_id: Optional session identifier. If not provided,
+                        uses current timestamp as session ID.
+
+        Returns:
+            True if the charger acknowledged the command
+        """
+        try:
+            if session_id is None:
+                session_id = int(time.time() * 1000) % 0xFFFFFFFF
+
+            return await self._send_command(lambda sequence: _build_stop_command(
+                session_id, self.device_id, sequence))
+        except Exception as e:
+            logger.error(f"Error stopping charge: {e}")
+            return False
+
+    async def _dispatch(self, status: ChargerStatus):
+        for callback in list(self._subscribers):
+            try:
+                result = callback(status)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Status subscriber failed: {e}")
+
+    async def _handle_frame(self, frame: bytes, status_filter: Optional[StatusFilter]):
+        """Route one frame read by the listener"""
+        sequence = _ack_sequence(frame)
+        waiter = self._ack_waiters.pop(sequence, None) if sequence is not None else None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(True)
+
+        status = self._state.parse(frame)
+        if status is None:
+            return
+        self._state.remember(status)
+        waiters, self._status_waiters = self._status_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(status)
+        if status_filter is None or status_filter(status):
+            await self._dispatch(status)
+
+    async def listen(self, duration: Optional[float] = None, callback=None,
+                     changes_only: bool = False,
+                     deadbands: Optional[Dict[str, float]] = None,
+                     keyframe_interval: Optional[float] = 60.0):
+        """Dispatch every status the charger pushes, as it arrives
+
+        Unlike monitor(), nothing sleeps between reads: the connection is
+        drained continuously and each pushed status frame is parsed and
+        handed to the subscribers immediately, so no state transition is
+        missed. While it runs, the listener is the only reader of the
+        connection: command acknowledgements are routed to the waiting
+        command, and get_status() returns the next status received.
+
+        Run it in the background with start_listening(), or await it; it
+        returns when duration elapses or stop_listening() is called.
+
+        Args:
+            duration: How long to listen in seconds (None for indefinite)
+            callback: Optional subscriber for the duration of the call
+            changes_only: Only dispatch statuses that pass a StatusFilter
+            deadbands: Deadbands per field, over DEFAULT_DEADBANDS
+            keyframe_interval: Seconds between unconditional updates
+
+        Raises:
+            CommunicationError: If the charger closed the connection and
+                                auto_reconnect is off
+        """
+        if self._listener_active:
+            raise RuntimeError("Already listening")
+        status_filter = StatusFilter(deadbands, keyframe_interval) if changes_only else None
+        if callback:
+            self.subscribe(callback)
+        self._listening = True
+        self._listener_active = True
+        deadline = None if duration is None else time.monotonic() + duration
+
+        try:
+            while self._listening:
+                wait = 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        break
+
+                if self.auto_reconnect and not await self._ensure_connected():
+                    continue
+                try:
+                    frame = await self._recv_frame(timeout=wait)
+                except asyncio.TimeoutError:
+                    continue
+                except Exception as e:
+                    self._state.stats.error(e)
+                    if self.auto_reconnect and _is_connection_lost(e):
+                        self._drop_connection()
+                        continue
+                    raise
+
+                if not frame:
+                    if self.auto_reconnect:
+                        self._drop_connection()
+                        continue
+                    raise CommunicationError("Connection closed by charger")
+
+                await self._handle_frame(frame, status_filter)
+        finally:
+            self._listening = False
+            self._listener_active = False
+            for waiter in self._ack_waiters.values():
+                if not waiter.done():
+                    waiter.set_exception(CommunicationError("Listener stopped"))
+            if callback:
+                self.unsubscribe(callback)
+
+    def start_listening(self, **kwargs) -> asyncio.Future:
+        """Run listen() in the background
+
+        Args:
+            **kwargs: Passed to listen()
+
+        Returns:
+            The listener task
+        """
+        task = asyncio.ensure_future(self.listen(**kwargs))
+        # Commands sent right away must already go through the listener
+        self._listening = True
+        return task
+
+    async def monitor(self, interval: float = 2.0, duration: Optional[float] = None,
+                      callback=None, changes_only: bool = False,
+                      deadbands: Optional[Dict[str, float]] = None,
+                      keyframe_interval: Optional[float] = 60.0):
+        """Monitor charger status continuously
+
+        Reads one status every interval seconds; use listen() to receive
+        every pushed status as it arrives.
+
+        Args:
+            interval: Polling interval in seconds
+            duration: Total monitoring duration (None for indefinite)
+            callback: Optional function or coroutine function to call with
+                      each status update
+            changes_only: Only report statuses that changed beyond the
+                          deadbands, plus periodic keyframes
+            deadbands: Deadbands per field, over DEFAULT_DEADBANDS
+            keyframe_interval: Seconds between unconditional updates
+        """
+        start_time = time.monotonic()
+        status_filter = StatusFilter(deadbands, keyframe_interval) if changes_only else None
+
+        while True:
+            if duration and (time.monotonic() - start_time) > duration:
+                break
+
+            try:
+                status = await self.get_status()
+                if status and callback and (status_filter is None or status_filter(status)):
+                    result = callback(status)
+                    if asyncio.iscoroutine(result):
+                        await result
+            except Exception as e:
+                logger.warning(f"Error during monitoring: {e}")
+
+            await asyncio.sleep(interval)
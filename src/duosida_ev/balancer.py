@@ -0,0 +1,261 @@
+"""
+Dynamic load balancing of chargers sharing one supply
+"""
+
+import asyncio
+import time
+import logging
+from typing import Dict, Optional, Set
+
+from .charger import ChargerStatus
+from .fleet import ChargerFleet
+
+logger = logging.getLogger(__name__)
+
+# Connection states with a vehicle that may draw current
+# (Preparing, Charging, Cooling, SuspendedEV)
+ACTIVE_STATES = frozenset({1, 2, 3, 4})
+
+
+def allocate_current(demands: Dict[str, float], budget: float,
+                     min_current: int = 6, max_current: int = 32) -> Dict[str, int]:
+    """Share a current budget among charging sessions
+
+    Sessions are admitted in the order of demands for as long as each can
+    get min_current. The budget is then split max-min fairly: sessions that
+    need less than an equal share keep their demand and the rest is shared
+    among the others.
+
+    Args:
+        demands: Amps each session can use, in priority order
+        budget: Total current available (A)
+        min_current: Lowest current a charger can be set to (A)
+        max_current: Highest current a charger can be set to (A)
+
+    Returns:
+        Whole amps per session, 0 for sessions that did not fit
+    """
+    allocation = {key: 0 for key in demands}
+    admitted = list(demands)[:max(0, int(budget // min_current))]
+
+    def wanted(key):
+        return min(max(demands[key], min_current), max_current)
+
+    remaining = budget
+    pending = sorted(admitted, key=wanted)
+    for index, key in enumerate(pending):
+        share = remaining / (len(pending) - index)
+        amps = int(min(wanted(key), share))
+        allocation[key] = amps
+        remaining -= amps
+
+    return allocation
+
+
+class LoadBalancer:
+    """Keep the chargers of a ChargerFleet within a main fuse budget
+
+    Every cycle the fleet is polled, the budget is shared among active
+    sessions with allocate_current() and only the limits that changed are
+    sent, concurrently. Sessions that report drawing less than their limit
+    (the vehicle is the bottleneck) only get what they use plus
+    demand_margin, leaving the rest to others.
+
+    To avoid spamming the chargers, an increase is only sent when it is
+    at least hysteresis amps and the charger was not commanded in the last
+    min_command_interval seconds. Decreases are always sent at once, and
+    before any increase, so the budget is never exceeded by the commands
+    themselves. If a decrease or pause fails, that charger may still run
+    at its old limit, so the increases of the cycle are not sent and are
+    planned again next cycle. Sessions that do not fit at min_current are
+    paused with stop_charging() and resumed when room frees up, oldest
+    sessions first. A session whose charger stops answering keeps its
+    limit reserved until the charger reports again.
+
+    Example:
+        fleet = ChargerFleet.from_devices(discover_chargers())
+        balancer = LoadBalancer(fleet, budget=63)
+        async with fleet:
+            await balancer.run(interval=5.0)
+    """
+
+    def __init__(self, fleet: ChargerFleet, budget: float,
+                 min_current: int = 6, max_current: int = 32,
+                 hysteresis: float = 1.0, min_command_interval: float = 10.0,
+                 demand_margin: float = 2.0, idle_current: Optional[int] = 6,
+                 command_timeout: float = 2.0):
+        """
+        Args:
+            fleet: Chargers sharing the supply
+            budget: Main fuse budget for all chargers together (A)
+            min_current: Lowest current a session can be set to (A)
+            max_current: Highest current a session can be set to (A)
+            hysteresis: Smallest increase worth sending (A)
+            min_command_interval: Minimum time between increases sent to
+                                  one charger (seconds)
+            demand_margin: Headroom given above the measured current of a
+                           vehicle-limited session (A)
+            idle_current: Limit set on chargers without a session, so a new
+                          session starts low (None to leave idle chargers
+                          alone)
+            command_timeout: Timeout per command (seconds)
+        """
+        self.fleet = fleet
+        self.budget = budget
+        self.min_current = min_current
+        self.max_current = max_current
+        self.hysteresis = hysteresis
+        self.min_command_interval = min_command_interval
+        self.demand_margin = demand_margin
+        self.idle_current = idle_current
+        self.command_timeout = command_timeout
+        self.limits: Dict[str, int] = {}  # Last limit acknowledged per charger
+        self.paused: Set[str] = set()
+        self.commands_sent = 0
+        self._last_command: Dict[str, float] = {}
+        self._sessions: Set[str] = set()
+
+    def _demand(self, key: str, status: ChargerStatus) -> float:
+        limit = self.limits.get(key, self.max_current)
+        if (key not in self.paused and status.conn_status == 2 and
+                status.current < limit - self.demand_margin):
+            return status.current + self.demand_margin
+        return self.max_current
+
+    def plan(self, statuses: Dict[str, Optional[ChargerStatus]],
+             now: Optional[float] = None) -> Dict[str, int]:
+        """Compute the limits to send for one cycle, without any I/O
+
+        Args:
+            statuses: Latest status per charger (None if it did not answer)
+            now: Current time.monotonic() value
+
+        Returns:
+            New limit per charger that needs a command, 0 to pause it
+        """
+        now = time.monotonic() if now is None else now
+
+        sessions = []
+        unreachable = set()
+        budget = self.budget
+        for key, status in statuses.items():
+            if status is None:
+                # Keep the limit of an unreachable session reserved until
+                # the charger reports again, however many polls it misses
+                if key in self._sessions:
+                    unreachable.add(key)
+                    if key not in self.paused:
+                        budget -= self.limits.get(key, self.max_current)
+                continue
+            if status.conn_status == 0:
+                self.paused.discard(key)
+            if status.conn_status in ACTIVE_STATES or key in self.paused:
+                sessions.append((key, status))
+
+        # Oldest sessions first; sessions without a start time last
+        sessions.sort(key=lambda item: (item[1].timestamp <= 0, item[1].timestamp, item[0]))
+        self._sessions = {key for key, _ in sessions} | unreachable
+
+        demands = {key: self._demand(key, status) for key, status in sessions}
+        allocation = allocate_current(demands, budget, self.min_current, self.max_current)
+
+        changes = {}
+        for key, amps in allocation.items():
+            current = self.limits.get(key)
+            if amps == 0:
+                if key not in self.paused:
+                    changes[key] = 0
+            elif key in self.paused or current is None or amps < current:
+                changes[key] = amps
+            elif (amps - current >= self.hysteresis and
+                  now - self._last_command.get(key, float('-inf')) >= self.min_command_interval):
+                changes[key] = amps
+
+        if self.idle_current:
+            for key, status in statuses.items():
+                if (status is not None and key not in self._sessions and
+                        self.limits.get(key) != self.idle_current and
+                        now - self._last_command.get(key, float('-inf')) >= self.min_command_interval):
+                    changes[key] = self.idle_current
+
+        return changes
+
+    async def _send(self, key: str, amps: int) -> bool:
+        charger = self.fleet.chargers[key]
+        self._last_command[key] = time.monotonic()
+        self.commands_sent += 1
+        try:
+            if amps == 0:
+                ok = await asyncio.wait_for(charger.stop_charging(), self.command_timeout)
+                if ok:
+                    self.paused.add(key)
+                return ok
+
+            ok = await asyncio.wait_for(charger.set_max_current(amps), self.command_timeout)
+            if ok:
+                self.limits[key] = amps
+                if key in self.paused:
+                    self.commands_sent += 1
+                    if await asyncio.wait_for(charger.start_charging(), self.command_timeout):
+                        self.paused.discard(key)
+            return ok
+        except asyncio.TimeoutError:
+            logger.warning(f"Setting {key} to {amps}A timed out")
+            return False
+
+    async def apply(self, changes: Dict[str, int]) -> Dict[str, bool]:
+        """Send planned limits, decreases and pauses first
+
+        Increases are only sent once every decrease was acknowledged.
+
+        Returns:
+            Whether each charger acknowledged its command (False for
+            increases held back)
+        """
+        decreases = [key for key, amps in changes.items()
+                     if amps == 0 or (key not in self.paused and
+                                      amps < self.limits.get(key, self.max_current + 1))]
+        increases = [key for key in changes if key not in decreases]
+
+        limit = self.fleet._limit()
+
+        async def send(key):
+            async with limit:
+                return await self._send(key, changes[key])
+
+        results = dict(zip(decreases, await asyncio.gather(*(send(key) for key in decreases))))
+        if all(results.values()):
+            results.update(zip(increases, await asyncio.gather(*(send(key) for key in increases))))
+        elif increases:
+            # The chargers that failed may still draw their old limit
+            logger.warning(f"Holding back {len(increases)} increase(s) after a failed decrease")
+            results.update(dict.fromkeys(increases, False))
+
+        for key, ok in results.items():
+            if not ok:
+                logger.warning(f"Charger {key} did not accept {changes[key]}A")
+        return results
+
+    async def balance(self, statuses: Dict[str, Optional[ChargerStatus]]) -> Dict[str, int]:
+        """Plan and apply one cycle for the given statuses
+
+        Returns:
+            The limits that were sent
+        """
+        changes = self.plan(statuses)
+        if changes:
+            await self.apply(changes)
+        return changes
+
+    async def step(self) -> Dict[str, int]:
+        """Poll the fleet and balance once"""
+        return await self.balance(await self.fleet.poll())
+
+    async def run(self, interval: float = 5.0, duration: Optional[float] = None):
+        """Balance on a fixed schedule
+
+        Args:
+            interval: Time between cycles in seconds
+            duration: Total duration (None for indefinite)
+        """
+        await self.fleet.run(interval=interval, duration=duration, callback=self.balance)
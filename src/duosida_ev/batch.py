@@ -0,0 +1,176 @@
+"""
+Batch decoding of captured charger traffic
+"""
+
+import sys
+import logging
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .charger import ChargerStatus, _decode_status
+from .protobuf import ProtobufFrameReader
+
+logger = logging.getLogger(__name__)
+
+# Array typecode per ChargerStatus field; None for string columns (lists)
+COLUMN_TYPES = {
+    'conn_status': 'q',
+    'voltage': 'd',
+    'voltage2': 'd',
+    'voltage3': 'd',
+    'current': 'd',
+    'current2': 'd',
+    'current3': 'd',
+    'power': 'd',
+    'temperature_station': 'd',
+    'temperature_internal': 'd',
+    'session_energy': 'd',
+    'timestamp': 'q',
+    'cp_voltage_raw': 'd',
+    'device_id': None,
+    'model': None,
+    'manufacturer': None,
+    'firmware': None,
+}
+
+# Rows decoded before being transposed into the columns
+_BLOCK_SIZE = 4096
+
+Columns = Dict[str, Union[array, List[str]]]
+
+
+def iter_frames(data: bytes) -> Iterator[bytes]:
+    """Split a captured byte stream into protobuf messages
+
+    Uses the same boundary rules as the socket code (see
+    ProtobufFrameReader), so it handles raw dumps of the TCP stream in
+    either direction.
+    """
+    reader = ProtobufFrameReader(max_buffer=max(len(data), 65536))
+    reader.feed(data)
+    yield from reader
+    frame = reader.flush()
+    if frame:
+        yield frame
+
+
+def _empty_columns() -> Columns:
+    return {name: list() if typecode is None else array(typecode)
+            for name, typecode in COLUMN_TYPES.items()}
+
+
+def _append_rows(columns: Columns, rows: List[tuple]):
+    for name, values in zip(ChargerStatus._fields, zip(*rows)):
+        if COLUMN_TYPES[name] is None:
+            # Every frame repeats the same few strings; share one object each
+            columns[name].extend(map(sys.intern, values))
+        else:
+            columns[name].extend(values)
+
+
+class StatusDecoder:
+    """Incrementally decode status frames into column arrays
+
+    Frames without telemetry (command acknowledgements, DataContinueReq,
+    handshake messages) are counted in skipped and otherwise ignored.
+
+    Example:
+        decoder = StatusDecoder()
+        for chunk in chunks:
+            decoder.feed(chunk)
+        columns = decoder.finish()
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.skipped = 0
+        self._columns = _empty_columns()
+        self._rows: List[tuple] = []
+        self._device_info: Dict[str, Dict[str, str]] = {}
+        self._reader: Optional[ProtobufFrameReader] = None
+
+    def add_frames(self, frames: Iterable[bytes]):
+        """Decode already separated frames"""
+        rows = self._rows
+        device_info = self._device_info
+        for frame in frames:
+            self.frames += 1
+            values = _decode_status(frame, device_info)
+            if values is None:
+                self.skipped += 1
+                continue
+            rows.append(values)
+            if len(rows) >= _BLOCK_SIZE:
+                _append_rows(self._columns, rows)
+                rows.clear()
+
+    def feed(self, data: bytes):
+        """Decode the frames completed by a chunk of a captured stream"""
+        if self._reader is None:
+            self._reader = ProtobufFrameReader()
+        self._reader.max_buffer = max(self._reader.max_buffer, self._reader.pending + len(data))
+        self._reader.feed(data)
+        self.add_frames(self._reader)
+
+    def finish(self) -> Columns:
+        """Decode what is left and return the columns
+
+        Returns:
+            Dict mapping each ChargerStatus field to an array (typecodes in
+            COLUMN_TYPES) or, for string fields, a list
+        """
+        if self._reader is not None:
+            frame = self._reader.flush()
+            if frame:
+                self.add_frames((frame,))
+        if self._rows:
+            _append_rows(self._columns, self._rows)
+            self._rows.clear()
+        return self._columns
+
+
+def decode_status_frames(data: Union[bytes, Iterable[bytes]]) -> Columns:
+    """Decode many status frames into one column per ChargerStatus field
+
+    Args:
+        data: Captured stream as one buffer, or an iterable of frames
+
+    Returns:
+        Dict mapping each ChargerStatus field to an array (typecodes in
+        COLUMN_TYPES) or, for string fields, a list. Frames without
+        telemetry are left out.
+
+    Example:
+        columns = decode_status_frames(open('capture.bin', 'rb').read())
+        print(max(columns['power']))
+    """
+    decoder = StatusDecoder()
+    decoder.add_frames(iter_frames(data) if isinstance(data, (bytes, bytearray, memoryview))
+                       else data)
+    return decoder.finish()
+
+
+def decode_status_file(path: str, chunk_size: int = 1 << 20) -> Columns:
+    """Decode a raw dump of charger traffic into columns
+
+    The file is read in chunks, so it does not need to fit in memory.
+    pcap files must be reduced to the TCP payload first, e.g. with
+    Wireshark's "Follow TCP Stream" saved as raw data.
+
+    Args:
+        path: File holding the captured byte stream
+        chunk_size: Bytes read at a time
+
+    Returns:
+        Same as decode_status_frames()
+    """
+    decoder = StatusDecoder()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            decoder.feed(chunk)
+    columns = decoder.finish()
+    logger.debug(f"Decoded {decoder.frames - decoder.skipped} of {decoder.frames} frames from {path}")
+    return columns
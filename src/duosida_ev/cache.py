@@ -0,0 +1,120 @@
+"""
+Persistent cache of discovered Duosida chargers
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+from typing import List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_mac(mac: str) -> str:
+    """Normalize a MAC address for comparison"""
+    return re.sub(r'[^0-9A-F]', '', mac.upper())
+
+
+class DiscoveryCache:
+    """On-disk cache of discovered chargers keyed by MAC address
+
+    Stores IP address, device ID, type and firmware for each charger so
+    that the UDP broadcast and TCP device ID lookup can be skipped while
+    an entry is fresh. Entries older than ttl seconds are ignored.
+
+    The file lives in $XDG_CACHE_HOME/duosida-ev/discovery.json
+    (~/.cache/duosida-ev/discovery.json by default).
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 86400.0):
+        self.path = path or self.default_path()
+        self.ttl = ttl
+        self._devices: Optional[Dict[str, Dict]] = None
+
+    @staticmethod
+    def default_path() -> str:
+        """Return the default cache file location"""
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(base, 'duosida-ev', 'discovery.json')
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._devices is None:
+            self._devices = {}
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == self.VERSION:
+                    self._devices = dict(data.get('devices', {}))
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.debug(f"Ignoring unreadable discovery cache {self.path}: {e}")
+        return self._devices
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get('updated', 0) < self.ttl
+
+    def entries(self) -> List[Dict]:
+        """Return all fresh entries"""
+        return [dict(entry) for entry in self._load().values() if self._is_fresh(entry)]
+
+    def get(self, mac: str) -> Optional[Dict]:
+        """Return the fresh entry for a MAC address, if any"""
+        entry = self._load().get(_normalize_mac(mac))
+        if entry and self._is_fresh(entry):
+            return dict(entry)
+        return None
+
+    def find(self, target: str) -> Optional[Dict]:
+        """Return the fresh entry matching an IP, MAC or device ID, if any"""
+        mac = _normalize_mac(target)
+        for entry in self.entries():
+            if target in (entry.get('ip'), entry.get('device_id')):
+                return entry
+            if mac and mac == _normalize_mac(entry.get('mac', '')):
+                return entry
+        return None
+
+    def update(self, device: Dict):
+        """Store or refresh a discovered device
+
+        A known device ID is kept if the new record has none.
+        """
+        if not device.get('mac'):
+            return
+        key = _normalize_mac(device['mac'])
+        devices = self._load()
+        previous = devices.get(key, {})
+        devices[key] = {
+            'ip': device.get('ip'),
+            'mac': device['mac'],
+            'type': device.get('type'),
+            'firmware': device.get('firmware'),
+            'device_id': device.get('device_id') or previous.get('device_id'),
+            'updated': time.time(),
+        }
+
+    def invalidate(self, mac: str):
+        """Forget a device, e.g. after it failed to connect"""
+        self._load().pop(_normalize_mac(mac), None)
+
+    def clear(self):
+        """Forget all devices"""
+        self._devices = {}
+
+    def save(self):
+        """Write the cache to disk atomically"""
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.discovery-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': self.VERSION, 'devices': self._load()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f"Could not write discovery cache {self.path}: {e}")
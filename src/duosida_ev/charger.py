@@ -3,13 +3,21 @@ Duosida EV Charger - Direct TCP communication
 """
 
 import socket
-import struct
 import time
+import random
 import binascii
 import logging
-from dataclasses import dataclass
-from typing import Optional, Dict, Any
-
+from collections import deque
+from datetime import datetime
+from operator import attrgetter
+from typing import Optional, Dict, Any, Callable, List
+
+from .protobuf import ProtobufEncoder, ProtobufDecoder, ProtobufFrameReader
+from .schema import (
+    FRAME, PAYLOAD, STATUS_DATA, DEVICE_INFO, CONFIG_COMMAND, START_COMMAND, STOP_COMMAND,
+)
+from .history import StatusHistory
+from .stats import ConnectionStats, LatencyStats
 from .exceptions import (
     ConnectionError as ChargerConnectionError,
     CommunicationError,
@@ -21,154 +29,112 @@ from .exceptions import (
 logger = logging.getLogger(__name__)
 
 
-class ProtobufEncoder:
-    """Simple protobuf encoder for the messages we need"""
-
-    @staticmethod
-    def encode_varint(value: int) -> bytes:
-        """Encode integer as protobuf varint"""
-        result = bytearray()
-        while value > 0x7F:
-            result.append((value & 0x7F) | 0x80)
-            value >>= 7
-        result.append(value & 0x7F)
-        return bytes(result)
-
-    @staticmethod
-    def encode_string(field_num: int, value: str) -> bytes:
-        """Encode string field"""
-        data = value.encode('utf-8')
-        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 2)
-        length = ProtobufEncoder.encode_varint(len(data))
-        return field_header + length + data
-
-    @staticmethod
-    def encode_float(field_num: int, value: float) -> bytes:
-        """Encode float field (32-bit)"""
-        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 5)
-        return field_header + struct.pack('<f', value)
-
-    @staticmethod
-    def encode_varint_field(field_num: int, value: int) -> bytes:
-        """Encode varint field"""
-        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 0)
-        return field_header + ProtobufEncoder.encode_varint(value)
-
-    @staticmethod
-    def encode_embedded_message(field_num: int, data: bytes) -> bytes:
-        """Encode embedded message"""
-        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 2)
-        length = ProtobufEncoder.encode_varint(len(data))
-        return field_header + length + data
-
-
-class ProtobufDecoder:
-    """Simple protobuf decoder"""
-
-    @staticmethod
-    def decode_varint(data: bytes, offset: int) -> tuple:
-        """Decode protobuf varint, returns (value, next_offset)"""
-        result = 0
-        shift = 0
-        while offset < len(data):
-            byte = data[offset]
-            result |= (byte & 0x7F) << shift
-            offset += 1
-            if not (byte & 0x80):
-                break
-            shift += 7
-        return result, offset
-
-    @staticmethod
-    def decode_message(data: bytes) -> Dict[int, Any]:
-        """Decode protobuf message into field dictionary"""
-        fields = {}
-        offset = 0
-
-        while offset < len(data):
-            if offset >= len(data):
-                break
-
-            key, offset = ProtobufDecoder.decode_varint(data, offset)
-            field_number = key >> 3
-            wire_type = key & 0x07
-
-            if wire_type == 0:  # Varint
-                value, offset = ProtobufDecoder.decode_varint(data, offset)
-                fields[field_number] = value
-
-            elif wire_type == 1:  # 64-bit
-                if offset + 8 <= len(data):
-                    value = struct.unpack('<d', data[offset:offset+8])[0]
-                    fields[field_number] = value
-                    offset += 8
-
-            elif wire_type == 2:  # Length-delimited
-                length, offset = ProtobufDecoder.decode_varint(data, offset)
-                if offset + length <= len(data):
-                    value = data[offset:offset+length]
-                    try:
-                        decoded = value.decode('utf-8')
-                        fields[field_number] = decoded
-                    except:
-                        fields[field_number] = value
-                    offset += length
-
-            elif wire_type == 5:  # 32-bit
-                if offset + 4 <= len(data):
-                    value = struct.unpack('<f', data[offset:offset+4])[0]
-                    fields[field_number] = value
-                    offset += 4
-
-        return fields
-
-
-@dataclass
+# Human-readable names of conn_status values
+STATE_NAMES = {
+    -1: "Undefined",
+    0: "Available",
+    1: "Preparing",
+    2: "Charging",
+    3: "Cooling",
+    4: "SuspendedEV",
+    5: "Finished",
+    6: "Holiday",
+}
+
+# Control Pilot voltage implied by each conn_status (IEC 61851-1)
+CP_VOLTAGES = {
+    0: 12.0,  # State A: No vehicle connected
+    1: 9.0,   # State B: Vehicle connected, not ready
+    2: 6.0,   # State C: Charging
+    3: 6.0,   # Cooling (still in charging state)
+    4: 9.0,   # SuspendedEV (vehicle connected but paused)
+    5: 9.0,   # Finished (vehicle still connected)
+    6: 12.0,  # Holiday mode
+}
+
+
 class ChargerStatus:
-    """Charger status data"""
-    # Connection status (first for quick access)
-    conn_status: int = 0
-
-    # Electrical measurements
-    voltage: float = 0.0
-    voltage2: float = 0.0  # L2 phase
-    voltage3: float = 0.0  # L3 phase
-    current: float = 0.0
-    current2: float = 0.0  # L2 phase
-    current3: float = 0.0  # L3 phase
-    power: float = 0.0
-
-    # Temperature
-    temperature_station: float = 0.0
-    temperature_internal: float = 0.0
-
-    # Session data
-    session_energy: float = 0.0
-    timestamp: int = 0  # Session start timestamp
-
-    # Control Pilot
-    cp_voltage_raw: float = 0.0  # Field 9 - actual CP voltage reading
-
-    # Device info (last)
-    device_id: str = ""
-    model: str = ""
-    manufacturer: str = ""
-    firmware: str = ""
+    """Charger status data
+
+    A slotted class rather than a dataclass, so that keeping many samples
+    in memory does not cost a __dict__ each. Attributes are read and
+    assigned as before; to_tuple() and _make() convert to and from plain
+    tuples in _fields order.
+    """
+
+    __slots__ = (
+        # Connection status (first for quick access)
+        'conn_status',
+        # Electrical measurements
+        'voltage', 'voltage2', 'voltage3',  # L1, L2, L3 phases
+        'current', 'current2', 'current3',
+        'power',
+        # Temperature
+        'temperature_station', 'temperature_internal',
+        # Session data
+        'session_energy',
+        'timestamp',  # Session start timestamp
+        # Control Pilot
+        'cp_voltage_raw',  # Field 9 - actual CP voltage reading
+        # Device info (last)
+        'device_id', 'model', 'manufacturer', 'firmware',
+    )
+    _fields = __slots__
+
+    # Same semantics as the former dataclass: mutable, compared by value
+    __hash__ = None
+
+    def __init__(self, conn_status: int = 0,
+                 voltage: float = 0.0, voltage2: float = 0.0, voltage3: float = 0.0,
+                 current: float = 0.0, current2: float = 0.0, current3: float = 0.0,
+                 power: float = 0.0,
+                 temperature_station: float = 0.0, temperature_internal: float = 0.0,
+                 session_energy: float = 0.0, timestamp: int = 0,
+                 cp_voltage_raw: float = 0.0,
+                 device_id: str = "", model: str = "", manufacturer: str = "",
+                 firmware: str = ""):
+        self.conn_status = conn_status
+        self.voltage = voltage
+        self.voltage2 = voltage2
+        self.voltage3 = voltage3
+        self.current = current
+        self.current2 = current2
+        self.current3 = current3
+        self.power = power
+        self.temperature_station = temperature_station
+        self.temperature_internal = temperature_internal
+        self.session_energy = session_energy
+        self.timestamp = timestamp
+        self.cp_voltage_raw = cp_voltage_raw
+        self.device_id = device_id
+        self.model = model
+        self.manufacturer = manufacturer
+        self.firmware = firmware
+
+    @classmethod
+    def _make(cls, values) -> 'ChargerStatus':
+        """Create a status from values in _fields order"""
+        return cls(*values)
+
+    def to_tuple(self) -> tuple:
+        """Return all fields as a tuple in _fields order"""
+        return _status_values(self)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return _status_values(self) == _status_values(other)
+
+    def __repr__(self) -> str:
+        values = ', '.join(f"{name}={value!r}"
+                           for name, value in zip(self._fields, _status_values(self)))
+        return f"ChargerStatus({values})"
 
     @property
     def state(self) -> str:
         """Get human-readable state from conn_status"""
-        status_names = {
-            -1: "Undefined",
-            0: "Available",
-            1: "Preparing",
-            2: "Charging",
-            3: "Cooling",
-            4: "SuspendedEV",
-            5: "Finished",
-            6: "Holiday"
-        }
-        return status_names.get(int(self.conn_status), f"Unknown ({self.conn_status})")
+        name = STATE_NAMES.get(int(self.conn_status))
+        return name if name is not None else f"Unknown ({self.conn_status})"
 
     @property
     def cp_voltage(self) -> float:
@@ -180,26 +146,13 @@ class ChargerStatus:
         # Use actual reading if available
         if self.cp_voltage_raw > 0:
             return self.cp_voltage_raw
-
-        # Fallback: derive from conn_status
-        cp_voltages = {
-            0: 12.0,  # State A: No vehicle connected
-            1: 9.0,   # State B: Vehicle connected, not ready
-            2: 6.0,   # State C: Charging
-            3: 6.0,   # Cooling (still in charging state)
-            4: 9.0,   # SuspendedEV (vehicle connected but paused)
-            5: 9.0,   # Finished (vehicle still connected)
-            6: 12.0,  # Holiday mode
-        }
-        return cp_voltages.get(int(self.conn_status), 0.0)
-
+        return CP_VOLTAGES.get(int(self.conn_status), 0.0)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert status to dictionary for JSON export"""
         # Calculate session time in minutes from timestamp
         session_time = 0
         if self.timestamp > 0:
-            import time
             session_time = int((time.time() - self.timestamp) / 60)
 
         return {
@@ -283,8 +236,6 @@ class ChargerStatus:
                 result += f"""
     Energy: {self.session_energy:.2f} kWh"""
             if self.timestamp > 0:
-                from datetime import datetime
-                import time
                 dt = datetime.fromtimestamp(self.timestamp)
                 session_minutes = int((time.time() - self.timestamp) / 60)
                 result += f"""
@@ -294,69 +245,638 @@ class ChargerStatus:
         return result
 
 
-class DuosidaCharger:
+_status_values = attrgetter(*ChargerStatus._fields)
+
+
+def _open_socket(address: tuple, timeout: Optional[float]) -> socket.socket:
+    """Default socket_factory: a plain TCP connection"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+# Handshake messages sent by the official app after connecting
+HANDSHAKE_HELLO = binascii.unhexlify("a2030408001000a20603494f53a80600")
+HANDSHAKE_REGISTER = (
+    binascii.unhexlify("1a0a089ee6da910d10001800") +
+    binascii.unhexlify("a2061330333130313037313132313232333630333734") +
+    binascii.unhexlify("a8069e818040")
+)
+
+
+def _decode_device_info(data) -> Dict[str, str]:
+    """Decode the device info message carried in outer field 4"""
+    info = DEVICE_INFO.decode(data)
+    return {field.name: info.get(field.name, "").rstrip('\x00') for field in DEVICE_INFO.fields}
+
+
+def _decode_status(response,
+                   device_info_cache: Optional[Dict[str, Dict[str, str]]] = None,
+                   stats: Optional[ConnectionStats] = None) -> Optional[tuple]:
+    """Decode a status frame into values in ChargerStatus._fields order
+
+    Args:
+        response: Complete frame
+        device_info_cache: Optional dict of decoded device info per device
+                           ID. Device info never changes during a session,
+                           so it is only decoded once per device.
+        stats: Optional ConnectionStats counting decoded, rejected and
+               skipped frames
+
+    Returns:
+        Field values, or None if the frame carries no telemetry
+        (e.g. DataContinueReq)
+    """
+    frame = FRAME.decode(response)
+    device_id = frame.get('device_id', "")
+
+    info = None
+    if device_info_cache is not None and device_id:
+        info = device_info_cache.get(device_id)
+    if info is None and 'device_info' in frame:
+        info = _decode_device_info(frame['device_info'])
+        device_id = device_id or info['device_id']
+        if device_info_cache is not None and device_id:
+            device_info_cache[device_id] = info
+    info = info or {}
+
+    # Nested messages are memoryviews into response, decoded only when needed
+    fields = {}
+    if 'payload' in frame:
+        payload = PAYLOAD.decode(frame['payload'])
+        msg_type = payload.get('type', "")
+
+        if msg_type == "DataVendorStatusReq":
+            if 'status' in payload:
+                fields = STATUS_DATA.decode(payload['status'])
+        elif msg_type == "DataContinueReq":
+            if stats is not None:
+                stats.continue_frames_skipped += 1
+            return None
+        else:
+            status_data = payload.get('status', payload.get('status_alt'))
+            fields = STATUS_DATA.decode(
+                status_data if status_data is not None else frame['payload'])
+    else:
+        fields = STATUS_DATA.decode(response)
+
+    has_key_fields = any(name in fields for name in
+                         ('voltage', 'current', 'temperature_station', 'conn_status'))
+    if not has_key_fields:
+        if stats is not None:
+            stats.frames_rejected += 1
+        return None
+    if stats is not None:
+        stats.statuses_decoded += 1
+
+    get = fields.get
+    voltage = get('voltage', 0.0)
+    current = get('current', 0.0)
+    return (
+        get('conn_status', 0),
+        voltage,
+        0.0,  # L2 phase - not mapped yet
+        0.0,  # L3 phase - not mapped yet
+        current,
+        0.0,  # L2 phase - not mapped yet
+        0.0,  # L3 phase - not mapped yet
+        voltage * current if voltage > 0 and current > 0 else 0.0,
+        get('temperature_station', 0.0),
+        get('temperature_internal', 0.0),
+        get('session_energy', 0.0),
+        get('timestamp', 0),
+        get('cp_voltage', 0.0),  # Actual CP voltage reading
+        device_id,
+        info.get('model', ""),
+        info.get('manufacturer', ""),
+        info.get('firmware', ""),
+    )
+
+
+def _parse_status_frame(response: bytes,
+                        device_info_cache: Optional[Dict[str, Dict[str, str]]] = None,
+                        stats: Optional[ConnectionStats] = None
+                        ) -> Optional[ChargerStatus]:
+    """Decode a status frame received from the charger
+
+    Args:
+        response: Complete frame
+        device_info_cache: See _decode_status()
+        stats: See _decode_status()
+
+    Returns:
+        ChargerStatus, or None if the frame carries no telemetry
+        (e.g. DataContinueReq)
+    """
+    values = _decode_status(response, device_info_cache, stats)
+    return None if values is None else ChargerStatus(*values)
+
+
+# Smallest change of each measurement that counts as a change
+DEFAULT_DEADBANDS = {
+    'voltage': 1.0,
+    'current': 0.1,
+    'power': 50.0,
+    'temperature_station': 1.0,
+    'temperature_internal': 1.0,
+    'session_energy': 0.01,
+    'cp_voltage_raw': 0.5,
+}
+
+# Fields where any change counts
+DISCRETE_FIELDS = ('conn_status', 'timestamp', 'device_id')
+
+
+class StatusFilter:
+    """Pass on only statuses that changed meaningfully
+
+    A status passes if a discrete field (state, session start, device)
+    changed, if a measurement moved by more than its deadband since the
+    last status that passed, or if keyframe_interval seconds went by
+    without one. Comparing against the last status passed, rather than the
+    last one seen, keeps slow drift from going unnoticed.
+    """
+
+    def __init__(self, deadbands: Optional[Dict[str, float]] = None,
+                 keyframe_interval: Optional[float] = 60.0):
+        """
+        Args:
+            deadbands: Deadband per ChargerStatus field, merged over
+                       DEFAULT_DEADBANDS (a value of None ignores the field)
+            keyframe_interval: Pass a status at least this often in seconds,
+                               changed or not (None to disable)
+        """
+        merged = dict(DEFAULT_DEADBANDS)
+        merged.update(deadbands or {})
+        self.deadbands = {name: band for name, band in merged.items() if band is not None}
+        self.keyframe_interval = keyframe_interval
+        self.passed = 0
+        self.suppressed = 0
+        self._last: Optional[ChargerStatus] = None
+        self._last_time = 0.0
+
+    def changed(self, status: ChargerStatus) -> bool:
+        """True if status differs from the last passed one beyond the deadbands"""
+        last = self._last
+        if last is None:
+            return True
+        for name in DISCRETE_FIELDS:
+            if getattr(status, name) != getattr(last, name):
+                return True
+        for name, band in self.deadbands.items():
+            if abs(getattr(status, name) - getattr(last, name)) > band:
+                return True
+        return False
+
+    def __call__(self, status: ChargerStatus, now: Optional[float] = None) -> bool:
+        """Decide whether to pass on status, remembering it if so"""
+        now = time.monotonic() if now is None else now
+        keyframe = (self.keyframe_interval is not None and
+                    now - self._last_time >= self.keyframe_interval)
+        if keyframe or self.changed(status):
+            self._last = status
+            self._last_time = now
+            self.passed += 1
+            return True
+        self.suppressed += 1
+        return False
+
+    def reset(self):
+        """Forget the last status, so the next one passes"""
+        self._last = None
+
+
+def _is_connection_lost(error: Exception) -> bool:
+    """True if an exception means the TCP connection is gone"""
+    return isinstance(error, OSError) and not isinstance(error, socket.timeout)
+
+
+def _ack_sequence(frame: bytes) -> Optional[int]:
+    """Return the command sequence number a frame acknowledges, if any
+
+    Pushed frames carry a counter of their own in field 101, so only
+    frames without a payload (field 16) count as acknowledgements.
+    """
+    message = FRAME.decode(frame)
+    if 'payload' in message:
+        return None
+    return message.get('sequence')
+
+
+_encode_config = CONFIG_COMMAND.encoder('key', 'value')
+_encode_config_frame = FRAME.encoder('config', 'device_id', 'sequence')
+_encode_start_frame = FRAME.encoder('start', 'device_id', 'sequence')
+_encode_stop_frame = FRAME.encoder('stop', 'device_id', 'sequence')
+_encode_config_value = CONFIG_COMMAND.encoder('value')
+_CONFIG_HEADER = FRAME.header('config')
+_SEQUENCE_HEADER = FRAME.header('sequence')
+_START_COMMAND = START_COMMAND.encode(mode=1, remote={'tag': "XC_Remote_Tag"})
+
+
+def _build_config_command(key: str, value: str, device_id: str, sequence: int) -> bytes:
+    """Build a configuration command (field 10)"""
+    return _encode_config_frame(_encode_config(key, value), device_id, sequence)
+
+
+class _ConfigTemplates:
+    """Per-charger cache of pre-encoded config commands
+
+    Two commands setting the same key to the same value differ only in the
+    trailing sequence number, so everything before it (field 10 with key and
+    value, field 100 with the device ID and the field 101 header) is encoded
+    once and reused. The output is identical to _build_config_command().
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self):
+        self._device_id: Optional[str] = None
+        self._device_part = b''
+        self._keys: Dict[str, bytes] = {}
+        self._prefixes: Dict[tuple, bytes] = {}
+
+    def build(self, key: str, value: str, device_id: str, sequence: int) -> bytes:
+        """Build a configuration command (field 10)"""
+        if device_id != self._device_id:
+            self._device_id = device_id
+            self._device_part = FRAME.encode(device_id=device_id) + _SEQUENCE_HEADER
+            self._prefixes.clear()
+
+        prefix = self._prefixes.get((key, value))
+        if prefix is None:
+            key_part = self._keys.get(key)
+            if key_part is None:
+                key_part = CONFIG_COMMAND.encode(key=key)
+                if len(self._keys) < self.MAX_ENTRIES:
+                    self._keys[key] = key_part
+            config = key_part + _encode_config_value(value)
+            prefix = _CONFIG_HEADER + ProtobufEncoder.encode_varint(len(config)) + config + self._device_part
+            if len(self._prefixes) < self.MAX_ENTRIES:
+                self._prefixes[(key, value)] = prefix
+
+        return prefix + ProtobufEncoder.encode_varint(sequence)
+
+
+def _build_start_command(device_id: str, sequence: int) -> bytes:
+    """Build a start charging command (field 34)"""
+    return _encode_start_frame(_START_COMMAND, device_id, sequence)
+
+
+def _build_stop_command(session_id: int, device_id: str, sequence: int) -> bytes:
+    """Build a stop charging command (field 36)"""
+    return _encode_stop_frame(STOP_COMMAND.encode(session_id=session_id), device_id, sequence)
+
+
+class _ConnectionState:
+    """Transport-independent state of one charger connection
+
+    DuosidaCharger and AsyncDuosidaCharger only differ in how they read and
+    write. Everything else about a connection is kept and decided here, once
+    for both: command sequence numbers, stream framing and the frames set
+    aside while a command waits for its acknowledgement, acknowledgement
+    matching, the reconnect backoff, statistics and the last good status.
+    """
+
+    # How long the stream must stay quiet before a message without a
+    # field 101 trailer is considered complete
+    FRAME_SETTLE_TIME = 0.05
+
+    def __init__(self, reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0,
+                 history_size: int = 0):
+        """
+        Args:
+            reconnect_delay: Initial delay between reconnection attempts
+            max_reconnect_delay: Upper bound for the exponential backoff
+            history_size: Number of statuses kept in history (0 for none)
+        """
+        self.sequence = 2
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnect_count = 0
+        self.reconnect_failures = 0
+        self.stats = ConnectionStats()
+        self.latency = LatencyStats()
+        self.history: Optional[StatusHistory] = StatusHistory(history_size) if history_size else None
+        self.last_good_status: Optional[ChargerStatus] = None
+        self.frames = ProtobufFrameReader()
+        # Frames received while waiting for a command acknowledgement
+        self.backlog: deque = deque(maxlen=32)
+        # Device info per device ID, for the current connection
+        self.device_info: Dict[str, Dict[str, str]] = {}
+        self.config_templates = _ConfigTemplates()
+
+    def connected(self, start: float, connected: float):
+        """Start over on a new connection, opened at connected after start"""
+        self.latency.connect.record(connected - start)
+        self.frames.clear()
+        self.backlog.clear()
+        # The charger may have been updated while it was away, so its
+        # device info is decoded again on every new connection
+        self.device_info.clear()
+
+    def handshake_done(self, connected: float):
+        """Count a connection whose handshake completed"""
+        self.latency.handshake.record(time.monotonic() - connected)
+        self.stats.connects += 1
+
+    def connect_failed(self, error: BaseException):
+        """Count a connection attempt that failed with error"""
+        self.stats.error(error)
+        self.stats.connect_failures += 1
+
+    def dropped(self):
+        """Discard data buffered from a connection that is gone"""
+        self.frames.clear()
+        self.backlog.clear()
+
+    def next_sequence(self) -> int:
+        """Take the next sequence number"""
+        sequence = self.sequence
+        self.sequence += 1
+        return sequence
+
+    def reconnect_backoff(self) -> float:
+        """Seconds to wait before the next reconnection attempt
+
+        Zero after a success; after failed attempts the delay grows
+        exponentially up to max_reconnect_delay, with jitter, so a
+        charger that is down is not hammered.
+        """
+        if not self.reconnect_failures:
+            return 0.0
+        delay = min(self.max_reconnect_delay,
+                    self.reconnect_delay * 2 ** (self.reconnect_failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def reconnected(self, success: bool) -> bool:
+        """Record the outcome of a reconnection attempt"""
+        if success:
+            self.reconnect_failures = 0
+            self.reconnect_count += 1
+            self.stats.reconnects += 1
+        else:
+            self.reconnect_failures += 1
+        return success
+
+    def frame_wait(self, deadline: float) -> tuple:
+        """How long to wait for more data before deadline
+
+        Returns:
+            (wait, settling): settling is True if the buffer may already
+            hold a message without trailer, which is complete once the
+            stream stays quiet for FRAME_SETTLE_TIME
+        """
+        remaining = deadline - time.monotonic()
+        settling = self.frames.at_boundary
+        return (min(remaining, self.FRAME_SETTLE_TIME) if settling else remaining), settling
+
+    def received(self, data: bytes) -> Optional[bytes]:
+        """Feed data read from the stream
+
+        Returns:
+            The next complete message, b'' (or the buffered remainder) if
+            the connection was closed, or None if more data is needed
+        """
+        self.stats.bytes_received += len(data)
+        if not data:
+            return self.frames.flush() or b''
+        self.frames.feed(data)
+        return self.frames.next_frame()
+
+    def frame_read(self, frame: bytes) -> bytes:
+        """Count a message taken from the stream and return it"""
+        if frame:
+            self.stats.frames_received += 1
+        return frame
+
+    def command_sent(self, sequence: int):
+        """Count a command written with sequence, which is then used up"""
+        self.sequence = max(self.sequence, sequence + 1)
+        self.stats.commands_sent += 1
+
+    def is_ack(self, frame: bytes, sequence: int, start: float) -> bool:
+        """Check whether a frame acknowledges command sequence
+
+        The reply is matched on field 101, which carries the sequence
+        number of the command; frames with a payload are never taken for
+        the reply. Other frames are kept in the backlog for get_status().
+        """
+        if _ack_sequence(frame) == sequence:
+            self.acknowledged(start)
+            return True
+        self.backlog.append(frame)
+        return False
+
+    def acknowledged(self, start: float):
+        """Count a command acknowledged after being sent at start"""
+        self.latency.command.record(time.monotonic() - start)
+        self.stats.commands_acknowledged += 1
+
+    def ack_timed_out(self, sequence: int, ack_timeout: float) -> ChargerTimeoutError:
+        """Count a missing acknowledgement and return the error to raise"""
+        self.stats.command_timeouts += 1
+        return ChargerTimeoutError(
+            f"No acknowledgement for command {sequence} within {ack_timeout}s")
+
+    def parse(self, frame: bytes) -> Optional[ChargerStatus]:
+        """Parse a status frame, or None if it carries no telemetry"""
+        return _parse_status_frame(frame, self.device_info, self.stats)
+
+    def remember(self, status: ChargerStatus):
+        """Keep a status read from the charger as the latest one"""
+        self.last_good_status = status
+        if self.history is not None:
+            self.history.append(status)
+
+    def status_read(self, status: ChargerStatus, start: float):
+        """Count and keep a status get_status() read, requested at start"""
+        self.latency.status.record(time.monotonic() - start)
+        self.remember(status)
+
+    def fallback(self, use_cache: bool) -> Optional[ChargerStatus]:
+        """The last good status, if get_status() may serve it instead"""
+        if use_cache and self.last_good_status:
+            self.stats.cache_fallbacks += 1
+            return self.last_good_status
+        return None
+
+
+def _state_attribute(name: str, doc: str) -> property:
+    """Property reading and writing an attribute of self._state"""
+    def get(self):
+        return getattr(self._state, name)
+
+    def set(self, value):
+        setattr(self._state, name, value)
+    return property(get, set, doc=doc)
+
+
+class _ConnectionStateMixin:
+    """Attributes and subscriptions the charger clients share via _ConnectionState"""
+
+    sequence = _state_attribute('sequence', "Sequence number of the next command")
+    reconnect_delay = _state_attribute('reconnect_delay', "Initial delay between reconnection attempts")
+    max_reconnect_delay = _state_attribute('max_reconnect_delay', "Upper bound for the reconnect backoff")
+    reconnect_count = _state_attribute('reconnect_count', "Successful reconnections")
+    stats = _state_attribute('stats', "ConnectionStats of this client")
+    latency = _state_attribute('latency', "LatencyStats of this client")
+    history = _state_attribute('history', "StatusHistory, if history_size was given")
+    _last_good_status = _state_attribute('last_good_status', "Latest status read")
+    _device_info = _state_attribute('device_info', "Device info per device ID")
+    _backlog = _state_attribute('backlog', "Frames set aside while waiting for an ack")
+    _config_templates = _state_attribute('config_templates', "Pre-encoded config commands")
+
+    def subscribe(self, callback: Callable[[ChargerStatus], Any]) -> Callable[[], None]:
+        """Register a callback to receive every status dispatched by listen()
+
+        The asyncio client also accepts coroutine functions.
+
+        Returns:
+            Function that unsubscribes the callback again
+        """
+        self._subscribers.append(callback)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback: Callable[[ChargerStatus], Any]):
+        """Remove a callback registered with subscribe()"""
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
+
+    def stop_listening(self):
+        """Make listen() return after the frame it is waiting for"""
+        self._listening = False
+
+
+class DuosidaCharger(_ConnectionStateMixin):
     """Direct communication with Duosida EV Charger"""
 
     def __init__(self, host: str, port: int = 9988, device_id: str = "",
-                 timeout: float = 5.0, debug: bool = False):
+                 timeout: float = 5.0, debug: bool = False,
+                 ack_timeout: Optional[float] = 1.0, auto_reconnect: bool = False,
+                 reconnect_delay: float = 0.5, max_reconnect_delay: float = 30.0,
+                 history_size: int = 0,
+                 socket_factory: Optional[Callable[[tuple, Optional[float]], Any]] = None):
+        """
+        Args:
+            host: Charger IP address
+            port: Charger TCP port
+            device_id: Charger device ID
+            timeout: Socket timeout in seconds
+            debug: Print status in monitor() when no callback is given
+            ack_timeout: How long commands wait for an acknowledgement
+                         (None or 0 to send without waiting)
+            auto_reconnect: Transparently reconnect and redo the handshake
+                            when the connection drops
+            reconnect_delay: Initial delay between reconnection attempts
+            max_reconnect_delay: Upper bound for the exponential backoff
+            history_size: Number of statuses kept in self.history (0 for
+                          none)
+            socket_factory: Function opening the connection, called with
+                            ((host, port), timeout) and returning a
+                            connected socket-like object. Defaults to a
+                            plain TCP socket; see FaultInjector for one
+                            that injects network faults.
+        """
         self.host = host
         self.port = port
         self.device_id = device_id
         self.timeout = timeout
+        self.ack_timeout = ack_timeout
+        self.auto_reconnect = auto_reconnect
+        self._state = _ConnectionState(reconnect_delay, max_reconnect_delay, history_size)
+        self.socket_factory = socket_factory or _open_socket
         self.sock: Optional[socket.socket] = None
-        self.sequence = 2
-        self._last_good_status: Optional[ChargerStatus] = None
+        self._subscribers: List[Callable[[ChargerStatus], Any]] = []
+        self._listening = False
         self.debug = debug
 
     def connect(self) -> bool:
         """Connect to charger"""
+        state = self._state
         try:
-            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sock.settimeout(self.timeout)
-            self.sock.connect((self.host, self.port))
+            start = time.monotonic()
+            self.sock = self.socket_factory((self.host, self.port), self.timeout)
+            connected = time.monotonic()
+            state.connected(start, connected)
             logger.info(f"Connected to {self.host}:{self.port}")
             self._send_handshake()
+            state.handshake_done(connected)
             return True
         except socket.timeout as e:
             logger.error(f"Connection timed out: {e}")
-            return False
+            state.connect_failed(e)
         except socket.error as e:
             logger.error(f"Connection failed: {e}")
-            return False
+            state.connect_failed(e)
         except Exception as e:
             logger.error(f"Unexpected error connecting: {e}")
-            return False
+            state.connect_failed(e)
+        self._drop_connection()
+        return False
 
     def disconnect(self):
         """Disconnect from charger"""
         if self.sock:
-            self.sock.close()
-            self.sock = None
+            self._drop_connection()
             logger.info("Disconnected")
 
+    def _drop_connection(self):
+        """Close the socket and discard buffered data"""
+        if self.sock:
+            try:
+                self.sock.close()
+            except Exception:
+                pass
+            self.sock = None
+        self._state.dropped()
+
+    def _reconnect(self) -> bool:
+        """Re-establish a dropped connection, including the handshake
+
+        Failed attempts back off as _ConnectionState.reconnect_backoff()
+        decides.
+        """
+        self._drop_connection()
+        delay = self._state.reconnect_backoff()
+        if delay:
+            time.sleep(delay)
+
+        logger.info(f"Reconnecting to {self.host}:{self.port}")
+        return self._state.reconnected(self.connect())
+
+    def _ensure_connected(self) -> bool:
+        """Reconnect first if the connection was lost and auto_reconnect is on"""
+        if self.sock is None and self.auto_reconnect:
+            return self._reconnect()
+        return self.sock is not None
+
     def _send_handshake(self):
         """Send initial handshake messages"""
-        msg1 = binascii.unhexlify("a2030408001000a20603494f53a80600")
-        self._send_raw(msg1)
+        self._send_raw(HANDSHAKE_HELLO)
         time.sleep(0.1)
 
         try:
-            self._recv_raw(timeout=1.0)
+            self._recv_frame(timeout=1.0)
         except:
             pass
 
-        msg2 = binascii.unhexlify("1a0a089ee6da910d10001800") + \
-               binascii.unhexlify("a2061330333130313037313132313232333630333734") + \
-               binascii.unhexlify("a8069e818040")
-        self._send_raw(msg2)
+        self._send_raw(HANDSHAKE_REGISTER)
         time.sleep(0.2)
-        self.sequence += 1
+        self._state.next_sequence()
 
     def _send_raw(self, data: bytes):
         """Send raw protobuf data"""
         if not self.sock:
             raise ConnectionError("Not connected")
         self.sock.sendall(data)
+        self._state.stats.bytes_sent += len(data)
 
     def _recv_raw(self, timeout: Optional[float] = None) -> bytes:
         """Receive raw data from charger"""
@@ -372,166 +892,155 @@ class DuosidaCharger:
         finally:
             self.sock.settimeout(old_timeout)
 
+    def _recv_frame(self, timeout: Optional[float] = None) -> bytes:
+        """Receive one complete protobuf message from charger
+
+        Frames set aside while waiting for a command acknowledgement are
+        returned first. Otherwise reads from the socket until the frame
+        reader has a complete message. Split messages are reassembled and
+        coalesced ones are returned one per call. Returns b'' if the
+        connection was closed.
+
+        Raises:
+            socket.timeout: If no complete message arrived in time
+        """
+        if self._state.backlog:
+            return self._state.backlog.popleft()
+        return self._read_frame(timeout)
+
+    def _read_frame(self, timeout: Optional[float] = None) -> bytes:
+        """Read the next complete message from the stream"""
+        state = self._state
+        frame = state.frames.next_frame()
+        if frame is not None:
+            return state.frame_read(frame)
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            wait, settling = state.frame_wait(deadline)
+            try:
+                if wait <= 0:
+                    raise socket.timeout("timed out")
+                data = self._recv_raw(timeout=wait)
+            except socket.timeout:
+                if settling:
+                    return state.frame_read(state.frames.flush())
+                raise
+
+            frame = state.received(data)
+            if frame is not None:
+                return state.frame_read(frame)
+
     def get_status(self, retries: int = 3, use_cache: bool = True) -> Optional[ChargerStatus]:
         """Get charger status"""
+        state = self._state
+        stats = state.stats
+        stats.status_requests += 1
+        start = time.monotonic()
         for attempt in range(retries):
+            if attempt:
+                stats.retries += 1
             try:
+                if self.auto_reconnect and not self._ensure_connected():
+                    continue
                 status = self._get_status_once()
                 if status:
-                    self._last_good_status = status
+                    state.status_read(status, start)
                     return status
             except Exception as e:
+                if isinstance(e, socket.timeout):
+                    stats.timeouts += 1
+                else:
+                    stats.error(e)
+                if self.auto_reconnect and _is_connection_lost(e):
+                    self._drop_connection()
                 if attempt == retries - 1:
-                    if use_cache and self._last_good_status:
-                        return self._last_good_status
+                    cached = state.fallback(use_cache)
+                    if cached:
+                        return cached
                     raise
 
-        if use_cache and self._last_good_status:
-            return self._last_good_status
-        return None
+        return state.fallback(use_cache)
 
     def _get_status_once(self) -> Optional[ChargerStatus]:
         """Internal method to get status once"""
         try:
-            response = self._recv_raw(timeout=2.0)
+            response = self._recv_frame(timeout=2.0)
             if not response:
+                if self.auto_reconnect and self.sock is not None:
+                    # Charger closed the connection
+                    self._drop_connection()
                 return None
 
-            outer_fields = ProtobufDecoder.decode_message(response)
-
-            model = ""
-            manufacturer = ""
-            firmware = ""
-            device_id = outer_fields.get(100, "")
-            if isinstance(device_id, bytes):
-                device_id = device_id.decode('utf-8', errors='ignore')
-
-            # Parse device info from field 4
-            # It's a nested protobuf that may be decoded as string with embedded control chars
-            if 4 in outer_fields:
-                device_info = outer_fields[4]
-                if isinstance(device_info, bytes):
-                    device_info = device_info.decode('utf-8', errors='ignore')
-                if isinstance(device_info, str):
-                    # Parse embedded protobuf fields from the string
-                    # Format: \x12\x11MODEL\x1a\x13DEVICEID"\x05MANUFACTURER*-FIRMWARE\x00:\x00
-                    import re
-
-                    # Extract model - between first control char and device_id
-                    # Model starts after \x12\xNN
-                    if '\x12' in device_info:
-                        model_start = device_info.find('\x12') + 2  # Skip field marker and length
-                        if device_id and device_id in device_info:
-                            model_end = device_info.find(device_id)
-                            # Find the actual start after control char
-                            model_section = device_info[model_start:model_end]
-                            # Remove leading control char (field 3 marker)
-                            model = model_section.rstrip('\x1a\x13').strip()
-
-                    # Extract manufacturer and firmware after device_id
-                    if device_id and device_id in device_info:
-                        after_id = device_info.split(device_id, 1)[1]
-                        # Remove leading control chars and find manufacturer
-                        # Format: "\x05UCHEN*-FIRMWARE\x00:\x00
-                        if '*-' in after_id:
-                            # Find manufacturer between " and *
-                            parts = after_id.split('*-', 1)
-                            # Manufacturer is in parts[0], strip control chars
-                            mfr = parts[0]
-                            # Remove control characters
-                            manufacturer = ''.join(c for c in mfr if c.isprintable() and c not in '"')
-                            # Firmware is in parts[1], strip trailing nulls and control chars
-                            fw = parts[1]
-                            firmware = ''.join(c for c in fw if c.isprintable() and c != ':').strip()
-
-            fields = {}
-            if 16 in outer_fields and isinstance(outer_fields[16], bytes):
-                inner_data = outer_fields[16]
-                inner_fields = ProtobufDecoder.decode_message(inner_data)
-                msg_type = inner_fields.get(2, "")
-
-                if msg_type == "DataVendorStatusReq":
-                    if 10 in inner_fields and isinstance(inner_fields[10], bytes):
-                        status_data = inner_fields[10]
-                        fields = ProtobufDecoder.decode_message(status_data)
-                elif msg_type == "DataContinueReq":
-                    return None
-                else:
-                    if 10 in inner_fields and isinstance(inner_fields[10], bytes):
-                        status_data = inner_fields[10]
-                        fields = ProtobufDecoder.decode_message(status_data)
-                    elif 12 in inner_fields and isinstance(inner_fields[12], bytes):
-                        status_data = inner_fields[12]
-                        fields = ProtobufDecoder.decode_message(status_data)
-                    else:
-                        fields = inner_fields
-            else:
-                fields = outer_fields
-
-            has_key_fields = fields and any(field_num in fields for field_num in [1, 2, 8, 17])
-            if not has_key_fields:
-                return None
-
-            def get_float(field_num, default=0.0):
-                val = fields.get(field_num, default)
-                return float(val) if isinstance(val, (int, float)) else default
-
-            def get_int(field_num, default=0):
-                val = fields.get(field_num, default)
-                return int(val) if isinstance(val, (int, float)) else default
-
-            status = ChargerStatus(
-                conn_status=get_int(17),
-                voltage=get_float(1),
-                voltage2=0.0,  # L2 phase - not mapped yet
-                voltage3=0.0,  # L3 phase - not mapped yet
-                current=get_float(2),
-                current2=0.0,  # L2 phase - not mapped yet
-                current3=0.0,  # L3 phase - not mapped yet
-                power=0.0,
-                temperature_station=get_float(8),
-                temperature_internal=get_float(7),
-                session_energy=get_float(4),
-                timestamp=get_int(18),
-                cp_voltage_raw=get_float(9),  # Actual CP voltage reading
-                device_id=device_id if isinstance(device_id, str) else "",
-                model=model if isinstance(model, str) else "",
-                manufacturer=manufacturer if isinstance(manufacturer, str) else "",
-                firmware=firmware if isinstance(firmware, str) else ""
-            )
-
-            if status.voltage > 0 and status.current > 0:
-                status.power = status.voltage * status.current
-
-            return status
+            return self._state.parse(response)
 
         except Exception as e:
             logger.error(f"Error getting status: {e}")
             raise
 
+    def _send_command(self, build) -> bool:
+        """Send a command and wait until the charger acknowledges it
+
+        The reply is matched by _ConnectionState.is_ack(); frames received
+        in the meantime are kept for get_status(). Waiting is skipped if
+        ack_timeout is None or 0.
+
+        With auto_reconnect, a lost connection is re-established and the
+        command sent once more with a fresh sequence number.
+
+        Args:
+            build: Function returning the message for a sequence number
+
+        Raises:
+            ChargerConnectionError: If there is no connection
+            ChargerTimeoutError: If no acknowledgement arrived in time
+            CommunicationError: If the connection was closed
+        """
+        state = self._state
+        if not self._ensure_connected():
+            raise ChargerConnectionError(f"Not connected to {self.host}:{self.port}")
+        sequence = state.sequence
+        start = time.monotonic()
+        try:
+            self._send_raw(build(sequence))
+        except OSError as e:
+            if not (self.auto_reconnect and _is_connection_lost(e)):
+                raise
+            logger.info(f"Connection lost while sending command: {e}")
+            if not self._reconnect():
+                raise ChargerConnectionError(f"Could not reconnect to {self.host}:{self.port}")
+            sequence = state.sequence
+            self._send_raw(build(sequence))
+        state.command_sent(sequence)
+
+        if not self.ack_timeout:
+            return True
+
+        deadline = time.monotonic() + self.ack_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise state.ack_timed_out(sequence, self.ack_timeout)
+            try:
+                frame = self._read_frame(timeout=remaining)
+            except socket.timeout:
+                continue
+            if not frame:
+                raise CommunicationError("Connection closed while waiting for acknowledgement")
+            if state.is_ack(frame, sequence, start):
+                return True
+
     def set_max_current(self, amps: int) -> bool:
         """Set maximum charging current (6-32A)"""
         if not 6 <= amps <= 32:
             return False
 
         try:
-            command_data = (
-                ProtobufEncoder.encode_string(1, "VendorMaxWorkCurrent") +
-                ProtobufEncoder.encode_string(2, str(amps))
-            )
-
-            msg = (
-                ProtobufEncoder.encode_embedded_message(10, command_data) +
-                ProtobufEncoder.encode_string(100, self.device_id) +
-                ProtobufEncoder.encode_varint_field(101, self.sequence)
-            )
-
-            self._send_raw(msg)
-            self.sequence += 1
-            time.sleep(0.5)
-            return True
+            return self._send_command(lambda sequence: self._config_templates.build(
+                "VendorMaxWorkCurrent", str(amps), self.device_id, sequence))
 
-        except Exception:
+        except Exception as e:
+            logger.error(f"Error setting max current: {e}")
             return False
 
     def set_config(self, key: str, value: str) -> bool:
@@ -542,24 +1051,11 @@ class DuosidaCharger:
             value: Configuration value as string
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         try:
-            command_data = (
-                ProtobufEncoder.encode_string(1, key) +
-                ProtobufEncoder.encode_string(2, value)
-            )
-
-            msg = (
-                ProtobufEncoder.encode_embedded_message(10, command_data) +
-                ProtobufEncoder.encode_string(100, self.device_id) +
-                ProtobufEncoder.encode_varint_field(101, self.sequence)
-            )
-
-            self._send_raw(msg)
-            self.sequence += 1
-            time.sleep(0.5)
-            return True
+            return self._send_command(lambda sequence: self._config_templates.build(
+                key, value, self.device_id, sequence))
 
         except Exception as e:
             logger.error(f"Error setting config: {e}")
@@ -572,7 +1068,7 @@ class DuosidaCharger:
             seconds: Timeout value in seconds
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         if not 30 <= seconds <= 900:
             logger.warning("Connection timeout must be between 30 and 900 seconds")
@@ -587,7 +1083,7 @@ class DuosidaCharger:
             celsius: Temperature in Celsius
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         if not 85 <= celsius <= 95:
             logger.warning("Max temperature must be between 85 and 95°C")
@@ -602,7 +1098,7 @@ class DuosidaCharger:
             voltage: Voltage in volts
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         if not 265 <= voltage <= 290:
             logger.warning("Max voltage must be between 265 and 290V")
@@ -617,7 +1113,7 @@ class DuosidaCharger:
             voltage: Voltage in volts
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         if not 70 <= voltage <= 110:
             logger.warning("Min voltage must be between 70 and 110V")
@@ -635,7 +1131,7 @@ class DuosidaCharger:
             enabled: True to enable, False to disable
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         return self.set_config("VendorDirectWorkMode", "1" if enabled else "0")
 
@@ -646,7 +1142,7 @@ class DuosidaCharger:
             level: Brightness level (0=off, 1=low, 3=high)
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         if level not in (0, 1, 3):
             logger.warning("LED brightness must be 0, 1, or 3")
@@ -665,7 +1161,7 @@ class DuosidaCharger:
             enabled: True to enable auto-stop, False to disable
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         return self.set_config("StopTransactionOnEVSideDisconnect", "1" if enabled else "0")
 
@@ -673,29 +1169,11 @@ class DuosidaCharger:
         """Start a charging session
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         try:
-            # Build inner message: field 1 = "XC_Remote_Tag"
-            inner_data = ProtobufEncoder.encode_string(1, "XC_Remote_Tag")
-
-            # Build command: field 1 = 1, field 2 = inner message
-            command_data = (
-                ProtobufEncoder.encode_varint_field(1, 1) +
-                ProtobufEncoder.encode_embedded_message(2, inner_data)
-            )
-
-            # Field 34 contains the start command
-            msg = (
-                ProtobufEncoder.encode_embedded_message(34, command_data) +
-                ProtobufEncoder.encode_string(100, self.device_id) +
-                ProtobufEncoder.encode_varint_field(101, self.sequence)
-            )
-
-            self._send_raw(msg)
-            self.sequence += 1
-            time.sleep(0.5)
-            return True
+            return self._send_command(lambda sequence: _build_start_command(
+                self.device_id, sequence))
 
         except Exception as e:
             logger.error(f"Error starting charge: {e}")
@@ -709,42 +1187,120 @@ class DuosidaCharger:
                         uses current timestamp as session ID.
 
         Returns:
-            True if command was sent successfully
+            True if the charger acknowledged the command
         """
         try:
             # Use timestamp as session ID if not provided
             if session_id is None:
                 session_id = int(time.time() * 1000) % 0xFFFFFFFF
 
-            # Build command: field 1 = session_id
-            command_data = ProtobufEncoder.encode_varint_field(1, session_id)
-
-            # Field 36 contains the stop command
-            msg = (
-                ProtobufEncoder.encode_embedded_message(36, command_data) +
-                ProtobufEncoder.encode_string(100, self.device_id) +
-                ProtobufEncoder.encode_varint_field(101, self.sequence)
-            )
-
-            self._send_raw(msg)
-            self.sequence += 1
-            time.sleep(0.5)
-            return True
+            return self._send_command(lambda sequence: _build_stop_command(
+                session_id, self.device_id, sequence))
 
         except Exception as e:
             logger.error(f"Error stopping charge: {e}")
             return False
 
+    def _dispatch(self, status: ChargerStatus):
+        for callback in list(self._subscribers):
+            try:
+                callback(status)
+            except Exception as e:
+                logger.warning(f"Status subscriber failed: {e}")
+
+    def listen(self, duration: Optional[float] = None, callback=None,
+               changes_only: bool = False, deadbands: Optional[Dict[str, float]] = None,
+               keyframe_interval: Optional[float] = 60.0):
+        """Dispatch every status the charger pushes, as it arrives
+
+        Unlike monitor(), nothing sleeps between reads: the connection is
+        drained continuously and each pushed status frame is parsed and
+        handed to the subscribers immediately, so no state transition is
+        missed. Commands sent from a subscriber are fine; frames read while
+        waiting for their acknowledgement are dispatched afterwards.
+
+        Runs until duration elapses, stop_listening() is called from a
+        subscriber or another thread, or Ctrl+C.
+
+        Args:
+            duration: How long to listen in seconds (None for indefinite)
+            callback: Optional subscriber for the duration of the call
+            changes_only: Only dispatch statuses that pass a StatusFilter
+            deadbands: Deadbands per field, over DEFAULT_DEADBANDS
+            keyframe_interval: Seconds between unconditional updates
+
+        Raises:
+            CommunicationError: If the charger closed the connection and
+                                auto_reconnect is off
+        """
+        status_filter = StatusFilter(deadbands, keyframe_interval) if changes_only else None
+        if callback:
+            self.subscribe(callback)
+        self._listening = True
+        deadline = None if duration is None else time.monotonic() + duration
+
+        try:
+            while self._listening:
+                wait = 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        break
+
+                if self.auto_reconnect and not self._ensure_connected():
+                    continue
+                try:
+                    frame = self._recv_frame(timeout=wait)
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    self.stats.error(e)
+                    if self.auto_reconnect and _is_connection_lost(e):
+                        self._drop_connection()
+                        continue
+                    raise
+
+                if not frame:
+                    if self.auto_reconnect:
+                        self._drop_connection()
+                        continue
+                    raise CommunicationError("Connection closed by charger")
+
+                status = self._state.parse(frame)
+                if status is None:
+                    continue
+                self._state.remember(status)
+                if status_filter is None or status_filter(status):
+                    self._dispatch(status)
+
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._listening = False
+            if callback:
+                self.unsubscribe(callback)
+
     def monitor(self, interval: float = 2.0, duration: Optional[float] = None,
-                callback=None):
+                callback=None, changes_only: bool = False,
+                deadbands: Optional[Dict[str, float]] = None,
+                keyframe_interval: Optional[float] = 60.0):
         """Monitor charger status continuously
 
+        Reads one status every interval seconds; use listen() to receive
+        every pushed status as it arrives.
+
         Args:
             interval: Polling interval in seconds
             duration: Total monitoring duration (None for indefinite)
             callback: Optional function to call with each status update
+            changes_only: Only report statuses that changed beyond the
+                          deadbands, plus a keyframe every keyframe_interval
+                          seconds (see StatusFilter)
+            deadbands: Deadbands per field, over DEFAULT_DEADBANDS
+            keyframe_interval: Seconds between unconditional updates
         """
         start_time = time.time()
+        status_filter = StatusFilter(deadbands, keyframe_interval) if changes_only else None
 
         try:
             while True:
@@ -753,7 +1309,7 @@ class DuosidaCharger:
 
                 try:
                     status = self.get_status()
-                    if status:
+                    if status and (status_filter is None or status_filter(status)):
                         if callback:
                             callback(status)
                         elif self.debug:
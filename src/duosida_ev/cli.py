@@ -3,17 +3,24 @@ Command-line interface for Duosida EV Charger
 """
 
 import sys
+import asyncio
 import argparse
 import time
 import json
 import logging
 
 from .charger import DuosidaCharger
-from .discovery import discover_chargers, _get_device_id_via_tcp
+from .cache import DiscoveryCache
+from .recorder import TelemetryRecorder
+from .simulator import ChargerSimulator
+from .discovery import discover_chargers, find_chargers, _get_device_id_via_tcp
 from .exceptions import DuosidaError
 
 logger = logging.getLogger(__name__)
 
+# Stop auto-discovery once no further charger answered for this long
+DISCOVERY_IDLE_TIMEOUT = 0.5
+
 
 def setup_logging(verbose: bool = False):
     """Configure logging for CLI"""
@@ -31,6 +38,8 @@ def main():
     )
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Enable verbose output')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ignore the discovery cache and always search the network')
 
     subparsers = parser.add_subparsers(dest='command', help='Command to execute')
 
@@ -39,6 +48,20 @@ def main():
     discover_parser.add_argument('--timeout', type=int, default=5,
                                   help='Discovery timeout in seconds (default: 5)')
 
+    # Simulate command
+    simulate_parser = subparsers.add_parser('simulate', help='Run simulated chargers for testing')
+    simulate_parser.add_argument('--count', type=int, default=1,
+                                  help='Number of chargers (default: 1)')
+    simulate_parser.add_argument('--host', default='127.0.0.1',
+                                  help='Address to listen on (default: 127.0.0.1)')
+    simulate_parser.add_argument('--port', type=int,
+                                  help='Port (default: 9988 for one charger, free ports for more)')
+    simulate_parser.add_argument('--interval', type=float, default=1.0,
+                                  help='Seconds between pushed status frames')
+    simulate_parser.add_argument('--duration', type=float, help='Run duration in seconds')
+    simulate_parser.add_argument('--discovery', action='store_true',
+                                  help='Answer discovery broadcasts on UDP port 48899')
+
     # Status command
     status_parser = subparsers.add_parser('status', help='Get charger status')
     status_parser.add_argument('--host', help='Charger IP address (auto-discovered if not provided)')
@@ -61,6 +84,14 @@ def main():
     monitor_parser.add_argument('--interval', type=float, default=2.0,
                                  help='Polling interval in seconds')
     monitor_parser.add_argument('--duration', type=float, help='Monitor duration in seconds')
+    monitor_parser.add_argument('--record', metavar='FILE',
+                                 help='Append samples to a binary telemetry file')
+    monitor_parser.add_argument('--quiet', action='store_true',
+                                 help='Do not print each sample')
+    monitor_parser.add_argument('--changes-only', action='store_true',
+                                 help='Only report samples that changed, plus one per minute')
+    monitor_parser.add_argument('--push', action='store_true',
+                                 help='Report every status the charger pushes instead of polling')
 
     # Start command
     start_parser = subparsers.add_parser('start', help='Start charging')
@@ -160,6 +191,98 @@ def main():
         return 1
 
 
+def _resolve_target(args, cache, debug: bool, use_cache: bool = True):
+    """Work out host and device ID from arguments, cache or discovery
+
+    Returns (host, device_id, cached_mac), or None after printing an error.
+    cached_mac is set when the charger was taken from the discovery cache.
+    """
+    host = args.host
+    device_id = args.device_id
+
+    if host and device_id:
+        return host, device_id, None
+
+    if host:
+        # Host provided but not device_id - try the cache, then TCP
+        entry = cache.find(host) if cache is not None and use_cache else None
+        if entry and entry.get('device_id'):
+            if debug:
+                print(f"Using cached device ID: {entry['device_id']}")
+            return host, entry['device_id'], entry['mac']
+
+        if debug:
+            print(f"Retrieving device ID from {host}...")
+        device_id = _get_device_id_via_tcp(host, args.port)
+        if not device_id:
+            print(f"Error: Could not retrieve device ID from {host}")
+            print("Please specify --device-id manually")
+            return None
+        if debug:
+            print(f"Using device ID: {device_id}")
+        return host, device_id, None
+
+    # No host provided - use the discovery cache or UDP discovery
+    if debug:
+        print("Auto-discovering charger...")
+    devices = find_chargers(target=device_id, cache=cache, use_cache=use_cache,
+                            idle_timeout=DISCOVERY_IDLE_TIMEOUT)
+
+    if not devices:
+        print("Error: No chargers found on network")
+        print("Please specify --host and --device-id manually")
+        return None
+
+    if len(devices) > 1:
+        print(f"Error: Found {len(devices)} chargers on network")
+        print("Please specify --host to select one:")
+        for d in devices:
+            print(f"  {d['ip']} - {d.get('device_id') or d['mac']}")
+        return None
+
+    # Only one device found, use it
+    device = devices[0]
+    if debug:
+        source = " (cached)" if device['cached'] else ""
+        print(f"Found charger at {device['ip']}{source}")
+
+    if not device_id:
+        device_id = device.get('device_id')
+        if not device_id:
+            print(f"Error: Could not retrieve device ID for {device['ip']}")
+            print("Please specify --device-id manually")
+            return None
+        if debug:
+            print(f"Using device ID: {device_id}")
+
+    return device['ip'], device_id, device['mac'] if device['cached'] else None
+
+
+def _simulate(args) -> int:
+    """Serve simulated chargers until interrupted"""
+    port = args.port if args.port is not None else (9988 if args.count == 1 else 0)
+    simulator = ChargerSimulator(count=args.count, host=args.host, port=port,
+                                 push_interval=args.interval,
+                                 discovery_port=48899 if args.discovery else None)
+
+    async def run():
+        await simulator.start()
+        for charger in simulator.chargers:
+            print(f"  {charger.host}:{charger.port}  {charger.device_id}")
+        print(f"[+] Simulating {args.count} charger(s) (Ctrl+C to stop)...")
+        try:
+            await asyncio.sleep(args.duration if args.duration else float('inf'))
+        finally:
+            await simulator.stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    return 0
+
+
 def _execute_command(args):
     """Execute the CLI command"""
     # Execute command
@@ -167,7 +290,8 @@ def _execute_command(args):
         print(f"\nDiscovering Duosida chargers (timeout: {args.timeout}s)...")
         print()
 
-        devices = discover_chargers(timeout=args.timeout)
+        cache = None if args.no_cache else DiscoveryCache()
+        devices = discover_chargers(timeout=args.timeout, cache=cache)
 
         if devices:
             print(f"Found {len(devices)} device(s):\n")
@@ -188,70 +312,52 @@ def _execute_command(args):
             print()
             return 1
 
+    elif args.command == 'simulate':
+        return _simulate(args)
+
     else:
         # Commands that require connection
         # Disable debug output when JSON is requested
         debug = not (args.command == 'status' and getattr(args, 'json', False))
 
-        host = args.host
-        device_id = args.device_id
-
-        # Auto-discover if host or device_id not provided
-        if not host or not device_id:
-            if host and not device_id:
-                # Host provided but not device_id - get it via TCP
-                if debug:
-                    print(f"Retrieving device ID from {host}...")
-                device_id = _get_device_id_via_tcp(host, args.port)
-                if not device_id:
-                    print(f"Error: Could not retrieve device ID from {host}")
-                    print("Please specify --device-id manually")
-                    return 1
-                if debug:
-                    print(f"Using device ID: {device_id}")
-            else:
-                # No host provided - use UDP discovery
-                if debug:
-                    print("Auto-discovering charger...")
-                devices = discover_chargers(timeout=5)
-
-                if not devices:
-                    print("Error: No chargers found on network")
-                    print("Please specify --host and --device-id manually")
-                    return 1
-
-                if len(devices) == 1:
-                    # Only one device found, use it
-                    device = devices[0]
-                    if debug:
-                        print(f"Found charger at {device['ip']}")
-                else:
-                    # Multiple devices found
-                    print(f"Error: Found {len(devices)} chargers on network")
-                    print("Please specify --host to select one:")
-                    for d in devices:
-                        print(f"  {d['ip']} - {d.get('device_id', 'unknown')}")
-                    return 1
+        cache = None if args.no_cache else DiscoveryCache()
 
-                host = device['ip']
-                if not device_id:
-                    device_id = device.get('device_id')
-                    if not device_id:
-                        print(f"Error: Could not retrieve device ID for {host}")
-                        print("Please specify --device-id manually")
-                        return 1
-                    if debug:
-                        print(f"Using device ID: {device_id}")
+        target = _resolve_target(args, cache, debug)
+        if target is None:
+            return 1
+        host, device_id, cached_mac = target
 
         charger = DuosidaCharger(
             host=host,
             port=args.port,
             device_id=device_id,
-            debug=debug
+            debug=debug,
+            auto_reconnect=(args.command == 'monitor')
         )
 
         if not charger.connect():
-            return 1
+            if not cached_mac:
+                return 1
+
+            # Cached address is stale - forget it and search again
+            cache.invalidate(cached_mac)
+            cache.save()
+            if debug:
+                print("Cached charger not reachable, rediscovering...")
+            target = _resolve_target(args, cache, debug, use_cache=False)
+            if target is None:
+                return 1
+            host, device_id, _ = target
+
+            charger = DuosidaCharger(
+                host=host,
+                port=args.port,
+                device_id=device_id,
+                debug=debug,
+                auto_reconnect=(args.command == 'monitor')
+            )
+            if not charger.connect():
+                return 1
 
         try:
             if args.command == 'status':
@@ -283,17 +389,37 @@ def _execute_command(args):
 
             elif args.command == 'monitor':
                 print(f"[+] Monitoring charger (Ctrl+C to stop)...")
+                recorder = None
+                if args.record:
+                    recorder = TelemetryRecorder(args.record, device_id=charger.device_id)
+                    print(f"[+] Recording to {args.record}")
 
                 def print_status(status):
-                    print("\n" + "="*60)
-                    print(status)
-                    print("="*60)
-
-                charger.monitor(
-                    interval=args.interval,
-                    duration=args.duration,
-                    callback=print_status
-                )
+                    if recorder:
+                        recorder.append(status)
+                    if not args.quiet:
+                        print("\n" + "="*60)
+                        print(status)
+                        print("="*60)
+
+                try:
+                    if args.push:
+                        charger.listen(
+                            duration=args.duration,
+                            callback=print_status,
+                            changes_only=args.changes_only
+                        )
+                    else:
+                        charger.monitor(
+                            interval=args.interval,
+                            duration=args.duration,
+                            callback=print_status,
+                            changes_only=args.changes_only
+                        )
+                finally:
+                    if recorder:
+                        recorder.close()
+                        print(f"[+] Recorded {recorder.count} samples")
 
             elif args.command == 'start':
                 if charger.start_charging():
@@ -7,7 +7,10 @@ import time
 import binascii
 import re
 import logging
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Optional, Iterator
+
+from .cache import DiscoveryCache, _normalize_mac
 
 logger = logging.getLogger(__name__)
 
@@ -23,62 +26,127 @@ def _get_device_id_via_tcp(ip: str, port: int = 9988, timeout: float = 3.0) -> O
         logger.debug(f"Retrieving device ID from {ip}:{port}")
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
-        sock.connect((ip, port))
+        deadline = time.monotonic() + timeout
+        try:
+            sock.connect((ip, port))
 
-        # Send handshake message 1
-        msg1 = binascii.unhexlify("a2030408001000a20603494f53a80600")
-        sock.sendall(msg1)
-        time.sleep(0.1)
+            # Send handshake message 1
+            msg1 = binascii.unhexlify("a2030408001000a20603494f53a80600")
+            sock.sendall(msg1)
 
-        # Receive response (contains device info including device ID)
-        response = sock.recv(4096)
-        sock.close()
+            # Read the response (contains device info including device ID)
+            # until the device ID shows up or the charger stops sending
+            response = b''
+            while True:
+                device_id = _extract_device_id(response)
+                if device_id:
+                    return device_id
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(min(remaining, 0.2) if response else remaining)
+                try:
+                    data = sock.recv(4096)
+                except socket.timeout:
+                    break
+                if not data:
+                    break
+                response += data
+        finally:
+            sock.close()
 
-        # Extract device ID from protobuf response
-        # Device ID is a 19-digit string, appears after \xa2\x06\x13 in protobuf
-        # Pattern: field 100 (0xa2 0x06) + length 19 (0x13) + device_id
-        if response:
-            # Look for device ID pattern in response
-            # Device IDs are typically 19 digits starting with 03
-            match = re.search(rb'\xa2\x06\x13(\d{19})', response)
-            if match:
-                return match.group(1).decode('utf-8')
+        # Accept the looser pattern only once the whole response is in
+        return _extract_device_id(response, strict=False)
 
+    except Exception:
+        return None
+
+
+def _extract_device_id(response: bytes, strict: bool = True) -> Optional[str]:
+    """Extract the device ID from a TCP handshake response"""
+    # Extract device ID from protobuf response
+    # Device ID is a 19-digit string, appears after \xa2\x06\x13 in protobuf
+    # Pattern: field 100 (0xa2 0x06) + length 19 (0x13) + device_id
+    if response:
+        # Look for device ID pattern in response
+        # Device IDs are typically 19 digits starting with 03
+        match = re.search(rb'\xa2\x06\x13(\d{19})', response)
+        if match:
+            return match.group(1).decode('utf-8')
+
+        if not strict:
             # Alternative: look for any 19-digit number
             match = re.search(rb'(03\d{17})', response)
             if match:
                 return match.group(1).decode('utf-8')
 
-        return None
+    return None
 
-    except Exception:
-        return None
 
+def _resolve_device_ids(devices: List[Dict], max_workers: int, deadline: float):
+    """Retrieve device IDs for discovered devices concurrently
 
-def discover_chargers(timeout: int = 5, interface: str = '0.0.0.0',
-                      get_device_id: bool = True) -> List[Dict]:
+    Each device is queried over TCP in a bounded thread pool. Devices that
+    have not answered when the overall deadline expires keep device_id None.
     """
-    Discover Duosida chargers on the local network via UDP broadcast
+    if not devices:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(devices))))
+    try:
+        futures = {executor.submit(_get_device_id_via_tcp, device['ip']): device
+                   for device in devices}
+        done, not_done = wait(futures, timeout=deadline)
+
+        for future in done:
+            device_id = future.result()
+            if device_id:
+                futures[future]['device_id'] = device_id
+
+        for future in not_done:
+            future.cancel()
+            logger.debug(f"Device ID lookup for {futures[future]['ip']} missed the deadline")
+    finally:
+        # Lookups still running finish on their own socket timeout
+        executor.shutdown(wait=False)
+
+
+def iter_discover(timeout: float = 5, interface: str = '0.0.0.0',
+                  get_device_id: bool = False, expected_count: Optional[int] = None,
+                  target: Optional[str] = None,
+                  idle_timeout: Optional[float] = None,
+                  broadcast_address: str = '255.255.255.255',
+                  port: int = 48899) -> Iterator[Dict]:
+    """
+    Discover Duosida chargers, yielding each one as soon as it answers
+
+    Listening stops at the first of: the overall timeout, expected_count
+    devices found, the target device found, or no new reply for
+    idle_timeout seconds after the first one.
 
     Args:
-        timeout: How long to wait for responses (seconds)
+        timeout: Maximum time to wait for responses (seconds)
         interface: Network interface to bind to
-        get_device_id: If True, connect via TCP to retrieve device ID
+        get_device_id: If True, connect via TCP to retrieve each device ID
+                       before yielding it. Each lookup can take up to 3 s
+                       during which no replies are read, so prefer
+                       discover_chargers(), which resolves IDs concurrently
+                       after listening
+        expected_count: Stop after this many devices have been found
+        target: IP or MAC address of a device to stop at
+        idle_timeout: Stop when no new device answered for this long
+        broadcast_address: Address the search is sent to (e.g. a subnet
+                           broadcast address, or a simulator)
+        port: UDP port the search is sent to
 
-    Returns:
-        List of discovered devices, each with keys:
-        - ip: Device IP address
-        - mac: Device MAC address
-        - type: Device type (e.g., 'smart_wifi')
-        - firmware: Firmware version
-        - device_id: Device ID (if get_device_id=True)
-        - raw: Raw response string
+    Yields:
+        Device dicts with the same keys as discover_chargers()
     """
     SRC_PORT = 48890
-    DST_PORT = 48899
     DISCOVERY_MESSAGE = b'smart_chargepile_search\x00'
 
-    devices = []
+    target_mac = _normalize_mac(target) if target else None
+    seen = set()
 
     # Create UDP socket
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -92,7 +160,6 @@ def discover_chargers(timeout: int = 5, interface: str = '0.0.0.0',
     try:
         # Bind to source port
         sock.bind((interface, SRC_PORT))
-        sock.settimeout(1.0)
 
         # Get own IP for filtering
         try:
@@ -104,50 +171,170 @@ def discover_chargers(timeout: int = 5, interface: str = '0.0.0.0',
             own_ip = None
 
         # Send discovery broadcast
-        sock.sendto(DISCOVERY_MESSAGE, ('255.255.255.255', DST_PORT))
+        sock.sendto(DISCOVERY_MESSAGE, (broadcast_address, port))
 
         # Listen for responses
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+        deadline = time.monotonic() + timeout
+        idle_deadline = None
+        while True:
+            now = time.monotonic()
+            wait_until = deadline if idle_deadline is None else min(deadline, idle_deadline)
+            if now >= wait_until:
+                break
+
             try:
+                sock.settimeout(min(1.0, wait_until - now))
                 data, addr = sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except Exception:
+                break
 
-                # Filter own broadcasts
-                if own_ip and addr[0] == own_ip:
-                    continue
+            # Filter own broadcasts
+            if own_ip and addr[0] == own_ip:
+                continue
 
-                # Parse response: "IP,MAC,type,firmware"
-                try:
-                    decoded = data.decode('utf-8').strip('\x00')
-                    parts = decoded.split(',')
-                    if len(parts) >= 4:
-                        device = {
-                            'ip': parts[0],
-                            'mac': parts[1],
-                            'type': parts[2],
-                            'firmware': parts[3],
-                            'device_id': None,
-                            'raw': decoded
-                        }
-                        # Avoid duplicates
-                        if not any(d['ip'] == device['ip'] for d in devices):
-                            devices.append(device)
-                except:
-                    pass
+            # Parse response: "IP,MAC,type,firmware"
+            try:
+                decoded = data.decode('utf-8').strip('\x00')
+                parts = decoded.split(',')
+            except:
+                continue
+            if len(parts) < 4:
+                continue
 
-            except socket.timeout:
+            device = {
+                'ip': parts[0],
+                'mac': parts[1],
+                'type': parts[2],
+                'firmware': parts[3],
+                'device_id': None,
+                'raw': decoded
+            }
+
+            # Avoid duplicates
+            if device['ip'] in seen:
                 continue
-            except Exception:
+            seen.add(device['ip'])
+
+            if get_device_id:
+                device['device_id'] = _get_device_id_via_tcp(device['ip'])
+
+            yield device
+
+            if expected_count is not None and len(seen) >= expected_count:
+                break
+            if target and (target == device['ip'] or
+                           target_mac == _normalize_mac(device['mac'])):
                 break
+            if idle_timeout is not None:
+                # Measured from when listening resumes, so time spent by
+                # the consumer does not count as silence
+                idle_deadline = time.monotonic() + idle_timeout
 
     finally:
         sock.close()
 
+
+def discover_chargers(timeout: int = 5, interface: str = '0.0.0.0',
+                      get_device_id: bool = True, max_workers: int = 16,
+                      id_timeout: float = 5.0,
+                      cache: Optional[DiscoveryCache] = None,
+                      broadcast_address: str = '255.255.255.255',
+                      port: int = 48899) -> List[Dict]:
+    """
+    Discover Duosida chargers on the local network via UDP broadcast
+
+    Waits the full timeout for replies. Use iter_discover() to handle
+    devices as they answer or to stop early.
+
+    Args:
+        timeout: How long to wait for responses (seconds)
+        interface: Network interface to bind to
+        get_device_id: If True, connect via TCP to retrieve device ID
+        max_workers: Maximum number of concurrent TCP device ID lookups
+        id_timeout: Overall deadline for all device ID lookups (seconds)
+        cache: Optional DiscoveryCache to refresh with the results
+        broadcast_address: Address the search is sent to
+        port: UDP port the search is sent to
+
+    Returns:
+        List of discovered devices, each with keys:
+        - ip: Device IP address
+        - mac: Device MAC address
+        - type: Device type (e.g., 'smart_wifi')
+        - firmware: Firmware version
+        - device_id: Device ID (if get_device_id=True)
+        - raw: Raw response string
+    """
+    devices = list(iter_discover(timeout=timeout, interface=interface,
+                                 get_device_id=False,
+                                 broadcast_address=broadcast_address, port=port))
+
     # Get device IDs via TCP connection
     if get_device_id:
+        _resolve_device_ids(devices, max_workers, id_timeout)
+
+    if cache is not None:
         for device in devices:
-            device_id = _get_device_id_via_tcp(device['ip'])
-            if device_id:
-                device['device_id'] = device_id
+            cache.update(device)
+        cache.save()
+
+    return devices
+
+
+def find_chargers(target: Optional[str] = None, cache: Optional[DiscoveryCache] = None,
+                  timeout: float = 5, use_cache: bool = True,
+                  idle_timeout: float = 0.5) -> List[Dict]:
+    """
+    Find chargers, answering from the discovery cache when possible
+
+    Fresh cache entries with a known device ID are returned without any
+    network traffic. Otherwise a broadcast is sent, stopping at the target
+    or once replies go quiet, and the results are written to the cache.
+    If a cached charger then fails to connect, call cache.invalidate()
+    and retry with use_cache=False.
+
+    Args:
+        target: IP, MAC or device ID to look for (None for all chargers)
+        cache: DiscoveryCache to use (None to always broadcast)
+        timeout: Maximum time to wait for broadcast replies (seconds)
+        use_cache: If False, skip the cache lookup but still refresh it
+        idle_timeout: Stop listening when no new charger answered for this long
+
+    Returns:
+        List of device dicts as returned by discover_chargers(), each with
+        an extra 'cached' key telling whether it came from the cache
+    """
+    if cache is not None and use_cache:
+        if target:
+            entry = cache.find(target)
+            entries = [entry] if entry else []
+        else:
+            entries = cache.entries()
+        entries = [entry for entry in entries if entry.get('device_id')]
+        if entries:
+            for entry in entries:
+                entry['cached'] = True
+            return entries
+
+    # Device IDs are not in the UDP reply, so only IP/MAC can stop the scan early
+    stop_at = target if target and not target.isdigit() else None
+    devices = list(iter_discover(timeout=timeout, get_device_id=False,
+                                 target=stop_at, idle_timeout=idle_timeout))
+    _resolve_device_ids(devices, max_workers=16, deadline=timeout)
+
+    if target:
+        mac = _normalize_mac(target)
+        devices = [d for d in devices
+                   if target in (d['ip'], d['device_id']) or
+                   (mac and mac == _normalize_mac(d['mac']))]
+
+    if cache is not None:
+        for device in devices:
+            cache.update(device)
+        cache.save()
 
+    for device in devices:
+        device['cached'] = False
     return devices
@@ -0,0 +1,217 @@
+"""
+Concurrent polling of many Duosida EV chargers
+"""
+
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Any
+
+from .async_charger import AsyncDuosidaCharger
+from .charger import ChargerStatus
+from .stats import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class FleetStats:
+    """Aggregate polling throughput and latency of a ChargerFleet
+
+    Latencies of the most recent polls are kept in a bounded window for
+    percentile reporting; counters cover the whole lifetime.
+    """
+
+    def __init__(self, window: int = 4096):
+        self.started = time.monotonic()
+        self.polls = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self._recent: deque = deque(maxlen=window)  # (finished_at, latency)
+
+    def record(self, latency: float, ok: bool):
+        """Record one poll of one charger"""
+        self.polls += 1
+        if not ok:
+            self.failures += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        self._recent.append((time.monotonic(), latency))
+
+    @property
+    def mean_latency(self) -> float:
+        """Mean poll latency in seconds"""
+        return self.total_latency / self.polls if self.polls else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        """Poll latency percentile (0-100) over the recent window, in seconds"""
+        if not self._recent:
+            return 0.0
+        latencies = sorted(latency for _, latency in self._recent)
+        index = min(len(latencies) - 1, int(round(percentile / 100.0 * (len(latencies) - 1))))
+        return latencies[index]
+
+    def throughput(self, window: Optional[float] = None) -> float:
+        """Successful and failed polls per second
+
+        Args:
+            window: Only count polls finished in the last window seconds
+                    (None for the whole lifetime)
+        """
+        now = time.monotonic()
+        if window is None:
+            elapsed = now - self.started
+            return self.polls / elapsed if elapsed > 0 else 0.0
+        count = sum(1 for finished, _ in self._recent if now - finished <= window)
+        return count / window if window > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert statistics to dictionary for JSON export"""
+        return {
+            "polls": self.polls,
+            "failures": self.failures,
+            "throughput": self.throughput(),
+            "latency_mean": self.mean_latency,
+            "latency_p50": self.latency_percentile(50),
+            "latency_p99": self.latency_percentile(99),
+            "latency_max": self.max_latency,
+        }
+
+
+class ChargerFleet:
+    """A group of chargers polled concurrently on one event loop
+
+    Example:
+        fleet = ChargerFleet.from_devices(discover_chargers())
+        async with fleet:
+            statuses = await fleet.poll()
+    """
+
+    def __init__(self, chargers: Iterable[AsyncDuosidaCharger] = (),
+                 concurrency: int = 64, poll_timeout: float = 5.0):
+        self.chargers: Dict[str, AsyncDuosidaCharger] = {}
+        self.poll_timeout = poll_timeout
+        self.stats = FleetStats()
+        self.last_status: Dict[str, Optional[ChargerStatus]] = {}
+        self._concurrency = concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        for charger in chargers:
+            self.add(charger)
+
+    @classmethod
+    def from_devices(cls, devices: List[Dict], **kwargs) -> 'ChargerFleet':
+        """Create a fleet from discover_chargers() results
+
+        Devices without a device ID are skipped. Keyword arguments other
+        than concurrency and poll_timeout are passed to each charger.
+        """
+        fleet_kwargs = {key: kwargs.pop(key) for key in ('concurrency', 'poll_timeout')
+                        if key in kwargs}
+        chargers = [AsyncDuosidaCharger(host=device['ip'], device_id=device['device_id'], **kwargs)
+                    for device in devices if device.get('device_id')]
+        return cls(chargers, **fleet_kwargs)
+
+    def add(self, charger: AsyncDuosidaCharger):
+        """Add a charger, keyed by its device ID"""
+        self.chargers[charger.device_id or f"{charger.host}:{charger.port}"] = charger
+
+    def __len__(self) -> int:
+        return len(self.chargers)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.disconnect()
+
+    def _limit(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        return self._semaphore
+
+    async def _each(self, func) -> Dict[str, Any]:
+        limit = self._limit()
+
+        async def run(charger):
+            async with limit:
+                return await func(charger)
+
+        keys = list(self.chargers)
+        results = await asyncio.gather(*(run(self.chargers[key]) for key in keys))
+        return dict(zip(keys, results))
+
+    async def connect(self) -> Dict[str, bool]:
+        """Connect all chargers, returning success per device ID"""
+        return await self._each(lambda charger: charger.connect())
+
+    async def disconnect(self):
+        """Disconnect all chargers"""
+        await self._each(lambda charger: charger.disconnect())
+
+    async def _poll_one(self, charger: AsyncDuosidaCharger) -> Optional[ChargerStatus]:
+        start = time.monotonic()
+        status = None
+        try:
+            # With auto_reconnect, get_status() re-establishes a dropped
+            # connection, so such chargers are polled even while down
+            if charger.connected or charger.auto_reconnect:
+                status = await asyncio.wait_for(charger.get_status(), self.poll_timeout)
+        except Exception as e:
+            logger.warning(f"Polling {charger.host} failed: {e}")
+        self.stats.record(time.monotonic() - start, status is not None)
+        return status
+
+    def latency(self) -> LatencyStats:
+        """Latency histograms of all chargers merged, for fleet-wide percentiles"""
+        merged = LatencyStats()
+        for charger in self.chargers.values():
+            merged.merge(charger.latency)
+        return merged
+
+    async def poll(self) -> Dict[str, Optional[ChargerStatus]]:
+        """Poll all chargers concurrently
+
+        Returns:
+            Status per device ID (None for chargers that did not answer)
+        """
+        statuses = await self._each(self._poll_one)
+        self.last_status.update(statuses)
+        return statuses
+
+    async def run(self, interval: float = 2.0, duration: Optional[float] = None,
+                  callback=None):
+        """Poll all chargers on a fixed schedule
+
+        Ticks are scheduled from the start time, so slow polls do not make
+        the schedule drift. A tick that overruns is followed immediately by
+        the next one.
+
+        Args:
+            interval: Time between polling rounds in seconds
+            duration: Total duration (None for indefinite)
+            callback: Optional function or coroutine function called with
+                      the status dict after each round
+        """
+        start = time.monotonic()
+        next_tick = start
+
+        while True:
+            if duration and (time.monotonic() - start) > duration:
+                break
+
+            statuses = await self.poll()
+            if callback:
+                result = callback(statuses)
+                if asyncio.iscoroutine(result):
+                    await result
+
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_tick = time.monotonic()
@@ -0,0 +1,192 @@
+"""
+Fixed-capacity in-memory status history
+"""
+
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# ChargerStatus attributes kept by default
+DEFAULT_FIELDS = ('voltage', 'current', 'power', 'temperature_station',
+                  'session_energy', 'conn_status')
+
+
+class WindowStats(NamedTuple):
+    """Summary of one field over a window"""
+    count: int
+    min: float
+    max: float
+    mean: float
+
+
+class StatusHistory:
+    """Ring buffer of recent status samples, one array per field
+
+    Holds the last capacity samples as float64 columns plus a timestamp
+    column, preallocated so appending never allocates. Samples must be
+    appended in time order; windows are then found by binary search.
+
+    Pass history_size to DuosidaCharger or AsyncDuosidaCharger to have
+    every status they read recorded in charger.history, or use an instance
+    directly as monitor()/listen() callback.
+
+    Example:
+        charger = DuosidaCharger(host, device_id=device_id, history_size=3600)
+        ...
+        print(charger.history.stats('power', seconds=600).mean)
+    """
+
+    def __init__(self, capacity: int = 3600, fields: Sequence[str] = DEFAULT_FIELDS):
+        """
+        Args:
+            capacity: Number of samples kept
+            fields: Numeric ChargerStatus attributes to keep
+
+        Raises:
+            ValueError: If capacity is not positive
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._timestamps = array('d', bytes(8 * capacity))
+        self._columns = {name: array('d', bytes(8 * capacity)) for name in self.fields}
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, status, timestamp: Optional[float] = None):
+        """Record one status sample
+
+        Args:
+            status: ChargerStatus to record
+            timestamp: Unix time of the sample (default now)
+        """
+        index = self._next
+        self._timestamps[index] = time.time() if timestamp is None else timestamp
+        for name, column in self._columns.items():
+            column[index] = getattr(status, name)
+        self._next = (index + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    __call__ = append
+
+    def clear(self):
+        """Drop all samples"""
+        self._next = 0
+        self._count = 0
+
+    def _start(self) -> int:
+        # Physical index of the oldest sample
+        return (self._next - self._count) % self.capacity
+
+    def _segments(self, first: int) -> Tuple[Tuple[int, int], ...]:
+        """Physical [start, end) ranges of the samples from logical index first"""
+        if first >= self._count:
+            return ()
+        start = (self._start() + first) % self.capacity
+        end = start + self._count - first
+        if end <= self.capacity:
+            return ((start, end),)
+        return ((start, self.capacity), (0, end - self.capacity))
+
+    def _first_index(self, seconds: Optional[float], now: Optional[float]) -> int:
+        """Logical index of the first sample within the last seconds"""
+        if seconds is None:
+            return 0
+        if now is None:
+            now = time.time()
+        return bisect_left(_ChronologicalView(self), now - seconds)
+
+    def window(self, seconds: Optional[float] = None,
+               now: Optional[float] = None) -> Dict[str, array]:
+        """Return the samples of the last seconds, oldest first
+
+        Args:
+            seconds: Window length (None for everything kept)
+            now: End of the window (default time.time())
+
+        Returns:
+            Dict mapping 'timestamp' and each field to an array('d')
+        """
+        segments = self._segments(self._first_index(seconds, now))
+        result = {}
+        for name, column in (('timestamp', self._timestamps),) + tuple(self._columns.items()):
+            values = array('d')
+            for start, end in segments:
+                values += column[start:end]
+            result[name] = values
+        return result
+
+    def stats(self, field: str, seconds: Optional[float] = None,
+              now: Optional[float] = None) -> Optional[WindowStats]:
+        """Return count, min, max and mean of a field over the last seconds
+
+        Args:
+            field: Name of a recorded field
+            seconds: Window length (None for everything kept)
+            now: End of the window (default time.time())
+
+        Returns:
+            WindowStats, or None if the window holds no samples
+        """
+        column = self._columns[field]
+        segments = self._segments(self._first_index(seconds, now))
+        if not segments:
+            return None
+        parts = [column[start:end] for start, end in segments]
+        count = sum(len(part) for part in parts)
+        return WindowStats(
+            count=count,
+            min=min(min(part) for part in parts),
+            max=max(max(part) for part in parts),
+            mean=sum(sum(part) for part in parts) / count,
+        )
+
+    def to_numpy(self, seconds: Optional[float] = None,
+                 now: Optional[float] = None) -> Dict[str, 'numpy.ndarray']:
+        """Return the samples of the last seconds as NumPy arrays
+
+        The arrays share memory with the buffer when the window does not
+        wrap around its end, so they change as new samples are appended;
+        copy them to keep a snapshot.
+
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if numpy is None:
+            raise ImportError("NumPy is required for to_numpy()")
+        segments = self._segments(self._first_index(seconds, now))
+        result = {}
+        for name, column in (('timestamp', self._timestamps),) + tuple(self._columns.items()):
+            buffer = numpy.frombuffer(column, dtype=numpy.float64)
+            if not segments:
+                result[name] = buffer[:0]
+            elif len(segments) == 1:
+                result[name] = buffer[segments[0][0]:segments[0][1]]
+            else:
+                result[name] = numpy.concatenate([buffer[start:end] for start, end in segments])
+        return result
+
+
+class _ChronologicalView:
+    """Sequence of the timestamps of a StatusHistory, oldest first, for bisect"""
+
+    def __init__(self, history: StatusHistory):
+        self._history = history
+        self._start = history._start()
+
+    def __len__(self) -> int:
+        return len(self._history)
+
+    def __getitem__(self, index: int) -> float:
+        return self._history._timestamps[(self._start + index) % self._history.capacity]
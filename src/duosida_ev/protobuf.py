@@ -0,0 +1,540 @@
+"""
+Minimal protobuf wire-format codec used by the Duosida TCP protocol
+"""
+
+import struct
+import logging
+from typing import Optional, Dict, Any, Iterator, Iterable, Container, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProtobufEncoder:
+    """Simple protobuf encoder for the messages we need"""
+
+    @staticmethod
+    def encode_varint(value: int) -> bytes:
+        """Encode integer as protobuf varint"""
+        result = bytearray()
+        while value > 0x7F:
+            result.append((value & 0x7F) | 0x80)
+            value >>= 7
+        result.append(value & 0x7F)
+        return bytes(result)
+
+    @staticmethod
+    def encode_string(field_num: int, value: str) -> bytes:
+        """Encode string field"""
+        data = value.encode('utf-8')
+        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 2)
+        length = ProtobufEncoder.encode_varint(len(data))
+        return field_header + length + data
+
+    @staticmethod
+    def encode_float(field_num: int, value: float) -> bytes:
+        """Encode float field (32-bit)"""
+        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 5)
+        return field_header + struct.pack('<f', value)
+
+    @staticmethod
+    def encode_varint_field(field_num: int, value: int) -> bytes:
+        """Encode varint field"""
+        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 0)
+        return field_header + ProtobufEncoder.encode_varint(value)
+
+    @staticmethod
+    def encode_embedded_message(field_num: int, data: bytes) -> bytes:
+        """Encode embedded message"""
+        field_header = ProtobufEncoder.encode_varint((field_num << 3) | 2)
+        length = ProtobufEncoder.encode_varint(len(data))
+        return field_header + length + data
+
+
+_unpack_float = struct.Struct('<f').unpack_from
+_unpack_double = struct.Struct('<d').unpack_from
+
+
+class ProtobufDecoder:
+    """Simple protobuf decoder"""
+
+    @staticmethod
+    def decode_varint(data: bytes, offset: int) -> tuple:
+        """Decode protobuf varint, returns (value, next_offset)"""
+        result = 0
+        shift = 0
+        while offset < len(data):
+            byte = data[offset]
+            result |= (byte & 0x7F) << shift
+            offset += 1
+            if not (byte & 0x80):
+                break
+            shift += 7
+        return result, offset
+
+    @staticmethod
+    def decode_fields(data, strings: Container[int] = ()) -> Dict[int, Any]:
+        """Decode a message without copying its length-delimited fields
+
+        Length-delimited fields are returned as memoryview slices of data,
+        so nested messages can be passed straight back to decode_fields()
+        when (and only if) they are needed. Only the field numbers listed
+        in strings are decoded as UTF-8.
+
+        Args:
+            data: Message bytes (or a memoryview of them)
+            strings: Field numbers known to hold strings
+
+        Returns:
+            Field number to value dictionary
+        """
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        decode_varint = ProtobufDecoder.decode_varint
+        end = len(view)
+        fields = {}
+        offset = 0
+
+        while offset < end:
+            key = view[offset]
+            if key & 0x80:
+                key, offset = decode_varint(view, offset)
+            else:
+                offset += 1
+            field_number = key >> 3
+            wire_type = key & 0x07
+
+            if wire_type == 0:  # Varint
+                if offset >= end:
+                    break
+                value = view[offset]
+                if value & 0x80:
+                    value, offset = decode_varint(view, offset)
+                else:
+                    offset += 1
+                fields[field_number] = value
+
+            elif wire_type == 2:  # Length-delimited
+                length, offset = decode_varint(view, offset)
+                if offset + length > end:
+                    break
+                value = view[offset:offset+length]
+                if field_number in strings:
+                    value = str(value, 'utf-8', 'replace')
+                fields[field_number] = value
+                offset += length
+
+            elif wire_type == 5:  # 32-bit
+                if offset + 4 > end:
+                    break
+                fields[field_number] = _unpack_float(view, offset)[0]
+                offset += 4
+
+            elif wire_type == 1:  # 64-bit
+                if offset + 8 > end:
+                    break
+                fields[field_number] = _unpack_double(view, offset)[0]
+                offset += 8
+
+            else:
+                break
+
+        return fields
+
+    @staticmethod
+    def decode_message(data: bytes) -> Dict[int, Any]:
+        """Decode protobuf message into field dictionary
+
+        Length-delimited fields are returned as str when they are valid
+        UTF-8 and as bytes otherwise. Use decode_fields() when the schema
+        is known.
+        """
+        fields = ProtobufDecoder.decode_fields(data)
+        for field_number, value in fields.items():
+            if isinstance(value, memoryview):
+                try:
+                    fields[field_number] = str(value, 'utf-8')
+                except UnicodeDecodeError:
+                    fields[field_number] = value.tobytes()
+        return fields
+
+
+def _skip_field(view, offset: int, wire_type: int) -> Optional[int]:
+    """Return the offset after a field value, or None for an unknown wire type"""
+    if wire_type == 0:
+        return ProtobufDecoder.decode_varint(view, offset)[1]
+    if wire_type == 1:
+        return offset + 8
+    if wire_type == 2:
+        length, offset = ProtobufDecoder.decode_varint(view, offset)
+        return offset + length
+    if wire_type == 5:
+        return offset + 4
+    return None
+
+
+class Field(NamedTuple):
+    """One field of a MessageSchema
+
+    kind is one of 'varint', 'int32', 'int64', 'bool', 'float', 'double',
+    'string', 'bytes' or 'message' (with the nested MessageSchema in
+    message). 'varint' is unsigned; 'int32' and 'int64' are signed and
+    written as ten byte two's complement varints when negative, as
+    protobuf does.
+    """
+    number: int
+    name: str
+    kind: str
+    message: Optional['MessageSchema'] = None
+
+
+_WIRE_TYPES = {
+    'varint': 0,
+    'int32': 0,
+    'int64': 0,
+    'bool': 0,
+    'double': 1,
+    'string': 2,
+    'bytes': 2,
+    'message': 2,
+    'float': 5,
+}
+
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def _to_signed(value: int, bits: int) -> int:
+    """Interpret the low bits of a decoded varint as a two's complement integer"""
+    value &= (1 << bits) - 1
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def _compile_writer(field: Field):
+    """Build a function encoding one value of a field, header included"""
+    header = ProtobufEncoder.encode_varint((field.number << 3) | _WIRE_TYPES[field.kind])
+    encode_varint = ProtobufEncoder.encode_varint
+    kind = field.kind
+
+    if kind in ('varint', 'bool'):
+        return lambda value: header + encode_varint(int(value))
+    if kind in ('int32', 'int64'):
+        return lambda value: header + encode_varint(int(value) & _UINT64_MASK)
+    if kind == 'float':
+        pack = struct.Struct('<f').pack
+        return lambda value: header + pack(value)
+    if kind == 'double':
+        pack = struct.Struct('<d').pack
+        return lambda value: header + pack(value)
+    if kind == 'string':
+        def write_string(value):
+            data = value.encode('utf-8')
+            return header + encode_varint(len(data)) + data
+        return write_string
+    if kind == 'bytes':
+        return lambda value: header + encode_varint(len(value)) + bytes(value)
+
+    message = field.message
+
+    def write_message(value):
+        data = message.encode(value) if isinstance(value, dict) else bytes(value)
+        return header + encode_varint(len(data)) + data
+    return write_message
+
+
+def _compile_reader(field: Field):
+    """Build a function reading one value of a field, returning (value, next_offset)"""
+    decode_varint = ProtobufDecoder.decode_varint
+    kind = field.kind
+
+    if kind == 'varint':
+        return decode_varint
+    if kind in ('int32', 'int64'):
+        bits = 32 if kind == 'int32' else 64
+        sign = 1 << (bits - 1)
+
+        def read_int(view, offset):
+            value, offset = decode_varint(view, offset)
+            if value >= sign:
+                value = _to_signed(value, bits)
+            return value, offset
+        return read_int
+    if kind == 'bool':
+        def read_bool(view, offset):
+            value, offset = decode_varint(view, offset)
+            return bool(value), offset
+        return read_bool
+    if kind == 'float':
+        return lambda view, offset: (_unpack_float(view, offset)[0], offset + 4)
+    if kind == 'double':
+        return lambda view, offset: (_unpack_double(view, offset)[0], offset + 8)
+    if kind == 'string':
+        def read_string(view, offset):
+            length, offset = decode_varint(view, offset)
+            end = offset + length
+            return str(view[offset:end], 'utf-8', 'replace'), end
+        return read_string
+
+    # Bytes and nested messages stay views into the buffer; nested
+    # messages are decoded with field.message.decode() when needed
+    def read_view(view, offset):
+        length, offset = decode_varint(view, offset)
+        end = offset + length
+        return view[offset:end], end
+    return read_view
+
+
+class MessageSchema:
+    """Declarative description of a protobuf message
+
+    Encode and decode functions specialized for the declared fields are
+    built once, when the schema is created: field headers are precomputed
+    and each tag maps directly to its reader, so no wire type has to be
+    looked up per field at runtime. Undeclared fields are skipped.
+
+    Example:
+        CONFIG = MessageSchema('ConfigCommand', [
+            Field(1, 'key', 'string'),
+            Field(2, 'value', 'string'),
+        ])
+        data = CONFIG.encode(key='VendorMaxWorkCurrent', value='16')
+        CONFIG.decode(data)  # {'key': 'VendorMaxWorkCurrent', 'value': '16'}
+    """
+
+    def __init__(self, name: str, fields: Iterable[Field]):
+        self.name = name
+        self.fields = sorted(fields, key=lambda field: field.number)
+        self.by_name = {field.name: field for field in self.fields}
+        self._headers = {
+            field.name: ProtobufEncoder.encode_varint((field.number << 3) | _WIRE_TYPES[field.kind])
+            for field in self.fields
+        }
+        self._writers = [(field.name, _compile_writer(field)) for field in self.fields]
+        self._readers = {
+            (field.number << 3) | _WIRE_TYPES[field.kind]: (field.name, _compile_reader(field))
+            for field in self.fields
+        }
+
+    def __repr__(self) -> str:
+        return f"MessageSchema({self.name!r})"
+
+    def header(self, name: str) -> bytes:
+        """Return the encoded tag of a field, for building messages by hand"""
+        return self._headers[name]
+
+    def encode(self, values: Optional[Dict[str, Any]] = None, **kwargs) -> bytes:
+        """Encode a message from field values given by name
+
+        Fields are written in field number order; fields that are missing
+        or None are left out. Nested messages can be given as dicts or as
+        already encoded bytes.
+        """
+        if values is None:
+            values = kwargs
+        elif kwargs:
+            values = dict(values, **kwargs)
+        return b''.join(write(values[name]) for name, write in self._writers
+                        if values.get(name) is not None)
+
+    def encoder(self, *names: str):
+        """Return a function encoding exactly the named fields
+
+        The returned function takes the values positionally, in the order
+        of names, and skips the per-call dict handling of encode(), which
+        makes it the better choice for messages built on hot paths.
+
+        Example:
+            encode_config = CONFIG.encoder('key', 'value')
+            data = encode_config('VendorMaxWorkCurrent', '16')
+        """
+        writers = dict(self._writers)
+        missing = [name for name in names if name not in writers]
+        if missing:
+            raise ValueError(f"{self.name} has no field {missing[0]!r}")
+        plan = sorted(((self.by_name[name].number, index, writers[name])
+                       for index, name in enumerate(names)))
+        plan = [(index, write) for _, index, write in plan]
+
+        def encode(*values) -> bytes:
+            return b''.join([write(values[index]) for index, write in plan])
+        return encode
+
+    def decode(self, data) -> Dict[str, Any]:
+        """Decode a message into a dict of the fields present, by name
+
+        Strings are decoded as UTF-8; bytes and nested message fields are
+        returned as memoryview slices of data.
+        """
+        view = data if isinstance(data, memoryview) else memoryview(data)
+        decode_varint = ProtobufDecoder.decode_varint
+        readers = self._readers
+        end = len(view)
+        values = {}
+        offset = 0
+
+        while offset < end:
+            tag = view[offset]
+            if tag & 0x80:
+                tag, offset = decode_varint(view, offset)
+            else:
+                offset += 1
+
+            entry = readers.get(tag)
+            if entry is None:
+                offset = _skip_field(view, offset, tag & 0x07)
+                if offset is None:
+                    break
+                continue
+
+            name, read = entry
+            try:
+                value, offset = read(view, offset)
+            except struct.error:
+                break
+            if offset > end:
+                break
+            values[name] = value
+
+        return values
+
+
+def _read_varint(data, offset: int) -> Optional[tuple]:
+    """Decode a varint, returning None if it is truncated"""
+    result = 0
+    shift = 0
+    end = len(data)
+    while offset < end:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not (byte & 0x80):
+            return result, offset
+        shift += 7
+    return None
+
+
+class ProtobufFrameReader:
+    """Split a TCP byte stream into complete protobuf messages
+
+    The charger protocol has no length prefix, so message boundaries are
+    inferred from the wire format:
+
+    - Field 101 (sequence number) always closes a message
+    - Fields are written in ascending order, so a field number that does
+      not increase starts a new message
+
+    Received bytes accumulate in a reusable buffer and are only handed out
+    once they form complete messages. A byte that cannot start a field is
+    skipped, so the reader resynchronizes on the next valid field. A trailing message that is followed
+    by neither marker can be taken with flush() once the stream goes idle.
+    """
+
+    TRAILER_FIELD = 101
+
+    def __init__(self, max_buffer: int = 65536):
+        self.max_buffer = max_buffer
+        self._buffer = bytearray()
+        self._scan = 0        # End of the last complete field in the buffer
+        self._last_field = 0  # Field number of that field
+
+    def feed(self, data: bytes):
+        """Append received bytes to the buffer"""
+        self._buffer += data
+        if len(self._buffer) > self.max_buffer:
+            logger.warning(f"Discarding {len(self._buffer)} unframed bytes")
+            self.clear()
+
+    def next_frame(self) -> Optional[bytes]:
+        """Return the next complete message, or None if more data is needed"""
+        buf = self._buffer
+        end = len(buf)
+        pos = self._scan
+
+        while pos < end:
+            parsed = _read_varint(buf, pos)
+            if parsed is None:
+                return None
+            key, value_pos = parsed
+            field_number = key >> 3
+            wire_type = key & 0x07
+
+            if field_number == 0 or wire_type not in (0, 1, 2, 5):
+                # Drop the bad byte and carry on, so valid messages around
+                # it that arrived in the same read are not lost
+                logger.debug(f"Invalid field header at offset {pos}, skipping one byte")
+                del buf[pos]
+                end -= 1
+                continue
+
+            if pos > 0 and field_number <= self._last_field:
+                # A new message starts here
+                return self._take(pos)
+
+            if wire_type == 0:
+                parsed = _read_varint(buf, value_pos)
+                if parsed is None:
+                    return None
+                next_pos = parsed[1]
+            elif wire_type == 1:
+                next_pos = value_pos + 8
+            elif wire_type == 2:
+                parsed = _read_varint(buf, value_pos)
+                if parsed is None:
+                    return None
+                next_pos = parsed[1] + parsed[0]
+            else:
+                next_pos = value_pos + 4
+
+            if next_pos > end:
+                return None
+
+            pos = next_pos
+            self._scan = pos
+            self._last_field = field_number
+
+            if field_number == self.TRAILER_FIELD:
+                return self._take(pos)
+
+        return None
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield all complete messages currently buffered"""
+        while True:
+            frame = self.next_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def flush(self) -> Optional[bytes]:
+        """Return the buffered complete fields as a message, if any
+
+        Used when the stream goes idle after a message without a trailer.
+        A partially received field stays in the buffer.
+        """
+        frame = self.next_frame()
+        if frame is not None:
+            return frame
+        if self._scan == 0:
+            return None
+        return self._take(self._scan)
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes not yet returned as a message"""
+        return len(self._buffer)
+
+    @property
+    def at_boundary(self) -> bool:
+        """True if the buffer holds only complete fields"""
+        return 0 < len(self._buffer) == self._scan
+
+    def clear(self):
+        """Discard all buffered data"""
+        del self._buffer[:]
+        self._scan = 0
+        self._last_field = 0
+
+    def _take(self, length: int) -> bytes:
+        frame = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        self._scan = 0
+        self._last_field = 0
+        return frame
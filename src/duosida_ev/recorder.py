@@ -0,0 +1,267 @@
+"""
+Compact binary telemetry recording
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import logging
+from bisect import bisect_left
+from array import array
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from .charger import ChargerStatus
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DSEVTLM\x00'
+VERSION = 1
+
+# magic, version, record size, device ID
+_HEADER = struct.Struct('<8sHH20s')
+
+# timestamp, voltage, current, power, temperature, energy, conn_status, padding
+_RECORD = struct.Struct('<d5fb3x')
+
+COLUMNS = ('timestamp', 'voltage', 'current', 'power', 'temperature', 'energy', 'conn_status')
+
+# Column name, array typecode, offset and size within a record
+_LAYOUT = (
+    ('timestamp', 'd', 0, 8),
+    ('voltage', 'f', 8, 4),
+    ('current', 'f', 12, 4),
+    ('power', 'f', 16, 4),
+    ('temperature', 'f', 20, 4),
+    ('energy', 'f', 24, 4),
+    ('conn_status', 'b', 28, 1),
+)
+
+
+class TelemetrySample(NamedTuple):
+    """One recorded sample"""
+    timestamp: float
+    voltage: float
+    current: float
+    power: float
+    temperature: float
+    energy: float
+    conn_status: int
+
+
+class TelemetryRecorder:
+    """Append charger status samples to a fixed-width binary file
+
+    Each sample takes 32 bytes: a float64 Unix timestamp, voltage, current,
+    power, station temperature and session energy as float32, and the
+    connection status. One file holds one charger; its device ID is kept
+    in the 32 byte header. Records are only ever appended, so the file can
+    be read with TelemetryLog while it is being written.
+
+    An instance can be passed directly as monitor() callback:
+
+        with TelemetryRecorder('charger.tlm', device_id=charger.device_id) as recorder:
+            charger.monitor(interval=1.0, callback=recorder)
+    """
+
+    def __init__(self, path: str, device_id: str = "", flush_every: int = 64):
+        """
+        Args:
+            path: File to append to (created with a header if missing)
+            device_id: Charger the samples belong to
+            flush_every: Number of samples buffered before writing
+        """
+        self.path = path
+        self.device_id = device_id
+        self.flush_every = flush_every
+        self.count = 0
+        self._pending = bytearray()
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= _HEADER.size
+        if exists:
+            with open(path, 'rb') as f:
+                header = _read_header(f.read(_HEADER.size), path)
+            self.device_id = self.device_id or header[2]
+            self._trim_partial_record()
+        self._file = open(path, 'ab')
+        if not exists:
+            self._file.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size,
+                                          device_id.encode('utf-8')))
+            self._file.flush()
+
+    def _trim_partial_record(self):
+        # Drop a record cut short by a crash so later ones stay aligned
+        size = os.path.getsize(self.path)
+        excess = (size - _HEADER.size) % _RECORD.size
+        if excess:
+            logger.warning(f"Dropping {excess} bytes of a partial record in {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(size - excess)
+
+    def append(self, status: ChargerStatus, timestamp: Optional[float] = None):
+        """Record one status sample
+
+        Args:
+            status: Status to record
+            timestamp: Unix time of the sample (default now)
+        """
+        # Signed, so -1 (undefined) reads back as -1; anything that does
+        # not fit a byte is recorded as undefined too
+        conn_status = int(status.conn_status)
+        self._pending += _RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            status.voltage,
+            status.current,
+            status.power,
+            status.temperature_station,
+            status.session_energy,
+            conn_status if -128 <= conn_status <= 127 else -1,
+        )
+        self.count += 1
+        if len(self._pending) >= self.flush_every * _RECORD.size:
+            self.flush()
+
+    __call__ = append
+
+    def flush(self):
+        """Write buffered samples to the file"""
+        if self._pending:
+            self._file.write(self._pending)
+            del self._pending[:]
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _read_header(data: bytes, path: str) -> Tuple[int, int, str]:
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not a telemetry file")
+    magic, version, record_size, device_id = _HEADER.unpack(data)
+    if magic != MAGIC or record_size != _RECORD.size:
+        raise ValueError(f"{path} is not a telemetry file")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported telemetry version {version}")
+    return version, record_size, device_id.rstrip(b'\x00').decode('utf-8', errors='replace')
+
+
+class TelemetryLog:
+    """Memory-mapped read access to a file written by TelemetryRecorder
+
+    Samples must have been appended in time order, so time ranges are
+    found by binary search without scanning the file.
+
+    Example:
+        with TelemetryLog('charger.tlm') as log:
+            columns = log.columns(start=time.time() - 86400)
+            print(max(columns['power']))
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            _, _, self.device_id = _read_header(self._file.read(_HEADER.size), path)
+            size = os.fstat(self._file.fileno()).st_size
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        # Records written after opening are not visible; a partial
+        # trailing record is ignored
+        self._count = (size - _HEADER.size) // _RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _timestamp(self, index: int) -> float:
+        return struct.unpack_from('<d', self._mmap, _HEADER.size + index * _RECORD.size)[0]
+
+    def __getitem__(self, index: int) -> TelemetrySample:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("sample index out of range")
+        return TelemetrySample._make(
+            _RECORD.unpack_from(self._mmap, _HEADER.size + index * _RECORD.size))
+
+    def index_range(self, start: Optional[float] = None,
+                    end: Optional[float] = None) -> Tuple[int, int]:
+        """Return the [first, last) sample indices within [start, end)"""
+        timestamps = _TimestampView(self)
+        first = 0 if start is None else bisect_left(timestamps, start)
+        last = self._count if end is None else bisect_left(timestamps, end)
+        return first, max(first, last)
+
+    def _records(self, start: Optional[float], end: Optional[float]):
+        first, last = self.index_range(start, end)
+        # One copy of the range, so close() is not blocked by exported views
+        data = self._mmap[_HEADER.size + first * _RECORD.size:_HEADER.size + last * _RECORD.size]
+        return _RECORD.iter_unpack(data)
+
+    def query(self, start: Optional[float] = None,
+              end: Optional[float] = None) -> Iterator[TelemetrySample]:
+        """Iterate over the samples with start <= timestamp < end"""
+        for record in self._records(start, end):
+            yield TelemetrySample._make(record)
+
+    def columns(self, start: Optional[float] = None,
+                end: Optional[float] = None) -> Dict[str, array]:
+        """Return the samples with start <= timestamp < end as columns
+
+        Columns are extracted with strided byte slicing rather than record
+        by record, so even years of samples are split in a few passes.
+
+        Returns:
+            Dict mapping each name in COLUMNS to an array ('d' for
+            timestamps, 'f' for measurements, 'b' for conn_status)
+        """
+        first, last = self.index_range(start, end)
+        data = self._mmap[_HEADER.size + first * _RECORD.size:_HEADER.size + last * _RECORD.size]
+        count = last - first
+
+        columns = {}
+        for name, typecode, offset, size in _LAYOUT:
+            raw = bytearray(count * size)
+            for byte in range(size):
+                raw[byte::size] = data[offset + byte::_RECORD.size]
+            column = array(typecode)
+            column.frombytes(raw)
+            if sys.byteorder == 'big' and size > 1:
+                column.byteswap()
+            columns[name] = column
+        return columns
+
+    def close(self):
+        """Unmap and close the file"""
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _TimestampView:
+    """Sequence of the timestamps of a TelemetryLog, for bisect"""
+
+    def __init__(self, log: TelemetryLog):
+        self._log = log
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    def __getitem__(self, index: int) -> float:
+        return self._log._timestamp(index)
@@ -0,0 +1,74 @@
+"""
+Message schemas of the Duosida TCP protocol
+
+Each schema compiles its encoder and decoder at import time, see
+MessageSchema in duosida_ev.protobuf.
+"""
+
+from typing import Dict
+
+from .protobuf import Field, MessageSchema
+
+
+# Device info, outer field 4
+DEVICE_INFO = MessageSchema('DeviceInfo', [
+    Field(2, 'model', 'string'),
+    Field(3, 'device_id', 'string'),
+    Field(4, 'manufacturer', 'string'),
+    Field(5, 'firmware', 'string'),
+])
+
+# Telemetry, payload field 10 (or 12)
+STATUS_DATA = MessageSchema('StatusData', [
+    Field(1, 'voltage', 'float'),
+    Field(2, 'current', 'float'),
+    Field(4, 'session_energy', 'float'),
+    Field(7, 'temperature_internal', 'float'),
+    Field(8, 'temperature_station', 'float'),
+    Field(9, 'cp_voltage', 'float'),
+    Field(17, 'conn_status', 'int32'),
+    Field(18, 'timestamp', 'int64'),
+])
+
+# Message pushed by the charger, outer field 16
+PAYLOAD = MessageSchema('Payload', [
+    Field(2, 'type', 'string'),
+    Field(10, 'status', 'message', STATUS_DATA),
+    Field(12, 'status_alt', 'message', STATUS_DATA),
+])
+
+CONFIG_COMMAND = MessageSchema('ConfigCommand', [
+    Field(1, 'key', 'string'),
+    Field(2, 'value', 'string'),
+])
+
+REMOTE_TAG = MessageSchema('RemoteTag', [
+    Field(1, 'tag', 'string'),
+])
+
+START_COMMAND = MessageSchema('StartCommand', [
+    Field(1, 'mode', 'varint'),
+    Field(2, 'remote', 'message', REMOTE_TAG),
+])
+
+STOP_COMMAND = MessageSchema('StopCommand', [
+    Field(1, 'session_id', 'varint'),
+])
+
+# Top-level message exchanged in both directions
+FRAME = MessageSchema('Frame', [
+    Field(4, 'device_info', 'message', DEVICE_INFO),
+    Field(10, 'config', 'message', CONFIG_COMMAND),
+    Field(16, 'payload', 'message', PAYLOAD),
+    Field(34, 'start', 'message', START_COMMAND),
+    Field(36, 'stop', 'message', STOP_COMMAND),
+    Field(100, 'device_id', 'string'),
+    Field(101, 'sequence', 'varint'),
+])
+
+MESSAGES: Dict[str, MessageSchema] = {
+    schema.name: schema for schema in (
+        DEVICE_INFO, STATUS_DATA, PAYLOAD, CONFIG_COMMAND, REMOTE_TAG,
+        START_COMMAND, STOP_COMMAND, FRAME,
+    )
+}
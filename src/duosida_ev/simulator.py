@@ -0,0 +1,329 @@
+"""
+Simulated Duosida chargers for testing without hardware
+"""
+
+import asyncio
+import random
+import time
+import logging
+from typing import Dict, List, Optional, Sequence, Union
+
+from .protobuf import ProtobufFrameReader
+from .schema import FRAME, PAYLOAD, STATUS_DATA, DEVICE_INFO, CONFIG_COMMAND
+
+logger = logging.getLogger(__name__)
+
+DISCOVERY_MESSAGE = b'smart_chargepile_search'
+
+_encode_status = STATUS_DATA.encoder(
+    'voltage', 'current', 'session_energy', 'temperature_internal',
+    'temperature_station', 'cp_voltage', 'conn_status', 'timestamp')
+_encode_payload = PAYLOAD.encoder('type', 'status')
+_encode_frame = FRAME.encoder('device_info', 'payload', 'device_id', 'sequence')
+_encode_reply = FRAME.encoder('device_info', 'device_id', 'sequence')
+_encode_ack = FRAME.encoder('device_id', 'sequence')
+
+
+class VirtualCharger:
+    """One simulated charger: its state and its TCP endpoint
+
+    Answers the handshake with its device info, pushes a
+    DataVendorStatusReq frame every push_interval seconds to each
+    connected client, and acknowledges config, start and stop commands.
+    A vehicle is plugged in from the start; use plug_in() and unplug() to
+    change that.
+    """
+
+    def __init__(self, device_id: str, host: str = '127.0.0.1', port: int = 0,
+                 mac: str = "02:00:00:00:00:01", model: str = "DUOSIDA Simulator",
+                 manufacturer: str = "UCHEN", firmware: str = "V1.0.0-sim",
+                 push_interval: float = 1.0, seed: Optional[int] = None):
+        """
+        Args:
+            device_id: 19 digit device ID
+            host: Address to listen on
+            port: TCP port (0 for any free port, see self.port once started)
+            mac: MAC address reported to discovery
+            model: Model reported in the device info
+            manufacturer: Manufacturer reported in the device info
+            firmware: Firmware version reported in the device info
+            push_interval: Seconds between pushed status frames
+            seed: Seed for the measurement noise
+        """
+        self.device_id = device_id
+        self.host = host
+        self.port = port
+        self.mac = mac
+        self.model = model
+        self.manufacturer = manufacturer
+        self.firmware = firmware
+        self.push_interval = push_interval
+
+        self.vehicle_connected = True
+        self.charging = False
+        self.max_current = 16
+        self.config: Dict[str, str] = {}
+        self.session_energy = 0.0
+        self.session_start = 0
+        self.connections = 0
+        self.frames_pushed = 0
+        self.commands_received = 0
+
+        self._rng = random.Random(seed)
+        # Pushed frames count from 0 like a real charger, so their
+        # numbers overlap with the sequence numbers of client commands
+        self._sequence = 0
+        self._updated = time.monotonic()
+        self._server = None
+        self._clients: Dict[asyncio.StreamWriter, Optional[asyncio.Future]] = {}
+        self._device_info = DEVICE_INFO.encode(model=model, device_id=device_id,
+                                               manufacturer=manufacturer, firmware=firmware)
+
+    @property
+    def conn_status(self) -> int:
+        if self.charging:
+            return 2
+        return 1 if self.vehicle_connected else 0
+
+    def plug_in(self):
+        """Connect a vehicle"""
+        self.vehicle_connected = True
+
+    def unplug(self):
+        """Disconnect the vehicle, ending any session"""
+        self._stop_session()
+        self.vehicle_connected = False
+
+    def _advance(self):
+        """Integrate session energy up to now"""
+        now = time.monotonic()
+        if self.charging:
+            self.session_energy += 230.0 * self.max_current * (now - self._updated) / 3.6e6
+        self._updated = now
+
+    def _start_session(self):
+        self._advance()
+        if self.vehicle_connected and not self.charging:
+            self.charging = True
+            self.session_energy = 0.0
+            self.session_start = int(time.time())
+
+    def _stop_session(self):
+        self._advance()
+        # The vehicle stays plugged in
+        self.charging = False
+        self.session_start = 0
+
+    def status_frame(self) -> bytes:
+        """Build the next DataVendorStatusReq frame"""
+        self._advance()
+        rng = self._rng
+        status = _encode_status(
+            230.0 + rng.uniform(-2.0, 2.0),
+            self.max_current * rng.uniform(0.97, 1.0) if self.charging else 0.0,
+            self.session_energy,
+            45.0 + rng.uniform(-0.5, 0.5),
+            35.0 + rng.uniform(-0.5, 0.5),
+            (6.0, 9.0, 12.0)[2 - self.conn_status],
+            self.conn_status,
+            self.session_start,
+        )
+        self._sequence += 1
+        return _encode_frame(self._device_info,
+                             _encode_payload("DataVendorStatusReq", status),
+                             self.device_id, self._sequence)
+
+    def handle_frame(self, frame: bytes) -> Optional[bytes]:
+        """Apply a command received from a client
+
+        Returns:
+            The acknowledgement to send, or None if the frame is not a
+            command
+        """
+        message = FRAME.decode(frame)
+        if 'config' in message:
+            config = CONFIG_COMMAND.decode(message['config'])
+            key, value = config.get('key', ""), config.get('value', "")
+            self.config[key] = value
+            if key == "VendorMaxWorkCurrent":
+                try:
+                    self.max_current = int(value)
+                except ValueError:
+                    pass
+        elif 'start' in message:
+            self._start_session()
+        elif 'stop' in message:
+            self._stop_session()
+        else:
+            return None
+        self.commands_received += 1
+        return _encode_ack(self.device_id, message.get('sequence', 0))
+
+    async def _push(self, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                writer.write(self.status_frame())
+                self.frames_pushed += 1
+                await writer.drain()
+                await asyncio.sleep(self.push_interval)
+        except OSError:
+            # Client went away; _serve() cleans up
+            pass
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self._clients[writer] = None
+        frames = ProtobufFrameReader()
+        pusher = None
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                frames.feed(data)
+                for frame in frames:
+                    if pusher is None:
+                        # First message of the handshake: introduce ourselves
+                        # and start pushing status
+                        writer.write(_encode_reply(self._device_info, self.device_id,
+                                                   FRAME.decode(frame).get('sequence', 0)))
+                        pusher = asyncio.ensure_future(self._push(writer))
+                        self._clients[writer] = pusher
+                        continue
+                    reply = self.handle_frame(frame)
+                    if reply is not None:
+                        writer.write(reply)
+                await writer.drain()
+        except (OSError, asyncio.CancelledError):
+            pass
+        finally:
+            if pusher is not None:
+                pusher.cancel()
+            self._clients.pop(writer, None)
+            writer.close()
+
+    async def start(self):
+        """Start listening for clients"""
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop listening and disconnect all clients"""
+        for writer, pusher in list(self._clients.items()):
+            if pusher is not None:
+                pusher.cancel()
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def discovery_reply(self) -> bytes:
+        """Answer to the discovery broadcast: "IP,MAC,type,firmware" """
+        return f"{self.host},{self.mac},smart_wifi,{self.firmware}\x00".encode('utf-8')
+
+
+class _DiscoveryProtocol(asyncio.DatagramProtocol):
+    """Answers discovery broadcasts on behalf of all simulated chargers"""
+
+    def __init__(self, chargers: List[VirtualCharger]):
+        self.chargers = chargers
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if data.rstrip(b'\x00') != DISCOVERY_MESSAGE:
+            return
+        for charger in self.chargers:
+            self.transport.sendto(charger.discovery_reply(), addr)
+
+
+class ChargerSimulator:
+    """Many simulated chargers served from one event loop
+
+    Each charger gets its own TCP endpoint. By default they all listen on
+    127.0.0.1 with a free port each, which is enough for
+    DuosidaCharger/AsyncDuosidaCharger clients. Discovery clients connect
+    to port 9988 of the address in the reply, so to go through
+    discover_chargers() give each charger its own address (any address in
+    127.0.0.0/8 works on Linux) and port=9988.
+
+    Example:
+        async with ChargerSimulator(count=200, push_interval=1.0) as simulator:
+            fleet = ChargerFleet([AsyncDuosidaCharger(c.host, c.port, c.device_id)
+                                  for c in simulator.chargers])
+            ...
+    """
+
+    def __init__(self, count: int = 1, host: Union[str, Sequence[str]] = '127.0.0.1',
+                 port: int = 0, push_interval: float = 1.0,
+                 discovery_port: Optional[int] = None, discovery_host: str = '0.0.0.0',
+                 seed: Optional[int] = None):
+        """
+        Args:
+            count: Number of chargers
+            host: Address to listen on, or one address per charger
+            port: TCP port of every charger (0 for a free port each)
+            push_interval: Seconds between pushed status frames
+            discovery_port: UDP port to answer discovery broadcasts on
+                            (48899 as a real charger; None to disable)
+            discovery_host: Address to receive broadcasts on
+            seed: Seed for the measurement noise
+        """
+        hosts = [host] * count if isinstance(host, str) else list(host)
+        if len(hosts) != count:
+            raise ValueError(f"Expected {count} hosts, got {len(hosts)}")
+        self.discovery_port = discovery_port
+        self.discovery_host = discovery_host
+        self.chargers = [
+            VirtualCharger(
+                device_id=f"0310{index:015d}",
+                host=hosts[index],
+                port=port,
+                mac="02:00:00:{:02X}:{:02X}:{:02X}".format(
+                    (index >> 16) & 0xFF, (index >> 8) & 0xFF, index & 0xFF),
+                push_interval=push_interval,
+                seed=None if seed is None else seed + index,
+            )
+            for index in range(count)
+        ]
+        self._discovery = None
+
+    async def start(self):
+        """Start all chargers and the discovery responder"""
+        await asyncio.gather(*(charger.start() for charger in self.chargers))
+        if self.discovery_port is not None:
+            loop = asyncio.get_event_loop()
+            self._discovery, _ = await loop.create_datagram_endpoint(
+                lambda: _DiscoveryProtocol(self.chargers),
+                local_addr=(self.discovery_host, self.discovery_port),
+                allow_broadcast=True)
+            self.discovery_port = self._discovery.get_extra_info('sockname')[1]
+        logger.debug(f"Simulating {len(self.chargers)} chargers")
+
+    async def stop(self):
+        """Stop all chargers and the discovery responder"""
+        if self._discovery is not None:
+            self._discovery.close()
+            self._discovery = None
+        await asyncio.gather(*(charger.stop() for charger in self.chargers))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def run(self, duration: Optional[float] = None):
+        """Serve until duration elapses (forever if None)"""
+        await self.start()
+        try:
+            if duration is None:
+                while True:
+                    await asyncio.sleep(3600)
+            await asyncio.sleep(duration)
+        finally:
+            await self.stop()
@@ -0,0 +1,365 @@
+"""
+Solar surplus charging driven by an external grid power feed
+"""
+
+import os
+import asyncio
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from .async_charger import AsyncDuosidaCharger
+from .charger import ChargerStatus
+
+logger = logging.getLogger(__name__)
+
+
+class PowerSource(ABC):
+    """Source of grid power readings in watts
+
+    Positive values are import from the grid, negative values export
+    (i.e. surplus). Subclasses must implement read().
+    """
+
+    @abstractmethod
+    async def read(self) -> Optional[float]:
+        """Return the latest reading, or None if there is no fresh one"""
+
+    async def close(self):
+        """Release resources held by the source"""
+
+
+class FilePowerSource(PowerSource):
+    """Grid power read from a file holding a single number
+
+    The file is only parsed again when its modification time changes, and
+    readings older than max_age seconds are ignored.
+    """
+
+    def __init__(self, path: str, max_age: float = 10.0):
+        self.path = path
+        self.max_age = max_age
+        self._mtime = None
+        self._value: Optional[float] = None
+
+    async def read(self) -> Optional[float]:
+        try:
+            stat = os.stat(self.path)
+            if time.time() - stat.st_mtime > self.max_age:
+                return None
+            if stat.st_mtime_ns != self._mtime:
+                with open(self.path, 'r') as f:
+                    self._value = float(f.read().strip())
+                self._mtime = stat.st_mtime_ns
+        except (OSError, ValueError) as e:
+            logger.debug(f"No grid power reading from {self.path}: {e}")
+            return None
+        return self._value
+
+
+class CallablePowerSource(PowerSource):
+    """Grid power returned by a function or coroutine function"""
+
+    def __init__(self, func: Callable):
+        self.func = func
+
+    async def read(self) -> Optional[float]:
+        value = self.func()
+        if asyncio.iscoroutine(value):
+            value = await value
+        return None if value is None else float(value)
+
+
+class UnixSocketPowerSource(PowerSource):
+    """Grid power pushed as newline separated numbers over a Unix socket
+
+    Suited to a small bridge process forwarding e.g. MQTT meter readings.
+    The connection is opened on the first read(), kept in the background
+    and re-opened if it drops; read() never waits for data.
+    """
+
+    def __init__(self, path: str, max_age: float = 10.0, retry_delay: float = 1.0):
+        self.path = path
+        self.max_age = max_age
+        self.retry_delay = retry_delay
+        self._value: Optional[float] = None
+        self._updated = 0.0
+        self._task: Optional[asyncio.Future] = None
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                try:
+                    while True:
+                        line = await reader.readline()
+                        if not line:
+                            break
+                        try:
+                            self._value = float(line.strip())
+                            self._updated = time.monotonic()
+                        except ValueError:
+                            logger.debug(f"Ignoring grid power line {line!r}")
+                finally:
+                    writer.close()
+            except OSError as e:
+                logger.debug(f"Grid power socket {self.path} unavailable: {e}")
+            await asyncio.sleep(self.retry_delay)
+
+    async def read(self) -> Optional[float]:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._listen())
+        if self._value is None or time.monotonic() - self._updated > self.max_age:
+            return None
+        return self._value
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class SurplusController:
+    """Charge from PV surplus by following a grid power feed
+
+    Each tick the power available to the charger is its own measured draw
+    minus the grid reading, converted to amps with the charger's measured
+    voltage. A session is started once the surplus stays above
+    start_threshold for start_delay seconds, follows the surplus while
+    charging, is held at min_current while the resulting grid import stays
+    within stop_threshold, and is stopped when it exceeds it for
+    stop_delay seconds.
+
+    Ticks are scheduled on a fixed grid, so the loop does not drift, and
+    commands run in the background: a new target replaces one that is
+    still waiting to be sent, and a target equal to the current limit is
+    not sent at all. Status is read in the background as well, so a slow
+    charger does not delay the loop. Unless the charger is listening
+    already, run() starts its listener, so that status reads and command
+    acknowledgements share one reader of the connection.
+
+    Example:
+        async with AsyncDuosidaCharger(host, device_id=device_id) as charger:
+            controller = SurplusController(charger, FilePowerSource('/run/grid_power'))
+            await controller.run()
+    """
+
+    def __init__(self, charger: AsyncDuosidaCharger, source: PowerSource,
+                 phases: int = 1, min_current: int = 6, max_current: int = 32,
+                 start_threshold: Optional[float] = None, stop_threshold: float = 300.0,
+                 start_delay: float = 30.0, stop_delay: float = 60.0,
+                 interval: float = 1.0, nominal_voltage: float = 230.0):
+        """
+        Args:
+            charger: Connected charger to control
+            source: Grid power feed
+            phases: Number of phases the vehicle charges on
+            min_current: Lowest charging current (A)
+            max_current: Highest charging current (A)
+            start_threshold: Surplus needed to start a session (W, default
+                             the power of min_current)
+            stop_threshold: Grid import tolerated at min_current (W)
+            start_delay: How long the surplus must last before starting (s)
+            stop_delay: How long the import must last before stopping (s)
+            interval: Control loop period (s)
+            nominal_voltage: Voltage used until the charger reports one (V)
+        """
+        self.charger = charger
+        self.source = source
+        self.phases = phases
+        self.min_current = min_current
+        self.max_current = max_current
+        self.start_threshold = start_threshold
+        self.stop_threshold = stop_threshold
+        self.start_delay = start_delay
+        self.stop_delay = stop_delay
+        self.interval = interval
+        self.nominal_voltage = nominal_voltage
+
+        self.status: Optional[ChargerStatus] = None
+        self.charging = False
+        self.limit: Optional[int] = None  # Last limit acknowledged by the charger
+        self.commands_sent = 0
+        self.coalesced = 0
+        self.max_lateness = 0.0
+        self._target = 0
+        self._applied = 0
+        self._above_since: Optional[float] = None
+        self._below_since: Optional[float] = None
+        self._command_task: Optional[asyncio.Future] = None
+
+    def _voltage(self) -> float:
+        if self.status is not None and self.status.voltage > 50:
+            return self.status.voltage
+        return self.nominal_voltage
+
+    def _draw(self, voltage: float) -> float:
+        """Power currently drawn by the vehicle (W)"""
+        if not self.charging or self.status is None:
+            return 0.0
+        return self.status.current * voltage * self.phases
+
+    def decide(self, grid_power: float, now: Optional[float] = None) -> int:
+        """Return the limit to run at for a grid reading, 0 to stop
+
+        Args:
+            grid_power: Grid power (W, positive import, negative export)
+            now: Current time.monotonic() value
+        """
+        now = time.monotonic() if now is None else now
+        voltage = self._voltage()
+        watts_per_amp = voltage * self.phases
+        surplus = self._draw(voltage) - grid_power
+        amps = int(surplus // watts_per_amp)
+
+        if not self.charging:
+            self._below_since = None
+            if self.status is not None and self.status.conn_status == 0:
+                # No vehicle
+                self._above_since = None
+                return 0
+            start_threshold = (self.min_current * watts_per_amp
+                               if self.start_threshold is None else self.start_threshold)
+            if surplus < start_threshold:
+                self._above_since = None
+                return 0
+            if self._above_since is None:
+                self._above_since = now
+            if now - self._above_since < self.start_delay:
+                return 0
+            return max(self.min_current, min(amps, self.max_current))
+
+        self._above_since = None
+        if amps >= self.min_current:
+            self._below_since = None
+            return min(amps, self.max_current)
+
+        grid_import = self.min_current * watts_per_amp - surplus
+        if grid_import <= self.stop_threshold:
+            self._below_since = None
+            return self.min_current
+        if self._below_since is None:
+            self._below_since = now
+        if now - self._below_since >= self.stop_delay:
+            return 0
+        return self.min_current
+
+    def _request(self, target: int):
+        """Ask for a target, replacing one that has not been sent yet"""
+        if self._command_task is not None and not self._command_task.done():
+            if target != self._target:
+                self.coalesced += 1
+            self._target = target
+            return
+        self._target = target
+        if target != self._applied:
+            self._command_task = asyncio.ensure_future(self._apply())
+
+    async def _apply(self):
+        while self._target != self._applied:
+            target = self._target
+            try:
+                if target == 0:
+                    self.commands_sent += 1
+                    if not await self.charger.stop_charging():
+                        return
+                    self.charging = False
+                else:
+                    if target != self.limit:
+                        self.commands_sent += 1
+                        if not await self.charger.set_max_current(target):
+                            return
+                        self.limit = target
+                    if not self.charging:
+                        self.commands_sent += 1
+                        if not await self.charger.start_charging():
+                            return
+                        self.charging = True
+            except Exception as e:
+                logger.warning(f"Surplus command failed: {e}")
+                return
+            self._applied = target
+
+    async def _watch_status(self):
+        while True:
+            try:
+                status = await self.charger.get_status(use_cache=False)
+            except Exception as e:
+                logger.debug(f"Status read failed: {e}")
+                status = None
+            if status is None:
+                await asyncio.sleep(self.interval)
+                continue
+            self.status = status
+            idle = self._command_task is None or self._command_task.done()
+            if status.conn_status == 0 and self.charging:
+                # Vehicle unplugged
+                self.charging = False
+                self._applied = 0
+            elif status.conn_status == 2 and not self.charging and idle:
+                # Session started elsewhere; take it over with an unknown limit
+                self.charging = True
+                self._applied = self.limit if self.limit is not None else -1
+
+    async def step(self, now: Optional[float] = None) -> Optional[int]:
+        """Run one control tick
+
+        Returns:
+            The requested limit (0 for stopped), or None without a reading
+        """
+        grid_power = await self.source.read()
+        if grid_power is None:
+            return None
+        target = self.decide(grid_power, now)
+        self._request(target)
+        return target
+
+    async def run(self, duration: Optional[float] = None):
+        """Run the control loop
+
+        Args:
+            duration: Total duration in seconds (None for indefinite)
+        """
+        # Status reads and commands run concurrently; only the listener may
+        # read the connection, routing acknowledgements and statuses
+        listener = None
+        if not self.charger.listening:
+            listener = self.charger.start_listening()
+        watcher = asyncio.ensure_future(self._watch_status())
+        start = time.monotonic()
+        next_tick = start
+        try:
+            while True:
+                if duration and (time.monotonic() - start) > duration:
+                    break
+
+                lateness = time.monotonic() - next_tick
+                if lateness > self.max_lateness:
+                    self.max_lateness = lateness
+                await self.step()
+
+                next_tick += self.interval
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    next_tick = time.monotonic()
+        finally:
+            watcher.cancel()
+            try:
+                await watcher
+            except asyncio.CancelledError:
+                pass
+            if self._command_task is not None:
+                await self._command_task
+            if listener is not None:
+                self.charger.stop_listening()
+                try:
+                    await listener
+                except Exception as e:
+                    logger.warning(f"Status listener failed: {e}")
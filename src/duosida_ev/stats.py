@@ -0,0 +1,238 @@
+"""
+Per-connection statistics of charger clients
+"""
+
+import math
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+_log = math.log
+
+
+class StatsSnapshot(NamedTuple):
+    """Consistent copy of the ConnectionStats counters at one moment"""
+    bytes_sent: int
+    bytes_received: int
+    frames_received: int           # Complete frames read from the stream
+    statuses_decoded: int
+    frames_rejected: int           # Frames without telemetry fields
+    continue_frames_skipped: int   # DataContinueReq frames
+    status_requests: int           # get_status() calls
+    retries: int                   # get_status() attempts after the first
+    timeouts: int
+    cache_fallbacks: int           # Statuses served from the last good one
+    commands_sent: int
+    commands_acknowledged: int
+    command_timeouts: int
+    connects: int
+    connect_failures: int
+    reconnects: int
+    errors: int
+    last_error: Optional[str]
+    last_error_time: Optional[float]  # Unix time
+
+
+class ConnectionStats:
+    """Monotonic counters describing what a charger connection is doing
+
+    The client increments the counters as plain attributes, so counting
+    costs next to nothing on the hot path. Read them as attributes, or
+    take a consistent copy of all of them with snapshot(), which is safe
+    from any thread. Counters cover the lifetime of the client object,
+    across reconnects.
+
+    Example:
+        snapshot = charger.stats.snapshot()
+        print(snapshot.retries, snapshot.frames_rejected, snapshot.last_error)
+    """
+
+    COUNTERS = StatsSnapshot._fields[:-2]
+
+    def __init__(self):
+        self.reset()
+
+    def error(self, error: BaseException):
+        """Count an error and remember it as the last one"""
+        # One dict update, so a snapshot never sees half of it
+        self.__dict__.update(errors=self.errors + 1,
+                             last_error=f"{type(error).__name__}: {error}",
+                             last_error_time=time.time())
+
+    def snapshot(self) -> StatsSnapshot:
+        """Copy all counters at once, so they are consistent with each other"""
+        # Copying the instance dict is a single step under the GIL, so no
+        # update by the thread driving the connection can interleave
+        values = self.__dict__.copy()
+        return StatsSnapshot(*[values[name] for name in StatsSnapshot._fields])
+
+    def reset(self):
+        """Set all counters back to zero and forget the last error"""
+        self.__dict__.update(dict.fromkeys(self.COUNTERS, 0),
+                             last_error=None, last_error_time=None)
+
+    def __repr__(self) -> str:
+        snapshot = self.snapshot()
+        counters = ", ".join(f"{name}={value}" for name, value in zip(self.COUNTERS, snapshot))
+        return f"ConnectionStats({counters}, last_error={snapshot.last_error!r})"
+
+
+class LatencyHistogram:
+    """Latency distribution in fixed log-scale buckets
+
+    Buckets are per_decade per factor of ten between low and high, so
+    every bucket is the same relative width (about 12% by default) from
+    sub-millisecond replies to multi-second stalls, and memory does not
+    grow with the number of samples. Faster samples than low and slower
+    ones than high go to an under- and an overflow bucket. Histograms
+    with the same bounds merge exactly, e.g. across a fleet.
+
+    Example:
+        histogram = LatencyHistogram()
+        histogram.record(0.042)
+        print(histogram.percentile(99))
+    """
+
+    def __init__(self, low: float = 1e-4, high: float = 100.0, per_decade: int = 20):
+        """
+        Args:
+            low: Upper bound of the underflow bucket (s)
+            high: Lower bound of the overflow bucket (s)
+            per_decade: Buckets per factor of ten
+        """
+        if not 0 < low < high:
+            raise ValueError("Need 0 < low < high")
+        self.low = low
+        self.high = high
+        self.per_decade = per_decade
+        self._buckets = int(math.ceil(math.log10(high / low) * per_decade))
+        self._log_low = math.log(low)
+        self._scale = per_decade / math.log(10)
+        self.clear()
+
+    def clear(self):
+        """Forget all samples"""
+        # Index 0 is the underflow bucket, index _buckets + 1 the overflow
+        self.counts: List[int] = [0] * (self._buckets + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Add one sample"""
+        index = 0
+        if seconds >= self.low:
+            index = int((_log(seconds) - self._log_low) * self._scale) + 1
+            if index > self._buckets:
+                index = self._buckets + 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def upper_bound(self, index: int) -> float:
+        """Upper bound of a bucket in seconds (inf for the overflow bucket)"""
+        if index > self._buckets:
+            return math.inf
+        return self.low * 10 ** (index / self.per_decade)
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """(upper bound, count) of each non-empty bucket, fastest first"""
+        return [(self.upper_bound(index), count)
+                for index, count in enumerate(self.counts) if count]
+
+    @property
+    def mean(self) -> float:
+        """Mean latency in seconds"""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """Latency percentile (0-100) in seconds
+
+        Returns the upper bound of the bucket holding the percentile,
+        limited to the slowest sample, so it overestimates by at most one
+        bucket width. 0.0 without samples.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percentile / 100.0 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return max(self.min, min(self.upper_bound(index), self.max))
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Add the samples of another histogram with the same bounds
+
+        Raises:
+            ValueError: If the bucket layouts differ
+        """
+        if (other.low, other.high, other.per_decade) != (self.low, self.high, self.per_decade):
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize for JSON export"""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def __repr__(self) -> str:
+        return (f"LatencyHistogram(count={self.count}, p50={self.percentile(50):.4g}, "
+                f"p99={self.percentile(99):.4g}, max={self.max:.4g})")
+
+
+class LatencyStats:
+    """Latency histograms of the phases of talking to a charger
+
+    Attributes:
+        connect: TCP connection setup
+        handshake: From connected until the handshake was sent and answered
+        status: get_status() until a valid status, retries included
+        command: Command sent until acknowledged
+
+    Only successful operations are recorded; failures are counted in
+    ConnectionStats.
+    """
+
+    NAMES = ('connect', 'handshake', 'status', 'command')
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            **kwargs: LatencyHistogram bucket bounds
+        """
+        self.connect = LatencyHistogram(**kwargs)
+        self.handshake = LatencyHistogram(**kwargs)
+        self.status = LatencyHistogram(**kwargs)
+        self.command = LatencyHistogram(**kwargs)
+
+    def merge(self, other: 'LatencyStats') -> 'LatencyStats':
+        """Add the samples of another LatencyStats, e.g. of another charger"""
+        for name in self.NAMES:
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def clear(self):
+        """Forget all samples"""
+        for name in self.NAMES:
+            getattr(self, name).clear()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize each histogram for JSON export"""
+        return {name: getattr(self, name).to_dict() for name in self.NAMES}
@@ -0,0 +1,176 @@
+"""
+Fault injection for charger connections
+"""
+
+import random
+import socket
+import time
+import logging
+from typing import Callable, Optional
+
+from .charger import _open_socket
+
+logger = logging.getLogger(__name__)
+
+
+class FaultInjector:
+    """Socket factory injecting the faults of a flaky network
+
+    Pass an instance as socket_factory to DuosidaCharger. Every connection
+    it opens is wrapped in a FaultySocket that, with the configured
+    probabilities:
+
+    - delays received data by latency plus up to jitter seconds; data
+      delayed beyond the socket timeout shows up as a stall (timeout)
+    - hands received data out in segments of 1 to segment_size bytes,
+      splitting frames across reads, and with coalesce holds it back
+      until the next read so frames arrive together
+    - drops a write or a received chunk entirely (drop_rate)
+    - resets the connection on a read or write (disconnect_rate)
+    - refuses new connections (connect_failure_rate)
+
+    All randomness comes from seed, so a scenario replays identically
+    as long as the same operations happen in the same order.
+
+    Example:
+        faults = FaultInjector(jitter=0.05, segment_size=16, drop_rate=0.01,
+                               disconnect_rate=0.001, seed=42)
+        charger = DuosidaCharger(host, device_id=device_id, auto_reconnect=True,
+                                 socket_factory=faults)
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 segment_size: Optional[int] = None, coalesce: bool = False,
+                 drop_rate: float = 0.0, disconnect_rate: float = 0.0,
+                 connect_failure_rate: float = 0.0, seed: Optional[int] = None,
+                 socket_factory: Callable = _open_socket):
+        """
+        Args:
+            latency: Fixed delay of received data (s)
+            jitter: Maximum random extra delay of received data (s)
+            segment_size: Largest number of bytes returned per read (None
+                          to return whatever the socket returned)
+            coalesce: Wait for the next chunk before returning data
+            drop_rate: Probability of losing a write or a received chunk
+            disconnect_rate: Probability of a reset per read or write
+            connect_failure_rate: Probability of a refused connection
+            seed: Seed for all random decisions
+            socket_factory: Opens the underlying connections
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.segment_size = segment_size
+        self.coalesce = coalesce
+        self.drop_rate = drop_rate
+        self.disconnect_rate = disconnect_rate
+        self.connect_failure_rate = connect_failure_rate
+        self.socket_factory = socket_factory
+        self._rng = random.Random(seed)
+
+        self.connections = 0
+        self.connect_failures = 0
+        self.dropped = 0
+        self.disconnects = 0
+        self.stalls = 0
+
+    def __call__(self, address: tuple, timeout: Optional[float] = None) -> 'FaultySocket':
+        if self._rng.random() < self.connect_failure_rate:
+            self.connect_failures += 1
+            logger.debug(f"Injecting connection failure to {address[0]}:{address[1]}")
+            raise ConnectionRefusedError(f"Injected connection failure to {address[0]}:{address[1]}")
+        sock = self.socket_factory(address, timeout)
+        self.connections += 1
+        # One generator per connection, so connections do not disturb each
+        # other's sequence of decisions
+        return FaultySocket(sock, self, random.Random(self._rng.random()))
+
+
+class FaultySocket:
+    """Socket wrapper applying the faults configured in a FaultInjector"""
+
+    def __init__(self, sock, injector: FaultInjector, rng: random.Random):
+        self._sock = sock
+        self._injector = injector
+        self._rng = rng
+        self._pending = bytearray()
+        self._ready_at = 0.0
+        self._coalesced = False
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+    def _maybe_disconnect(self):
+        if self._closed:
+            raise OSError("Socket is closed")
+        if self._rng.random() < self._injector.disconnect_rate:
+            self._injector.disconnects += 1
+            logger.debug("Injecting connection reset")
+            # Shut down rather than close, so the file descriptor stays
+            # valid until the client closes the socket itself
+            self._closed = True
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            raise ConnectionResetError("Injected connection reset")
+
+    def sendall(self, data: bytes):
+        self._maybe_disconnect()
+        if self._rng.random() < self._injector.drop_rate:
+            self._injector.dropped += 1
+            return
+        self._sock.sendall(data)
+
+    def _fill(self):
+        """Read the next chunk from the socket into the pending buffer"""
+        injector = self._injector
+        while True:
+            data = self._sock.recv(4096)
+            if not data:
+                return False
+            if self._rng.random() < injector.drop_rate:
+                # Wait for the next chunk in its place
+                injector.dropped += 1
+                continue
+            if not self._pending:
+                self._ready_at = (time.monotonic() + injector.latency +
+                                  self._rng.uniform(0.0, injector.jitter))
+            self._pending += data
+            return True
+
+    def recv(self, size: int) -> bytes:
+        self._maybe_disconnect()
+        injector = self._injector
+
+        if not self._pending:
+            if not self._fill():
+                return b''
+            self._coalesced = False
+        if injector.coalesce and not self._coalesced:
+            # Hold the data back until more arrives or the read times out
+            self._coalesced = True
+            try:
+                self._fill()
+            except socket.timeout:
+                pass
+
+        delay = self._ready_at - time.monotonic()
+        if delay > 0:
+            timeout = self._sock.gettimeout()
+            if timeout is not None and delay > timeout:
+                injector.stalls += 1
+                time.sleep(timeout)
+                raise socket.timeout("timed out")
+            time.sleep(delay)
+
+        limit = size
+        if injector.segment_size:
+            limit = min(limit, self._rng.randint(1, injector.segment_size))
+        data = bytes(self._pending[:limit])
+        del self._pending[:limit]
+        return data
+
+    def close(self):
+        self._closed = True
+        self._sock.close()
@@ -0,0 +1,277 @@
+"""
+Tests for AsyncDuosidaCharger
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.async_charger import AsyncDuosidaCharger
+from duosida_ev.charger import HANDSHAKE_HELLO, HANDSHAKE_REGISTER
+from duosida_ev.protobuf import ProtobufEncoder, ProtobufDecoder, ProtobufFrameReader
+
+from tests.test_charger import build_device_info, build_status_frame
+
+
+class FakeChargerServer:
+    """Minimal TCP peer that records what it receives"""
+
+    def __init__(self, loop, push=b'', ack=True, drop_first=False):
+        self.loop = loop
+        self.push = push
+        self.ack = ack
+        self.drop_first = drop_first
+        self.connections = 0
+        self.received = bytearray()
+        self.server = None
+        self.port = None
+
+    async def _handle(self, reader, writer):
+        hello = await reader.readexactly(len(HANDSHAKE_HELLO))
+        self.received += hello
+        writer.write(b'\x08\x01')
+        await writer.drain()
+        self.received += await reader.readexactly(len(HANDSHAKE_REGISTER))
+        self.connections += 1
+        if self.drop_first and self.connections == 1:
+            writer.close()
+            return
+        if self.push:
+            writer.write(self.push)
+            await writer.drain()
+        frames = ProtobufFrameReader()
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                break
+            self.received += data
+            frames.feed(data)
+            for frame in frames:
+                if self.ack:
+                    sequence = ProtobufDecoder.decode_message(frame)[101]
+                    writer.write(ProtobufEncoder.encode_varint_field(101, sequence))
+        writer.close()
+
+    def start(self):
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, '127.0.0.1', 0))
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+
+
+class TestAsyncDuosidaCharger(unittest.TestCase):
+    """Test AsyncDuosidaCharger class"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_init(self):
+        """Test charger initialization"""
+        charger = AsyncDuosidaCharger(host="192.168.1.100", device_id="TEST123", timeout=10.0)
+        self.assertEqual(charger.host, "192.168.1.100")
+        self.assertEqual(charger.port, 9988)
+        self.assertEqual(charger.timeout, 10.0)
+        self.assertFalse(charger.connected)
+
+    def test_connect_and_status(self):
+        """Test handshake and status decoding over a real socket"""
+        server = FakeChargerServer(self.loop, push=build_status_frame(voltage=231.0))
+        server.start()
+        try:
+            charger = AsyncDuosidaCharger(host="127.0.0.1", port=server.port,
+                                          device_id="TEST123")
+            self.assertTrue(self.run_async(charger.connect()))
+            status = self.run_async(charger.get_status(use_cache=False))
+            self.run_async(charger.disconnect())
+        finally:
+            server.stop()
+
+        self.assertTrue(server.received.startswith(HANDSHAKE_HELLO + HANDSHAKE_REGISTER))
+        self.assertAlmostEqual(status.voltage, 231.0)
+        self.assertEqual(status.conn_status, 2)
+        self.assertEqual(charger.sequence, 3)
+
+    def test_command_acknowledged(self):
+        """Test commands complete when the charger echoes their sequence"""
+        server = FakeChargerServer(self.loop)
+        server.start()
+        try:
+            charger = AsyncDuosidaCharger(host="127.0.0.1", port=server.port,
+                                          device_id="TEST123")
+            self.run_async(charger.connect())
+            self.assertTrue(self.run_async(charger.set_max_current(16)))
+            self.assertTrue(self.run_async(charger.start_charging()))
+            self.run_async(charger.disconnect())
+        finally:
+            server.stop()
+
+        self.assertIn(b'VendorMaxWorkCurrent', bytes(server.received))
+        self.assertEqual(charger.sequence, 5)
+
+    def test_command_ack_timeout(self):
+        """Test commands fail when no acknowledgement arrives"""
+        server = FakeChargerServer(self.loop, ack=False)
+        server.start()
+        try:
+            charger = AsyncDuosidaCharger(host="127.0.0.1", port=server.port,
+                                          device_id="TEST123", ack_timeout=0.1)
+            self.run_async(charger.connect())
+            self.assertFalse(self.run_async(charger.stop_charging()))
+            self.run_async(charger.disconnect())
+        finally:
+            server.stop()
+
+    def test_status_frame_not_taken_for_ack(self):
+        """Test a pushed frame whose counter equals the command sequence is no ack"""
+        server = FakeChargerServer(self.loop, ack=False,
+                                   push=build_status_frame(current=9.0, sequence=3))
+        server.start()
+        try:
+            charger = AsyncDuosidaCharger(host="127.0.0.1", port=server.port,
+                                          device_id="TEST123", ack_timeout=0.2)
+            self.run_async(charger.connect())
+            self.assertEqual(charger.sequence, 3)
+            self.assertFalse(self.run_async(charger.set_max_current(16)))
+            status = self.run_async(charger.get_status(use_cache=False))
+            self.run_async(charger.disconnect())
+        finally:
+            server.stop()
+
+        self.assertAlmostEqual(status.current, 9.0)
+
+    def test_device_info_cleared_on_connect(self):
+        """Test device info is decoded again on a new connection"""
+        server = FakeChargerServer(self.loop, push=build_status_frame(
+            device_info=build_device_info(firmware="V1.0")))
+        server.start()
+        try:
+            charger = AsyncDuosidaCharger(host="127.0.0.1", port=server.port,
+                                          device_id="TEST123")
+            self.run_async(charger.connect())
+            before = self.run_async(charger.get_status(use_cache=False))
+            self.run_async(charger.disconnect())
+            server.push = build_status_frame(device_info=build_device_info(firmware="V2.0"))
+            self.run_async(charger.connect())
+            after = self.run_async(charger.get_status(use_cache=False))
+            self.run_async(charger.disconnect())
+        finally:
+            server.stop()
+
+        self.assertEqual(before.firmware, "V1.0")
+        self.assertEqual(after.firmware, "V2.0")
+
+    def test_auto_reconnect(self):
+        """Test a connection closed by the charger is re-established"""
+        server = FakeChargerServer(self.loop, push=build_status_frame(voltage=228.0),
+                                   drop_first=True)
+        server.start()
+        try:
+            charger = AsyncDuosidaCharger(host="127.0.0.1", port=server.port,
+                                          device_id="TEST123", auto_reconnect=True)
+            self.run_async(charger.connect())
+            status = self.run_async(charger.get_status(use_cache=False))
+            self.run_async(charger.disconnect())
+        finally:
+            server.stop()
+
+        self.assertEqual(server.connections, 2)
+        self.assertEqual(charger.reconnect_count, 1)
+        self.assertAlmostEqual(status.voltage, 228.0)
+
+    def test_listen_dispatches_pushed_frames(self):
+        """Test every pushed status reaches the subscribers"""
+        push = build_status_frame(voltage=230.0) + build_status_frame(voltage=231.0, sequence=6)
+        server = FakeChargerServer(self.loop, push=push)
+        server.start()
+        seen = []
+
+        async def subscriber(status):
+            seen.append(status.voltage)
+
+        async def scenario():
+            async with AsyncDuosidaCharger("127.0.0.1", port=server.port,
+                                           device_id="TEST123") as charger:
+                await charger.listen(duration=0.3, callback=subscriber)
+                return charger._subscribers
+
+        try:
+            subscribers = self.run_async(scenario())
+        finally:
+            server.stop()
+
+        self.assertEqual(seen, [230.0, 231.0])
+        self.assertEqual(subscribers, [])
+
+    def test_command_while_listening(self):
+        """Test the listener routes acknowledgements to waiting commands"""
+        server = FakeChargerServer(self.loop, push=build_status_frame(voltage=229.0))
+        server.start()
+
+        async def scenario():
+            async with AsyncDuosidaCharger("127.0.0.1", port=server.port,
+                                           device_id="TEST123") as charger:
+                listener = charger.start_listening()
+                status = await charger.get_status()
+                acked = await charger.set_max_current(16)
+                charger.stop_listening()
+                await listener
+                return status, acked
+
+        try:
+            status, acked = self.run_async(scenario())
+        finally:
+            server.stop()
+
+        self.assertEqual(status.voltage, 229.0)
+        self.assertTrue(acked)
+
+    def test_connect_failure(self):
+        """Test connection failure"""
+        server = FakeChargerServer(self.loop)
+        server.start()
+        port = server.port
+        server.stop()
+
+        charger = AsyncDuosidaCharger(host="127.0.0.1", port=port, timeout=1.0)
+        self.assertFalse(self.run_async(charger.connect()))
+        self.assertFalse(charger.connected)
+
+    def test_start_charging_no_connection(self):
+        """Test start charging without connection"""
+        charger = AsyncDuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        self.assertFalse(self.run_async(charger.start_charging()))
+
+    def test_command_fails_fast_without_connection(self):
+        """Test a command is not written when reconnecting failed"""
+        server = FakeChargerServer(self.loop)
+        server.start()
+        port = server.port
+        server.stop()
+
+        charger = AsyncDuosidaCharger(host="127.0.0.1", port=port, device_id="TEST123",
+                                      timeout=1.0, auto_reconnect=True)
+        self.assertFalse(self.run_async(charger.set_max_current(16)))
+        self.assertEqual(charger.stats.connect_failures, 1)
+        self.assertEqual(charger.stats.commands_sent, 0)
+
+    def test_set_max_current_invalid(self):
+        """Test setting invalid max current"""
+        charger = AsyncDuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        self.assertFalse(self.run_async(charger.set_max_current(5)))
+        self.assertFalse(self.run_async(charger.set_max_current(33)))
+
+
+if __name__ == '__main__':
+    unittest.main()
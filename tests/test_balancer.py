@@ -0,0 +1,231 @@
+"""
+Tests for the load balancer
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.balancer import LoadBalancer, allocate_current
+from duosida_ev.charger import ChargerStatus
+from duosida_ev.fleet import ChargerFleet
+
+
+class FakeCharger:
+    """Stands in for AsyncDuosidaCharger, recording commands"""
+
+    def __init__(self, device_id, status=None, accept=True):
+        self.device_id = device_id
+        self.host = "127.0.0.1"
+        self.port = 9988
+        self.connected = True
+        self.status = status
+        self.accept = accept
+        self.commands = []
+
+    async def get_status(self):
+        return self.status
+
+    async def set_max_current(self, amps):
+        self.commands.append(('set', amps))
+        return self.accept
+
+    async def start_charging(self):
+        self.commands.append(('start',))
+        return self.accept
+
+    async def stop_charging(self):
+        self.commands.append(('stop',))
+        return self.accept
+
+
+def charging(current=16.0, timestamp=1000):
+    return ChargerStatus(conn_status=2, current=current, voltage=230.0, timestamp=timestamp)
+
+
+class TestAllocateCurrent(unittest.TestCase):
+    """Test sharing a budget among sessions"""
+
+    def test_equal_share(self):
+        """Test sessions that can use everything share equally"""
+        allocation = allocate_current({'a': 32, 'b': 32, 'c': 32}, budget=48)
+        self.assertEqual(allocation, {'a': 16, 'b': 16, 'c': 16})
+
+    def test_vehicle_limited_session(self):
+        """Test current a session cannot use goes to the others"""
+        allocation = allocate_current({'a': 8, 'b': 32, 'c': 32}, budget=48)
+        self.assertEqual(allocation, {'a': 8, 'b': 20, 'c': 20})
+
+    def test_max_current(self):
+        """Test no session exceeds max_current"""
+        allocation = allocate_current({'a': 40, 'b': 40}, budget=100)
+        self.assertEqual(allocation, {'a': 32, 'b': 32})
+
+    def test_budget_too_small(self):
+        """Test sessions that do not fit at min_current get 0, last ones first"""
+        allocation = allocate_current({'a': 32, 'b': 32, 'c': 32}, budget=13)
+        self.assertEqual(allocation, {'a': 6, 'b': 7, 'c': 0})
+        self.assertLessEqual(sum(allocation.values()), 13)
+
+    def test_never_exceeds_budget(self):
+        """Test whole-amp rounding stays within the budget"""
+        demands = {str(i): 32 for i in range(7)}
+        allocation = allocate_current(demands, budget=50)
+        self.assertLessEqual(sum(allocation.values()), 50)
+        self.assertTrue(all(amps >= 6 for amps in allocation.values()))
+
+
+class TestLoadBalancer(unittest.TestCase):
+    """Test planning and applying limits"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_plan_initial(self):
+        """Test every active session gets a limit on the first cycle"""
+        balancer = LoadBalancer(ChargerFleet(), budget=32, idle_current=None)
+        changes = balancer.plan({'a': charging(), 'b': charging(), 'c': None})
+        self.assertEqual(changes, {'a': 16, 'b': 16})
+
+    def test_hysteresis_and_rate_limit(self):
+        """Test small or too frequent increases are held back"""
+        balancer = LoadBalancer(ChargerFleet(), budget=32, hysteresis=2.0,
+                                min_command_interval=10.0, idle_current=None)
+        balancer.limits = {'a': 15}
+        balancer._last_command = {'a': 100.0}
+
+        self.assertEqual(balancer.plan({'a': charging(15.0)}, now=105.0), {})
+
+        balancer.budget = 16
+        self.assertEqual(balancer.plan({'a': charging(15.0)}, now=105.0), {})
+
+        balancer.budget = 20
+        self.assertEqual(balancer.plan({'a': charging(15.0)}, now=105.0), {})
+        self.assertEqual(balancer.plan({'a': charging(15.0)}, now=111.0), {'a': 20})
+
+    def test_decrease_immediate(self):
+        """Test decreases ignore hysteresis and the rate limit"""
+        balancer = LoadBalancer(ChargerFleet(), budget=32, hysteresis=5.0, idle_current=None)
+        balancer.limits = {'a': 32}
+        balancer._last_command = {'a': 100.0}
+        changes = balancer.plan({'a': charging(30.0), 'b': charging()}, now=100.5)
+        self.assertEqual(changes, {'a': 16, 'b': 16})
+
+    def test_vehicle_limited_demand(self):
+        """Test a session drawing less than its limit frees current"""
+        balancer = LoadBalancer(ChargerFleet(), budget=40, idle_current=None)
+        balancer.limits = {'a': 20, 'b': 20}
+        changes = balancer.plan({'a': charging(6.0), 'b': charging(20.0)}, now=1000.0)
+        self.assertEqual(changes, {'a': 8, 'b': 32})
+
+    def test_unreachable_session_keeps_reservation(self):
+        """Test the limit of a session that stopped answering stays reserved"""
+        balancer = LoadBalancer(ChargerFleet(), budget=32, idle_current=None)
+        balancer.plan({'a': charging(), 'b': charging()})
+        balancer.limits = {'a': 16, 'b': 16}
+        changes = balancer.plan({'a': None, 'b': charging()}, now=1e9)
+        self.assertEqual(changes, {})
+
+    def test_reservation_survives_missed_polls(self):
+        """Test a reservation is held across several missed polls in a row"""
+        balancer = LoadBalancer(ChargerFleet(), budget=32, idle_current=None)
+        balancer.plan({'a': charging(), 'b': charging()})
+        balancer.limits = {'a': 16, 'b': 16}
+        for _ in range(3):
+            self.assertEqual(balancer.plan({'a': charging(), 'b': None}, now=1e9), {})
+
+        # Once b reports that its session ended, a gets the whole budget
+        idle = ChargerStatus(conn_status=0)
+        self.assertEqual(balancer.plan({'a': charging(), 'b': idle}, now=1e9), {'a': 32})
+
+    def test_step_sends_decreases_first(self):
+        """Test commands go out concurrently, decreases before increases"""
+        a = FakeCharger('a', charging(20.0, timestamp=1))
+        b = FakeCharger('b', charging(6.0, timestamp=2))
+        idle = FakeCharger('idle', ChargerStatus(conn_status=0))
+        fleet = ChargerFleet([a, b, idle])
+        balancer = LoadBalancer(fleet, budget=40)
+        balancer.limits = {'a': 20, 'b': 20}
+
+        order = []
+        for charger in (a, b, idle):
+            charger.commands = _Recorder(order, charger.device_id)
+
+        changes = self.run_async(balancer.step())
+
+        self.assertEqual(changes, {'a': 32, 'b': 8, 'idle': 6})
+        self.assertEqual(order[0], ('b', ('set', 8)))
+        self.assertEqual(order[-1], ('a', ('set', 32)))
+        self.assertEqual(balancer.limits, {'a': 32, 'b': 8, 'idle': 6})
+        self.assertEqual(balancer.commands_sent, 3)
+
+    def test_pause_and_resume(self):
+        """Test sessions that do not fit are paused, newest first, then resumed"""
+        old = FakeCharger('old', charging(timestamp=1))
+        new = FakeCharger('new', charging(timestamp=2))
+        fleet = ChargerFleet([old, new])
+        balancer = LoadBalancer(fleet, budget=10, idle_current=None)
+
+        self.run_async(balancer.step())
+        self.assertEqual(new.commands, [('stop',)])
+        self.assertEqual(balancer.paused, {'new'})
+
+        new.status = ChargerStatus(conn_status=5, timestamp=2)
+        balancer.budget = 20
+        self.run_async(balancer.step())
+        self.assertEqual(new.commands, [('stop',), ('set', 10), ('start',)])
+        self.assertEqual(balancer.paused, set())
+
+    def test_rejected_command_retried(self):
+        """Test a limit the charger did not accept is sent again"""
+        a = FakeCharger('a', charging(), accept=False)
+        balancer = LoadBalancer(ChargerFleet([a]), budget=16, idle_current=None)
+        self.run_async(balancer.step())
+        self.run_async(balancer.step())
+        self.assertEqual(a.commands, [('set', 16), ('set', 16)])
+        self.assertEqual(balancer.limits, {})
+
+    def test_failed_decrease_holds_back_increases(self):
+        """Test increases wait while a charger may still run at its old limit"""
+        a = FakeCharger('a', charging(20.0, timestamp=1))
+        b = FakeCharger('b', charging(6.0, timestamp=2), accept=False)
+        balancer = LoadBalancer(ChargerFleet([a, b]), budget=40, idle_current=None)
+        balancer.limits = {'a': 20, 'b': 20}
+
+        results = self.run_async(balancer.apply({'a': 32, 'b': 8}))
+
+        self.assertEqual(results, {'a': False, 'b': False})
+        self.assertEqual(a.commands, [])
+        self.assertEqual(balancer.limits, {'a': 20, 'b': 20})
+        self.assertLessEqual(sum(balancer.limits.values()), balancer.budget)
+
+        b.accept = True
+        self.run_async(balancer.step())
+        self.assertEqual(a.commands, [('set', 32)])
+        self.assertEqual(balancer.limits, {'a': 32, 'b': 8})
+
+
+class _Recorder(list):
+    """Command list that also records the global order of commands"""
+
+    def __init__(self, order, key):
+        super().__init__()
+        self.order = order
+        self.key = key
+
+    def append(self, command):
+        super().append(command)
+        self.order.append((self.key, command))
+
+
+if __name__ == '__main__':
+    unittest.main()
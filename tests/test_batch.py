@@ -0,0 +1,104 @@
+"""
+Tests for batch decoding of captured traffic
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.batch import (
+    COLUMN_TYPES, StatusDecoder, decode_status_file, decode_status_frames, iter_frames,
+)
+from duosida_ev.charger import ChargerStatus, _parse_status_frame
+from duosida_ev.protobuf import ProtobufEncoder
+
+from tests.test_charger import build_device_info, build_status_frame
+
+
+def capture(count):
+    """A stream of status frames interleaved with command acknowledgements"""
+    data = build_status_frame(device_info=build_device_info())
+    for i in range(1, count):
+        data += ProtobufEncoder.encode_varint_field(101, 1000 + i)
+        data += build_status_frame(voltage=230.0 + i, current=float(i % 32), sequence=i)
+    return data
+
+
+class TestBatchDecode(unittest.TestCase):
+    """Test decoding many frames into columns"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_matches_frame_by_frame(self):
+        """Test columns hold the same values as per-frame parsing"""
+        data = capture(50)
+        columns = decode_status_frames(data)
+        cache = {}
+        statuses = [_parse_status_frame(frame, cache) for frame in iter_frames(data)]
+        statuses = [s for s in statuses if s is not None]
+
+        self.assertEqual(set(columns), set(ChargerStatus._fields))
+        self.assertEqual(len(statuses), 50)
+        for name in ChargerStatus._fields:
+            self.assertEqual(list(columns[name]), [getattr(s, name) for s in statuses])
+        self.assertEqual(columns['model'][49], "DUOSIDA Test")
+        self.assertEqual(columns['voltage'].typecode, COLUMN_TYPES['voltage'])
+
+    def test_frame_iterable(self):
+        """Test already separated frames are accepted"""
+        frames = [build_status_frame(voltage=v) for v in (230.0, 231.0)]
+        self.assertEqual(list(decode_status_frames(frames)['voltage']), [230.0, 231.0])
+
+    def test_counts_skipped_frames(self):
+        """Test frames without telemetry are counted"""
+        decoder = StatusDecoder()
+        decoder.feed(capture(10))
+        columns = decoder.finish()
+        self.assertEqual(decoder.frames, 19)
+        self.assertEqual(decoder.skipped, 9)
+        self.assertEqual(len(columns['current']), 10)
+
+    def test_file_in_chunks(self):
+        """Test frames split across read chunks are reassembled"""
+        path = os.path.join(self.tmpdir, 'capture.bin')
+        with open(path, 'wb') as f:
+            f.write(capture(5000))
+        columns = decode_status_file(path, chunk_size=1000)
+        self.assertEqual(len(columns['voltage']), 5000)
+        self.assertEqual(columns['voltage'][-1], 230.0 + 4999)
+        self.assertEqual(set(columns['device_id']), {"TEST123"})
+
+    def test_resync_after_corrupted_byte(self):
+        """Test a junk byte mid-capture only affects the frame it hits"""
+        data = capture(10) + b'\x07' + capture(990)
+        columns = decode_status_frames(data)
+        self.assertEqual(len(columns['voltage']), 1000)
+
+        decoder = StatusDecoder()
+        decoder.feed(data)
+        self.assertEqual(len(decoder.finish()['voltage']), 1000)
+
+    def test_negative_values(self):
+        """Test negative int32 values, sent as ten byte varints, decode signed"""
+        # Protobuf writes -1 as the 64-bit two's complement varint
+        frame = build_status_frame(conn_status=(1 << 64) - 1)
+        columns = decode_status_frames([frame, build_status_frame()])
+        self.assertEqual(list(columns['conn_status']), [-1, 2])
+
+    def test_empty(self):
+        """Test an empty capture gives empty columns"""
+        columns = decode_status_frames(b'')
+        self.assertEqual(len(columns['voltage']), 0)
+        self.assertEqual(columns['device_id'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Smoke tests for the benchmark suite
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from benchmarks import BENCHMARKS, run_suite
+from benchmarks.compare import compare, main, mann_whitney_greater, merge_runs
+
+
+def results(**samples):
+    return {'benchmarks': {name: {'unit': 's/frame', 'samples': values}
+                           for name, values in samples.items()}}
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Test the suite runs and reports JSON"""
+
+    def test_results_format(self):
+        """Test samples and summary are reported per benchmark"""
+        results = run_suite(['decode_message', 'command_round_trip'], repeat=2)
+        json.dumps(results)
+
+        self.assertEqual(results['format'], 1)
+        self.assertIn('python', results['environment'])
+        for name in ('decode_message', 'command_round_trip'):
+            result = results['benchmarks'][name]
+            self.assertNotIn('error', result)
+            self.assertEqual(len(result['samples']), 2)
+            self.assertGreater(result['ops_per_sec'], 0)
+            self.assertLessEqual(result['min'], result['median'])
+
+    def test_failure_reported(self):
+        """Test a failing benchmark is reported instead of aborting the run"""
+        def broken(repeat):
+            raise RuntimeError("boom")
+
+        BENCHMARKS['broken'] = (broken, 's/op', "Always fails")
+        try:
+            results = run_suite(['broken'], repeat=1)
+        finally:
+            del BENCHMARKS['broken']
+        self.assertEqual(results['benchmarks']['broken']['error'], "RuntimeError: boom")
+
+
+class TestRegressionGate(unittest.TestCase):
+    """Test the baseline comparison"""
+
+    def test_exact_p_value(self):
+        """Test the exact U distribution for small samples"""
+        self.assertAlmostEqual(mann_whitney_greater([1, 2, 3], [4, 5, 6]), 0.05)
+        self.assertAlmostEqual(mann_whitney_greater([4, 5, 6], [1, 2, 3]), 1.0)
+
+    def test_normal_approximation(self):
+        """Test large or tied samples use the normal approximation"""
+        self.assertLess(mann_whitney_greater(list(range(50)), list(range(40, 90))), 1e-6)
+        self.assertAlmostEqual(mann_whitney_greater([1.0] * 5, [1.0] * 5), 1.0)
+
+    def test_verdicts(self):
+        """Test slowdowns must be both large and significant"""
+        base = [1.00, 1.01, 0.99, 1.02, 0.98, 1.00, 1.01, 0.99]
+        baseline = results(slower=base, tiny=base, faster=base, noisy=base, gone=base)
+        current = results(
+            slower=[x * 1.5 for x in base],
+            tiny=[x * 1.05 for x in base],
+            faster=[x * 0.5 for x in base],
+            noisy=[0.5, 2.0, 0.6, 1.9, 0.7, 1.8, 1.2, 1.3],
+        )
+
+        verdicts = {c.name: c.verdict for c in compare(baseline, current, threshold=0.10)}
+
+        self.assertEqual(verdicts, {'slower': 'regression', 'tiny': 'unchanged',
+                                    'faster': 'improvement', 'noisy': 'unchanged',
+                                    'gone': 'missing'})
+
+    def test_gate_fails_on_broken_benchmark(self):
+        """Test a benchmark that errors in the candidate fails the gate"""
+        base = [1.00, 1.01, 0.99, 1.02, 0.98]
+        baseline = results(parse_status=base, decode_message=base)
+        current = results(decode_message=base)
+        current['benchmarks']['parse_status'] = {'unit': 's/frame', 'error': "RuntimeError: boom"}
+
+        self.assertEqual({c.name: c.verdict for c in compare(baseline, current)},
+                         {'parse_status': 'error', 'decode_message': 'unchanged'})
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for name, data in (('baseline', baseline), ('current', current)):
+                paths.append(os.path.join(tmpdir, f"{name}.json"))
+                with open(paths[-1], 'w') as f:
+                    json.dump(data, f)
+
+            stderr = StringIO()
+            with redirect_stdout(StringIO()), redirect_stderr(stderr):
+                self.assertEqual(main([paths[0], '--current', paths[1]]), 1)
+                self.assertEqual(main([paths[0], '--current', paths[1], '--allow-missing']), 0)
+            self.assertIn("parse_status failed: RuntimeError: boom", stderr.getvalue())
+
+    def test_gate_fails_on_removed_benchmark(self):
+        """Test a baseline benchmark that no longer exists fails the gate"""
+        base = [1.00, 1.01, 0.99, 1.02, 0.98]
+        baseline = results(renamed_away=base, decode_message=base)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "baseline.json")
+            with open(path, 'w') as f:
+                json.dump(baseline, f)
+
+            stderr = StringIO()
+            with redirect_stdout(StringIO()), redirect_stderr(stderr):
+                self.assertEqual(main([path, '--runs', '1', '--warmup', '0', '-r', '2']), 1)
+            self.assertIn("renamed_away not compared: no such benchmark", stderr.getvalue())
+
+    def test_unknown_name_is_usage_error(self):
+        """Test a NAME that is not a benchmark exits with a usage error"""
+        with redirect_stderr(StringIO()) as stderr:
+            with self.assertRaises(SystemExit) as raised:
+                main(['baseline.json', 'no_such_benchmark'])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("unknown benchmark 'no_such_benchmark'", stderr.getvalue())
+
+    def test_merge_runs(self):
+        """Test samples of several runs are pooled"""
+        merged = merge_runs([results(parse=[1.0, 2.0]), results(parse=[3.0])])
+        self.assertEqual(merged['benchmarks']['parse']['samples'], [1.0, 2.0, 3.0])
+        self.assertEqual(merged['benchmarks']['parse']['median'], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests for the discovery cache
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.cache import DiscoveryCache
+
+
+DEVICE = {
+    'ip': '192.168.1.200',
+    'mac': 'AA:BB:CC:DD:EE:FF',
+    'type': 'smart_wifi',
+    'firmware': 'V1.0',
+    'device_id': '0310107112122360374',
+}
+
+
+class TestDiscoveryCache(unittest.TestCase):
+    """Test DiscoveryCache"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'sub', 'discovery.json')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_default_path_uses_xdg(self):
+        """Test default location honours XDG_CACHE_HOME"""
+        old = os.environ.get('XDG_CACHE_HOME')
+        os.environ['XDG_CACHE_HOME'] = '/tmp/xdg'
+        try:
+            self.assertEqual(DiscoveryCache.default_path(),
+                             '/tmp/xdg/duosida-ev/discovery.json')
+        finally:
+            if old is None:
+                del os.environ['XDG_CACHE_HOME']
+            else:
+                os.environ['XDG_CACHE_HOME'] = old
+
+    def test_round_trip(self):
+        """Test entries survive save and reload"""
+        cache = DiscoveryCache(self.path)
+        cache.update(DEVICE)
+        cache.save()
+
+        reloaded = DiscoveryCache(self.path)
+        entry = reloaded.get('aa-bb-cc-dd-ee-ff')
+        self.assertEqual(entry['ip'], '192.168.1.200')
+        self.assertEqual(entry['device_id'], '0310107112122360374')
+
+    def test_find_by_ip_mac_or_device_id(self):
+        """Test lookup by any identifier"""
+        cache = DiscoveryCache(self.path)
+        cache.update(DEVICE)
+        for target in ('192.168.1.200', 'aabbccddeeff', '0310107112122360374'):
+            self.assertEqual(cache.find(target)['mac'], 'AA:BB:CC:DD:EE:FF')
+        self.assertIsNone(cache.find('192.168.1.201'))
+
+    def test_expired_entries_ignored(self):
+        """Test entries older than the TTL are not returned"""
+        cache = DiscoveryCache(self.path, ttl=60)
+        cache.update(DEVICE)
+        cache._devices['AABBCCDDEEFF']['updated'] = time.time() - 120
+        self.assertIsNone(cache.get(DEVICE['mac']))
+        self.assertEqual(cache.entries(), [])
+
+    def test_update_keeps_device_id(self):
+        """Test a refresh without device ID keeps the known one"""
+        cache = DiscoveryCache(self.path)
+        cache.update(DEVICE)
+        cache.update(dict(DEVICE, ip='192.168.1.201', device_id=None))
+        entry = cache.get(DEVICE['mac'])
+        self.assertEqual(entry['ip'], '192.168.1.201')
+        self.assertEqual(entry['device_id'], '0310107112122360374')
+
+    def test_invalidate(self):
+        """Test invalidated entries are forgotten"""
+        cache = DiscoveryCache(self.path)
+        cache.update(DEVICE)
+        cache.invalidate(DEVICE['mac'])
+        self.assertIsNone(cache.get(DEVICE['mac']))
+
+    def test_corrupt_file_ignored(self):
+        """Test an unreadable cache file behaves like an empty cache"""
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as f:
+            f.write('{not json')
+        self.assertEqual(DiscoveryCache(self.path).entries(), [])
+
+    def test_saved_format(self):
+        """Test the file is versioned JSON keyed by MAC"""
+        cache = DiscoveryCache(self.path)
+        cache.update(DEVICE)
+        cache.save()
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data['version'], 1)
+        self.assertIn('AABBCCDDEEFF', data['devices'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,11 +9,61 @@ from unittest.mock import Mock, patch, MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from duosida_ev.charger import ChargerStatus, DuosidaCharger
+import socket
+
+from duosida_ev import charger as charger_module
+from duosida_ev.charger import ChargerStatus, DuosidaCharger, ProtobufEncoder, ProtobufDecoder, StatusFilter
+from duosida_ev.exceptions import CommunicationError
+
+
+def build_device_info(model="DUOSIDA Test", device_id="TEST123",
+                      manufacturer="UCHEN", firmware="V1.0"):
+    """Build the device info message carried in outer field 4"""
+    return (
+        ProtobufEncoder.encode_string(2, model) +
+        ProtobufEncoder.encode_string(3, device_id) +
+        ProtobufEncoder.encode_string(4, manufacturer) +
+        ProtobufEncoder.encode_string(5, firmware)
+    )
+
+
+def build_status_frame(voltage=230.0, current=16.0, conn_status=2,
+                       device_id="TEST123", sequence=5, device_info=None):
+    """Build a DataVendorStatusReq frame as pushed by the charger"""
+    status_data = (
+        ProtobufEncoder.encode_float(1, voltage) +
+        ProtobufEncoder.encode_float(2, current) +
+        ProtobufEncoder.encode_varint_field(17, conn_status)
+    )
+    inner = (
+        ProtobufEncoder.encode_string(2, "DataVendorStatusReq") +
+        ProtobufEncoder.encode_embedded_message(10, status_data)
+    )
+    info = ProtobufEncoder.encode_embedded_message(4, device_info) if device_info else b''
+    return (
+        info +
+        ProtobufEncoder.encode_embedded_message(16, inner) +
+        ProtobufEncoder.encode_string(100, device_id) +
+        ProtobufEncoder.encode_varint_field(101, sequence)
+    )
+
+
+def attach_acking_socket(charger):
+    """Attach a mock socket that acknowledges every command sent to it"""
+    sock = Mock()
+
+    def recv(_size):
+        sent = sock.sendall.call_args[0][0]
+        sequence = ProtobufDecoder.decode_message(sent)[101]
+        return ProtobufEncoder.encode_varint_field(101, sequence)
+
+    sock.recv.side_effect = recv
+    charger.sock = sock
+    return sock
 
 
 class TestChargerStatus(unittest.TestCase):
-    """Test ChargerStatus dataclass"""
+    """Test ChargerStatus"""
 
     def test_default_values(self):
         """Test default status values"""
@@ -118,6 +168,31 @@ class TestChargerStatus(unittest.TestCase):
         status = ChargerStatus(manufacturer="UCHEN")
         self.assertEqual(status.manufacturer, "UCHEN")
 
+    def test_slotted(self):
+        """Test statuses carry no per-instance __dict__"""
+        status = ChargerStatus()
+        self.assertFalse(hasattr(status, '__dict__'))
+        status.voltage = 231.0
+        self.assertEqual(status.voltage, 231.0)
+        with self.assertRaises(AttributeError):
+            status.not_a_field = 1
+
+    def test_tuple_round_trip(self):
+        """Test to_tuple() and _make() in _fields order"""
+        status = ChargerStatus(conn_status=2, voltage=230.0, device_id="TEST123")
+        values = status.to_tuple()
+        self.assertEqual(len(values), len(ChargerStatus._fields))
+        self.assertEqual(values[ChargerStatus._fields.index('voltage')], 230.0)
+        self.assertEqual(ChargerStatus._make(values), status)
+        self.assertNotEqual(ChargerStatus._make(values), ChargerStatus())
+
+    def test_unknown_state(self):
+        """Test unknown conn_status values"""
+        status = ChargerStatus(conn_status=9)
+        self.assertEqual(status.state, "Unknown (9)")
+        self.assertEqual(status.cp_voltage, 0.0)
+        self.assertIn("voltage=0.0", repr(status))
+
 
 class TestDuosidaCharger(unittest.TestCase):
     """Test DuosidaCharger class"""
@@ -139,8 +214,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_max_current_valid(self):
         """Test setting valid max current"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.set_max_current(16)
         self.assertTrue(result)
@@ -216,8 +290,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_start_charging(self):
         """Test start charging command"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.start_charging()
 
@@ -230,8 +303,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_stop_charging(self):
         """Test stop charging command"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.stop_charging()
 
@@ -262,8 +334,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_config(self):
         """Test generic config setting"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.set_config("TestKey", "TestValue")
 
@@ -273,8 +344,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_connection_timeout_valid(self):
         """Test valid connection timeout setting"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.set_connection_timeout(120)
 
@@ -297,8 +367,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_max_temperature_valid(self):
         """Test valid max temperature setting"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.set_max_temperature(90)
 
@@ -321,8 +390,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_max_voltage_valid(self):
         """Test valid max voltage setting"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.set_max_voltage(280)
 
@@ -332,8 +400,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_min_voltage_valid(self):
         """Test valid min voltage setting"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         result = charger.set_min_voltage(90)
 
@@ -343,8 +410,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_direct_work_mode(self):
         """Test direct work mode setting"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         # Enable
         result = charger.set_direct_work_mode(True)
@@ -357,8 +423,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_led_brightness_valid(self):
         """Test valid LED brightness settings"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         # Valid values: 0, 1, 3
         for level in [0, 1, 3]:
@@ -378,8 +443,7 @@ class TestDuosidaCharger(unittest.TestCase):
     def test_set_stop_on_disconnect(self):
         """Test stop on disconnect settings"""
         charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
-        charger.sock = Mock()
-        charger.sock.sendall = Mock()
+        attach_acking_socket(charger)
 
         # Test enable
         result = charger.set_stop_on_disconnect(True)
@@ -389,6 +453,401 @@ class TestDuosidaCharger(unittest.TestCase):
         result = charger.set_stop_on_disconnect(False)
         self.assertTrue(result)
 
+    def test_get_status_split_frame(self):
+        """Test a status frame split across TCP reads is reassembled"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        frame = build_status_frame()
+        charger.sock.recv.side_effect = [frame[:7], frame[7:20], frame[20:]]
+
+        status = charger.get_status(use_cache=False)
+
+        self.assertEqual(charger.sock.recv.call_count, 3)
+        self.assertAlmostEqual(status.voltage, 230.0)
+        self.assertAlmostEqual(status.current, 16.0)
+        self.assertEqual(status.conn_status, 2)
+        self.assertEqual(status.device_id, "TEST123")
+
+    def test_get_status_coalesced_frames(self):
+        """Test two frames in one TCP read are decoded one at a time"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.side_effect = [
+            build_status_frame(current=10.0, sequence=5) +
+            build_status_frame(current=12.0, sequence=6)
+        ]
+
+        first = charger.get_status(use_cache=False)
+        second = charger.get_status(use_cache=False)
+
+        self.assertEqual(charger.sock.recv.call_count, 1)
+        self.assertAlmostEqual(first.current, 10.0)
+        self.assertAlmostEqual(second.current, 12.0)
+
+    def test_command_waits_for_matching_ack(self):
+        """Test commands return once the reply with their sequence arrives"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.side_effect = [
+            build_status_frame(current=8.0, sequence=1),
+            ProtobufEncoder.encode_varint_field(101, 2),
+        ]
+
+        result = charger.set_max_current(16)
+
+        self.assertTrue(result)
+        self.assertEqual(charger.sequence, 3)
+        # The status frame received while waiting is kept for get_status
+        status = charger.get_status(use_cache=False)
+        self.assertAlmostEqual(status.current, 8.0)
+        self.assertEqual(charger.sock.recv.call_count, 2)
+
+    def test_status_frame_not_taken_for_ack(self):
+        """Test a pushed frame whose counter equals the command sequence is no ack"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.side_effect = [
+            build_status_frame(current=8.0, sequence=2),
+            ProtobufEncoder.encode_varint_field(101, 2),
+        ]
+
+        self.assertTrue(charger.set_max_current(16))
+
+        self.assertEqual(charger.sock.recv.call_count, 2)
+        status = charger.get_status(use_cache=False)
+        self.assertAlmostEqual(status.current, 8.0)
+
+    def test_command_ack_timeout(self):
+        """Test commands fail when no acknowledgement arrives"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 ack_timeout=0.05)
+        charger.sock = Mock()
+        charger.sock.recv.side_effect = socket.timeout("timed out")
+
+        self.assertFalse(charger.start_charging())
+        charger.sock.sendall.assert_called_once()
+
+    def test_command_without_ack_wait(self):
+        """Test ack_timeout=None sends without waiting for a reply"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 ack_timeout=None)
+        charger.sock = Mock()
+
+        self.assertTrue(charger.stop_charging())
+        charger.sock.recv.assert_not_called()
+
+    def test_auto_reconnect_after_close(self):
+        """Test a closed connection is re-established before the next read"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 auto_reconnect=True)
+        charger.sock = Mock()
+        charger.sock.recv.return_value = b''
+
+        def connect():
+            charger.sock = Mock()
+            charger.sock.recv.return_value = build_status_frame(voltage=229.0)
+            return True
+
+        with patch.object(charger, 'connect', side_effect=connect) as mock_connect:
+            status = charger.get_status(use_cache=False)
+
+        mock_connect.assert_called_once()
+        self.assertEqual(charger.reconnect_count, 1)
+        self.assertAlmostEqual(status.voltage, 229.0)
+
+    def test_auto_reconnect_resends_command(self):
+        """Test a command that hit a dead socket is resent with a fresh sequence"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 auto_reconnect=True)
+        charger.sock = Mock()
+        charger.sock.sendall.side_effect = BrokenPipeError("Broken pipe")
+
+        def connect():
+            attach_acking_socket(charger)
+            charger.sequence += 1  # handshake
+            return True
+
+        with patch.object(charger, 'connect', side_effect=connect):
+            self.assertTrue(charger.set_max_current(16))
+
+        self.assertEqual(charger.reconnect_count, 1)
+        sent = ProtobufDecoder.decode_message(charger.sock.sendall.call_args[0][0])
+        self.assertEqual(sent[101], 3)
+        self.assertEqual(charger.sequence, 4)
+
+    def test_command_fails_fast_without_connection(self):
+        """Test a command is not written when reconnecting failed"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 auto_reconnect=True)
+
+        with patch.object(charger, 'connect', return_value=False) as mock_connect, \
+                patch.object(charger, '_send_raw') as mock_send:
+            self.assertFalse(charger.set_max_current(16))
+
+        mock_connect.assert_called_once()
+        mock_send.assert_not_called()
+        self.assertEqual(charger.stats.commands_sent, 0)
+
+    def test_reconnect_backoff(self):
+        """Test failed reconnects back off exponentially up to the maximum"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 auto_reconnect=True, reconnect_delay=1.0,
+                                 max_reconnect_delay=3.0)
+
+        with patch.object(charger, 'connect', return_value=False), \
+                patch('duosida_ev.charger.random.uniform', return_value=1.0), \
+                patch('duosida_ev.charger.time.sleep') as mock_sleep:
+            for _ in range(4):
+                self.assertFalse(charger._reconnect())
+
+        delays = [call[0][0] for call in mock_sleep.call_args_list]
+        self.assertEqual(delays, [1.0, 2.0, 3.0])
+        self.assertEqual(charger.reconnect_count, 0)
+
+    def test_no_reconnect_by_default(self):
+        """Test a closed connection stays closed without auto_reconnect"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+
+        with patch.object(charger, 'connect') as mock_connect:
+            self.assertFalse(charger._ensure_connected())
+        mock_connect.assert_not_called()
+
+    def test_device_info_decoded(self):
+        """Test model, manufacturer and firmware come from the nested field 4"""
+        info = build_device_info(firmware="*-V2.1*-beta")
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.return_value = build_status_frame(device_info=info)
+
+        status = charger.get_status(use_cache=False)
+
+        self.assertEqual(status.model, "DUOSIDA Test")
+        self.assertEqual(status.manufacturer, "UCHEN")
+        self.assertEqual(status.firmware, "*-V2.1*-beta")
+        self.assertEqual(charger._device_info["TEST123"]["model"], "DUOSIDA Test")
+
+    def test_device_info_cached(self):
+        """Test device info is decoded once per device ID"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.side_effect = [
+            build_status_frame(device_info=build_device_info()),
+            build_status_frame(sequence=6),
+        ]
+
+        with patch('duosida_ev.charger._decode_device_info',
+                   wraps=charger_module._decode_device_info) as mock_decode:
+            charger.get_status(use_cache=False)
+            status = charger.get_status(use_cache=False)
+
+        mock_decode.assert_called_once()
+        self.assertEqual(status.firmware, "V1.0")
+
+    def test_device_info_cleared_on_connect(self):
+        """Test device info is decoded again after reconnecting"""
+        firmwares = ["V1.0", "V2.0"]
+
+        def socket_factory(address, timeout):
+            sock = Mock()
+            info = build_device_info(firmware=firmwares.pop(0))
+            # Nothing answers the handshake, then a status frame is pushed
+            sock.recv.side_effect = [socket.timeout("timed out"), build_status_frame(device_info=info)]
+            return sock
+
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123",
+                                 socket_factory=socket_factory)
+        with patch('duosida_ev.charger.time.sleep'):
+            charger.connect()
+            before = charger.get_status(use_cache=False)
+            charger.disconnect()
+            charger.connect()
+            after = charger.get_status(use_cache=False)
+
+        self.assertEqual(before.firmware, "V1.0")
+        self.assertEqual(after.firmware, "V2.0")
+
+    def test_listen_dispatches_every_frame(self):
+        """Test every pushed frame reaches the subscribers, without polling"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        pushed = [build_status_frame(voltage=230.0) + build_status_frame(voltage=231.0),
+                  build_status_frame(voltage=232.0)]
+
+        def recv(_size):
+            if pushed:
+                return pushed.pop(0)
+            raise socket.timeout("timed out")
+
+        charger.sock.recv.side_effect = recv
+        seen = []
+        charger.subscribe(seen.append)
+        unsubscribe = charger.subscribe(Mock(side_effect=ValueError("broken")))
+
+        with patch('duosida_ev.charger.time.sleep') as mock_sleep:
+            charger.listen(duration=0.2)
+
+        mock_sleep.assert_not_called()
+        self.assertEqual([s.voltage for s in seen], [230.0, 231.0, 232.0])
+        self.assertEqual(charger._last_good_status.voltage, 232.0)
+        unsubscribe()
+        self.assertEqual(charger._subscribers, [seen.append])
+
+    def test_listen_stop_from_subscriber(self):
+        """Test stop_listening() ends listen() and the callback is removed"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.return_value = build_status_frame()
+        seen = []
+
+        def callback(status):
+            seen.append(status)
+            charger.stop_listening()
+
+        charger.listen(callback=callback)
+
+        self.assertEqual(len(seen), 1)
+        self.assertEqual(charger._subscribers, [])
+
+    def test_listen_connection_closed(self):
+        """Test listen() raises when the charger closes the connection"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        charger.sock = Mock()
+        charger.sock.recv.return_value = b''
+
+        with self.assertRaises(CommunicationError):
+            charger.listen(duration=1.0)
+
+
+class TestConfigTemplates(unittest.TestCase):
+    """Test pre-encoded config commands"""
+
+    def test_matches_builder(self):
+        """Test templates produce the same bytes as a fresh encode"""
+        templates = charger_module._ConfigTemplates()
+        cases = [
+            ("VendorMaxWorkCurrent", "16", "0310107112122360374", 7),
+            ("VendorMaxWorkCurrent", "16", "0310107112122360374", 300),
+            ("VendorMaxWorkCurrent", "32", "0310107112122360374", 8),
+            ("LongValue", "x" * 200, "0310107112122360374", 9),
+            ("VendorMaxWorkCurrent", "16", "OTHER", 10),
+        ]
+        for key, value, device_id, sequence in cases:
+            self.assertEqual(
+                templates.build(key, value, device_id, sequence),
+                charger_module._build_config_command(key, value, device_id, sequence))
+
+    def test_prefix_reused(self):
+        """Test repeated commands reuse the cached prefix"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        attach_acking_socket(charger)
+
+        with patch.object(charger_module.CONFIG_COMMAND, 'encode',
+                          wraps=charger_module.CONFIG_COMMAND.encode) as mock_encode:
+            self.assertTrue(charger.set_max_current(16))
+            self.assertTrue(charger.set_max_current(16))
+            self.assertTrue(charger.set_max_current(20))
+
+        # The key is encoded once; values and sequences vary
+        mock_encode.assert_called_once_with(key="VendorMaxWorkCurrent")
+        sent = [call[0][0] for call in charger.sock.sendall.call_args_list]
+        self.assertEqual(sent[0][:-1], sent[1][:-1])
+        self.assertNotEqual(sent[0], sent[1])
+
+class TestConnectionState(unittest.TestCase):
+    """Test the protocol state shared by the sync and asyncio clients"""
+
+    def test_sequence_never_goes_back(self):
+        """Test a late command_sent() does not reuse sequence numbers"""
+        state = charger_module._ConnectionState()
+        first = state.next_sequence()
+        second = state.next_sequence()
+        state.command_sent(first)
+        self.assertEqual(state.sequence, second + 1)
+        self.assertEqual(state.stats.commands_sent, 1)
+
+    def test_non_ack_frames_backlogged(self):
+        """Test frames that do not acknowledge the command are kept"""
+        state = charger_module._ConnectionState()
+        status = build_status_frame(sequence=7)
+        self.assertFalse(state.is_ack(status, 7, start=0.0))
+        self.assertTrue(state.is_ack(ProtobufEncoder.encode_varint_field(101, 7), 7, start=0.0))
+        self.assertEqual(list(state.backlog), [status])
+        self.assertEqual(state.stats.commands_acknowledged, 1)
+
+    def test_reconnect_backoff(self):
+        """Test the backoff grows with failures and resets on success"""
+        state = charger_module._ConnectionState(reconnect_delay=1.0, max_reconnect_delay=3.0)
+        delays = []
+        with patch('duosida_ev.charger.random.uniform', return_value=1.0):
+            for _ in range(4):
+                delays.append(state.reconnect_backoff())
+                state.reconnected(False)
+            state.reconnected(True)
+            delays.append(state.reconnect_backoff())
+        self.assertEqual(delays, [0.0, 1.0, 2.0, 3.0, 0.0])
+        self.assertEqual(state.reconnect_count, 1)
+
+
+class TestStatusFilter(unittest.TestCase):
+    """Test change-only status emission"""
+
+    def test_first_status_passes(self):
+        """Test the first status always passes"""
+        status_filter = StatusFilter()
+        self.assertTrue(status_filter(ChargerStatus(), now=0.0))
+
+    def test_deadbands(self):
+        """Test small changes are suppressed, larger ones pass"""
+        status_filter = StatusFilter()
+        status_filter(ChargerStatus(voltage=230.0, current=16.0), now=0.0)
+
+        self.assertFalse(status_filter(ChargerStatus(voltage=230.8, current=16.05), now=1.0))
+        self.assertTrue(status_filter(ChargerStatus(voltage=231.5, current=16.0), now=2.0))
+        self.assertFalse(status_filter(ChargerStatus(voltage=231.5, current=16.08), now=3.0))
+        self.assertTrue(status_filter(ChargerStatus(voltage=231.5, current=16.2), now=4.0))
+        self.assertEqual((status_filter.passed, status_filter.suppressed), (3, 2))
+
+    def test_drift_accumulates(self):
+        """Test changes are measured from the last status passed"""
+        status_filter = StatusFilter()
+        status_filter(ChargerStatus(voltage=230.0), now=0.0)
+        self.assertFalse(status_filter(ChargerStatus(voltage=230.6), now=1.0))
+        self.assertTrue(status_filter(ChargerStatus(voltage=231.2), now=2.0))
+
+    def test_state_change(self):
+        """Test any change of state passes"""
+        status_filter = StatusFilter()
+        status_filter(ChargerStatus(conn_status=0), now=0.0)
+        self.assertTrue(status_filter(ChargerStatus(conn_status=1), now=1.0))
+
+    def test_keyframe(self):
+        """Test an unchanged status passes every keyframe_interval"""
+        status_filter = StatusFilter(keyframe_interval=10.0)
+        status_filter(ChargerStatus(), now=0.0)
+        self.assertFalse(status_filter(ChargerStatus(), now=9.0))
+        self.assertTrue(status_filter(ChargerStatus(), now=10.0))
+        self.assertFalse(status_filter(ChargerStatus(), now=19.0))
+
+    def test_custom_deadbands(self):
+        """Test deadbands can be tightened or a field ignored"""
+        status_filter = StatusFilter({'voltage': None, 'current': 1.0}, keyframe_interval=None)
+        status_filter(ChargerStatus(voltage=230.0, current=10.0), now=0.0)
+        self.assertFalse(status_filter(ChargerStatus(voltage=250.0, current=10.5), now=1e6))
+        self.assertTrue(status_filter(ChargerStatus(voltage=250.0, current=11.5), now=1e6))
+
+    def test_monitor_changes_only(self):
+        """Test monitor only calls back for changed statuses"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123")
+        statuses = [ChargerStatus(voltage=230.0), ChargerStatus(voltage=230.2),
+                    ChargerStatus(voltage=235.0)]
+        seen = []
+
+        with patch.object(charger, 'get_status', side_effect=statuses + [None] * 10):
+            charger.monitor(interval=0.0, duration=0.05, callback=seen.append,
+                            changes_only=True)
+
+        self.assertEqual([s.voltage for s in seen], [230.0, 235.0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,11 +5,14 @@ Tests for network discovery
 import unittest
 import sys
 import os
+import time
+import tempfile
 from unittest.mock import patch, MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from duosida_ev.discovery import discover_chargers
+from duosida_ev.discovery import discover_chargers, iter_discover, find_chargers
+from duosida_ev.cache import DiscoveryCache
 
 
 class TestDiscovery(unittest.TestCase):
@@ -152,6 +155,186 @@ class TestDiscovery(unittest.TestCase):
         self.assertEqual(devices[0]['device_id'], '0310107112122360374')
         mock_get_device_id.assert_called_once_with('192.168.1.200')
 
+    @patch('duosida_ev.discovery._get_device_id_via_tcp')
+    @patch('socket.socket')
+    def test_discover_resolves_ids_concurrently(self, mock_socket_class, mock_get_device_id):
+        """Test device IDs are retrieved in parallel"""
+        mock_socket = MagicMock()
+        mock_socket_class.return_value = mock_socket
+        mock_socket.getsockname.return_value = ('192.168.1.100', 0)
+
+        responses = [
+            (f'192.168.1.{200 + i},AA:BB:CC:DD:EE:0{i},smart_wifi,V1.0\x00'.encode(),
+             (f'192.168.1.{200 + i}', 48899))
+            for i in range(5)
+        ]
+        mock_socket.recvfrom.side_effect = responses + [Exception("timeout")]
+
+        def slow_lookup(ip):
+            time.sleep(0.3)
+            return 'ID-' + ip
+
+        mock_get_device_id.side_effect = slow_lookup
+
+        start = time.monotonic()
+        devices = discover_chargers(timeout=1, get_device_id=True)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(devices), 5)
+        for device in devices:
+            self.assertEqual(device['device_id'], 'ID-' + device['ip'])
+        self.assertLess(elapsed, 1.0)
+
+    @patch('duosida_ev.discovery._get_device_id_via_tcp')
+    @patch('socket.socket')
+    def test_discover_id_deadline(self, mock_socket_class, mock_get_device_id):
+        """Test slow device ID lookups are abandoned at the deadline"""
+        mock_socket = MagicMock()
+        mock_socket_class.return_value = mock_socket
+        mock_socket.getsockname.return_value = ('192.168.1.100', 0)
+
+        mock_socket.recvfrom.side_effect = [
+            (b'192.168.1.200,AA:BB:CC:DD:EE:01,smart_wifi,V1.0\x00', ('192.168.1.200', 48899)),
+            (b'192.168.1.201,AA:BB:CC:DD:EE:02,smart_wifi,V1.0\x00', ('192.168.1.201', 48899)),
+            Exception("timeout")
+        ]
+
+        def lookup(ip):
+            if ip == '192.168.1.201':
+                time.sleep(0.5)
+            return 'ID-' + ip
+
+        mock_get_device_id.side_effect = lookup
+
+        devices = discover_chargers(timeout=1, get_device_id=True, id_timeout=0.2)
+
+        self.assertEqual(devices[0]['device_id'], 'ID-192.168.1.200')
+        self.assertIsNone(devices[1]['device_id'])
+
+
+class TestIterDiscover(unittest.TestCase):
+    """Test streaming discovery"""
+
+    def _mock_responses(self, mock_socket_class, count):
+        mock_socket = MagicMock()
+        mock_socket_class.return_value = mock_socket
+        mock_socket.getsockname.return_value = ('192.168.1.100', 0)
+        responses = [
+            (f'192.168.1.{200 + i},AA:BB:CC:DD:EE:0{i},smart_wifi,V1.0\x00'.encode(),
+             (f'192.168.1.{200 + i}', 48899))
+            for i in range(count)
+        ]
+        mock_socket.recvfrom.side_effect = responses + [Exception("timeout")]
+        return mock_socket
+
+    @patch('socket.socket')
+    def test_yields_devices(self, mock_socket_class):
+        """Test devices are yielded in reply order"""
+        self._mock_responses(mock_socket_class, 3)
+
+        devices = list(iter_discover(timeout=1, get_device_id=False))
+
+        self.assertEqual([d['ip'] for d in devices],
+                         ['192.168.1.200', '192.168.1.201', '192.168.1.202'])
+
+    @patch('duosida_ev.discovery._get_device_id_via_tcp')
+    @patch('socket.socket')
+    def test_no_device_id_lookup_by_default(self, mock_socket_class, mock_get_device_id):
+        """Test the receive loop does not block on TCP lookups by default"""
+        self._mock_responses(mock_socket_class, 2)
+
+        devices = list(iter_discover(timeout=1))
+
+        self.assertEqual(len(devices), 2)
+        self.assertTrue(all(d['device_id'] is None for d in devices))
+        mock_get_device_id.assert_not_called()
+
+    @patch('socket.socket')
+    def test_stops_at_expected_count(self, mock_socket_class):
+        """Test listening stops once enough devices answered"""
+        mock_socket = self._mock_responses(mock_socket_class, 3)
+
+        devices = list(iter_discover(timeout=1, get_device_id=False, expected_count=2))
+
+        self.assertEqual(len(devices), 2)
+        self.assertEqual(mock_socket.recvfrom.call_count, 2)
+        mock_socket.close.assert_called()
+
+    @patch('socket.socket')
+    def test_stops_at_target_mac(self, mock_socket_class):
+        """Test listening stops at the requested MAC address"""
+        self._mock_responses(mock_socket_class, 3)
+
+        devices = list(iter_discover(timeout=1, get_device_id=False,
+                                     target='aa-bb-cc-dd-ee-01'))
+
+        self.assertEqual(devices[-1]['ip'], '192.168.1.201')
+        self.assertEqual(len(devices), 2)
+
+    @patch('socket.socket')
+    def test_stops_when_idle(self, mock_socket_class):
+        """Test listening stops when no new reply arrives"""
+        import socket
+        mock_socket = self._mock_responses(mock_socket_class, 0)
+        replies = [(b'192.168.1.200,AA:BB:CC:DD:EE:FF,smart_wifi,V1.0\x00',
+                    ('192.168.1.200', 48899))]
+
+        def recvfrom(size):
+            if replies:
+                return replies.pop()
+            time.sleep(mock_socket.settimeout.call_args[0][0])
+            raise socket.timeout()
+
+        mock_socket.recvfrom.side_effect = recvfrom
+
+        start = time.monotonic()
+        devices = list(iter_discover(timeout=5, get_device_id=False, idle_timeout=0.1))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(devices), 1)
+        self.assertLess(elapsed, 1.0)
+
+
+class TestFindChargers(unittest.TestCase):
+    """Test cache-first charger lookup"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = DiscoveryCache(os.path.join(self.tmpdir.name, 'discovery.json'))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch('duosida_ev.discovery.iter_discover')
+    def test_uses_fresh_cache_entry(self, mock_iter_discover):
+        """Test a cached charger is returned without broadcasting"""
+        self.cache.update({'ip': '192.168.1.200', 'mac': 'AA:BB:CC:DD:EE:FF',
+                           'device_id': '0310107112122360374'})
+
+        devices = find_chargers(cache=self.cache)
+
+        self.assertEqual(len(devices), 1)
+        self.assertTrue(devices[0]['cached'])
+        mock_iter_discover.assert_not_called()
+
+    @patch('duosida_ev.discovery._get_device_id_via_tcp')
+    @patch('duosida_ev.discovery.iter_discover')
+    def test_falls_back_to_broadcast(self, mock_iter_discover, mock_get_device_id):
+        """Test discovery runs when the cache is bypassed and refreshes it"""
+        self.cache.update({'ip': '192.168.1.200', 'mac': 'AA:BB:CC:DD:EE:FF',
+                           'device_id': '0310107112122360374'})
+        mock_iter_discover.return_value = iter([{
+            'ip': '192.168.1.201', 'mac': 'AA:BB:CC:DD:EE:FF', 'type': 'smart_wifi',
+            'firmware': 'V1.0', 'device_id': None, 'raw': ''
+        }])
+        mock_get_device_id.return_value = '0310107112122360374'
+
+        devices = find_chargers(cache=self.cache, use_cache=False)
+
+        self.assertEqual(devices[0]['ip'], '192.168.1.201')
+        self.assertFalse(devices[0]['cached'])
+        self.assertEqual(self.cache.get('AA:BB:CC:DD:EE:FF')['ip'], '192.168.1.201')
+
 
 if __name__ == '__main__':
     unittest.main()
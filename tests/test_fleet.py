@@ -0,0 +1,142 @@
+"""
+Tests for ChargerFleet
+"""
+
+import asyncio
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.async_charger import AsyncDuosidaCharger
+from duosida_ev.fleet import ChargerFleet, FleetStats
+from duosida_ev.simulator import ChargerSimulator
+
+from tests.test_charger import build_status_frame
+from tests.test_async_charger import FakeChargerServer
+
+
+class TestFleetStats(unittest.TestCase):
+    """Test FleetStats aggregation"""
+
+    def test_latency_summary(self):
+        """Test mean, max and percentiles"""
+        stats = FleetStats()
+        for latency in (0.1, 0.2, 0.3, 0.4):
+            stats.record(latency, ok=True)
+        stats.record(1.0, ok=False)
+
+        self.assertEqual(stats.polls, 5)
+        self.assertEqual(stats.failures, 1)
+        self.assertAlmostEqual(stats.mean_latency, 0.4)
+        self.assertAlmostEqual(stats.max_latency, 1.0)
+        self.assertAlmostEqual(stats.latency_percentile(50), 0.3)
+        self.assertAlmostEqual(stats.latency_percentile(100), 1.0)
+        self.assertGreater(stats.throughput(window=60), 0)
+
+    def test_empty(self):
+        """Test statistics without any poll"""
+        stats = FleetStats()
+        self.assertEqual(stats.mean_latency, 0.0)
+        self.assertEqual(stats.latency_percentile(99), 0.0)
+
+
+class TestChargerFleet(unittest.TestCase):
+    """Test ChargerFleet polling"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_from_devices_skips_unknown_ids(self):
+        """Test fleet creation from discovery results"""
+        fleet = ChargerFleet.from_devices([
+            {'ip': '192.168.1.200', 'device_id': 'A'},
+            {'ip': '192.168.1.201', 'device_id': None},
+        ], poll_timeout=1.0, timeout=2.0)
+        self.assertEqual(list(fleet.chargers), ['A'])
+        self.assertEqual(fleet.poll_timeout, 1.0)
+        self.assertEqual(fleet.chargers['A'].timeout, 2.0)
+
+    def test_poll_concurrently(self):
+        """Test all chargers are polled and keyed by device ID"""
+        servers = []
+        for i in range(3):
+            server = FakeChargerServer(self.loop, push=build_status_frame(
+                current=10.0 + i, device_id=f"DEV{i}"))
+            server.start()
+            servers.append(server)
+
+        fleet = ChargerFleet(AsyncDuosidaCharger("127.0.0.1", port=server.port,
+                                                 device_id=f"DEV{i}")
+                             for i, server in enumerate(servers))
+
+        async def scenario():
+            async with fleet:
+                return await fleet.poll()
+
+        try:
+            statuses = self.loop.run_until_complete(scenario())
+        finally:
+            for server in servers:
+                server.stop()
+
+        self.assertEqual(sorted(statuses), ["DEV0", "DEV1", "DEV2"])
+        for i in range(3):
+            self.assertAlmostEqual(statuses[f"DEV{i}"].current, 10.0 + i)
+        self.assertEqual(fleet.stats.polls, 3)
+        self.assertEqual(fleet.stats.failures, 0)
+        self.assertEqual(fleet.last_status["DEV1"].current, 11.0)
+
+        latency = fleet.latency()
+        self.assertEqual(latency.connect.count, 3)
+        self.assertEqual(latency.handshake.count, 3)
+        self.assertEqual(latency.status.count, 3)
+        self.assertGreater(latency.status.percentile(99), 0)
+
+    def test_poll_unconnected(self):
+        """Test chargers that are not connected report None"""
+        fleet = ChargerFleet([AsyncDuosidaCharger("127.0.0.1", device_id="A")])
+        statuses = self.loop.run_until_complete(fleet.poll())
+        self.assertEqual(statuses, {"A": None})
+        self.assertEqual(fleet.stats.failures, 1)
+
+    def test_poll_reconnects(self):
+        """Test a charger whose reconnects failed is retried on later polls"""
+        async def scenario():
+            async with ChargerSimulator(count=1, push_interval=0.05) as simulator:
+                virtual = simulator.chargers[0]
+                charger = AsyncDuosidaCharger(virtual.host, virtual.port,
+                                              device_id=virtual.device_id, timeout=0.5,
+                                              auto_reconnect=True, reconnect_delay=0.01,
+                                              max_reconnect_delay=0.01)
+                fleet = ChargerFleet([charger], poll_timeout=2.0)
+                await fleet.connect()
+                self.assertIsNotNone((await fleet.poll())[virtual.device_id])
+
+                await virtual.stop()
+                # Statuses already buffered may still be served first
+                for _ in range(20):
+                    await fleet.poll()
+                    if not charger.connected:
+                        break
+                self.assertFalse(charger.connected)
+
+                await virtual.start()
+                statuses = await fleet.poll()
+                await fleet.disconnect()
+                return virtual, charger, statuses
+
+        virtual, charger, statuses = self.run_async(scenario())
+        self.assertIsNotNone(statuses[virtual.device_id])
+        self.assertGreaterEqual(charger.reconnect_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
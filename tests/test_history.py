@@ -0,0 +1,100 @@
+"""
+Tests for the in-memory status history
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev import history as history_module
+from duosida_ev.charger import ChargerStatus, DuosidaCharger
+from duosida_ev.history import StatusHistory, WindowStats
+
+from tests.test_charger import build_status_frame
+
+
+def fill(history, count, start=0):
+    for i in range(start, start + count):
+        history.append(ChargerStatus(voltage=200.0 + i, current=float(i), conn_status=2),
+                       timestamp=1000.0 + i)
+
+
+class TestStatusHistory(unittest.TestCase):
+    """Test the ring buffer"""
+
+    def test_window_before_wrap(self):
+        """Test samples come back oldest first"""
+        history = StatusHistory(capacity=10)
+        fill(history, 4)
+        window = history.window()
+        self.assertEqual(len(history), 4)
+        self.assertEqual(list(window['timestamp']), [1000.0, 1001.0, 1002.0, 1003.0])
+        self.assertEqual(list(window['conn_status']), [2.0] * 4)
+
+    def test_wrap_keeps_latest(self):
+        """Test the oldest samples are overwritten once full"""
+        history = StatusHistory(capacity=5)
+        fill(history, 12)
+        self.assertEqual(len(history), 5)
+        self.assertEqual(list(history.window()['current']), [7.0, 8.0, 9.0, 10.0, 11.0])
+
+    def test_last_seconds(self):
+        """Test windows are selected by timestamp across the wrap point"""
+        history = StatusHistory(capacity=8)
+        fill(history, 20)
+        window = history.window(seconds=3, now=1019.0)
+        self.assertEqual(list(window['timestamp']), [1016.0, 1017.0, 1018.0, 1019.0])
+        self.assertEqual(len(history.window(seconds=3, now=2000.0)['voltage']), 0)
+
+    def test_stats(self):
+        """Test min, max and mean over a window"""
+        history = StatusHistory(capacity=8)
+        fill(history, 20)
+        self.assertEqual(history.stats('current', seconds=2, now=1019.0),
+                         WindowStats(count=3, min=17.0, max=19.0, mean=18.0))
+        self.assertEqual(history.stats('voltage').count, 8)
+        self.assertIsNone(history.stats('voltage', seconds=1, now=5000.0))
+        self.assertIsNone(StatusHistory(capacity=4).stats('voltage'))
+
+    def test_invalid_capacity(self):
+        """Test capacity must be positive"""
+        with self.assertRaises(ValueError):
+            StatusHistory(capacity=0)
+
+    def test_numpy_missing(self):
+        """Test to_numpy() explains that NumPy is needed"""
+        with patch.object(history_module, 'numpy', None):
+            with self.assertRaises(ImportError):
+                StatusHistory().to_numpy()
+
+    @unittest.skipUnless(history_module.numpy, "NumPy not installed")
+    def test_numpy_view(self):
+        """Test NumPy arrays match the window, sharing memory when contiguous"""
+        history = StatusHistory(capacity=8)
+        fill(history, 6)
+        arrays = history.to_numpy(seconds=2, now=1005.0)
+        self.assertEqual(arrays['current'].tolist(), [3.0, 4.0, 5.0])
+        fill(history, 1, start=6)
+        self.assertEqual(history.to_numpy()['current'].tolist(), [float(i) for i in range(7)])
+        fill(history, 5, start=7)
+        self.assertEqual(history.to_numpy()['current'].tolist(), [float(i) for i in range(4, 12)])
+
+    def test_charger_records_history(self):
+        """Test history_size makes the charger keep every status it reads"""
+        charger = DuosidaCharger(host="192.168.1.100", device_id="TEST123", history_size=16)
+        charger.sock = Mock()
+        charger.sock.recv.side_effect = [build_status_frame(voltage=230.0),
+                                         build_status_frame(voltage=231.0, sequence=6)]
+
+        charger.get_status(use_cache=False)
+        charger.get_status(use_cache=False)
+
+        self.assertEqual(list(charger.history.window()['voltage']), [230.0, 231.0])
+        self.assertIsNone(DuosidaCharger(host="192.168.1.100").history)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from duosida_ev.charger import ProtobufEncoder, ProtobufDecoder
+from duosida_ev.protobuf import ProtobufFrameReader
 
 
 class TestProtobufEncoder(unittest.TestCase):
@@ -92,6 +93,107 @@ class TestProtobufDecoder(unittest.TestCase):
         self.assertEqual(fields[1], 1)
         self.assertEqual(fields[2], 'hi')
 
+    def test_decode_message_binary(self):
+        """Test invalid UTF-8 fields are returned as bytes"""
+        data = b'\x0a\x02\xff\xfe'
+        fields = ProtobufDecoder.decode_message(data)
+        self.assertEqual(fields[1], b'\xff\xfe')
+
+    def test_decode_fields_views(self):
+        """Test length-delimited fields are memoryviews unless declared strings"""
+        inner = ProtobufEncoder.encode_float(1, 230.5) + ProtobufEncoder.encode_varint_field(17, 2)
+        data = (
+            ProtobufEncoder.encode_embedded_message(16, inner) +
+            ProtobufEncoder.encode_string(100, "TEST123") +
+            ProtobufEncoder.encode_varint_field(101, 300)
+        )
+        fields = ProtobufDecoder.decode_fields(data, strings=(100,))
+
+        self.assertIsInstance(fields[16], memoryview)
+        self.assertEqual(fields[16].tobytes(), inner)
+        self.assertEqual(fields[100], "TEST123")
+        self.assertEqual(fields[101], 300)
+
+        nested = ProtobufDecoder.decode_fields(fields[16])
+        self.assertAlmostEqual(nested[1], 230.5)
+        self.assertEqual(nested[17], 2)
+
+    def test_decode_fields_truncated(self):
+        """Test a truncated field ends decoding without an error"""
+        data = ProtobufEncoder.encode_varint_field(1, 5) + b'\x12\x05ab'
+        self.assertEqual(ProtobufDecoder.decode_fields(data), {1: 5})
+
+
+class TestProtobufFrameReader(unittest.TestCase):
+    """Test splitting a byte stream into messages"""
+
+    def _message(self, sequence, text="hi"):
+        return (
+            ProtobufEncoder.encode_string(16, text) +
+            ProtobufEncoder.encode_string(100, "TEST123") +
+            ProtobufEncoder.encode_varint_field(101, sequence)
+        )
+
+    def test_single_message(self):
+        """Test a message ending with field 101 is returned whole"""
+        reader = ProtobufFrameReader()
+        reader.feed(self._message(3))
+        self.assertEqual(reader.next_frame(), self._message(3))
+        self.assertIsNone(reader.next_frame())
+        self.assertEqual(reader.pending, 0)
+
+    def test_split_message(self):
+        """Test a message split across reads is reassembled"""
+        reader = ProtobufFrameReader()
+        data = self._message(3)
+        for i in range(len(data) - 1):
+            reader.feed(data[i:i+1])
+            self.assertIsNone(reader.next_frame())
+        reader.feed(data[-1:])
+        self.assertEqual(reader.next_frame(), data)
+
+    def test_coalesced_messages(self):
+        """Test two messages in one read are returned separately"""
+        reader = ProtobufFrameReader()
+        reader.feed(self._message(3, "one") + self._message(4, "two"))
+        frames = list(reader)
+        self.assertEqual(frames, [self._message(3, "one"), self._message(4, "two")])
+
+    def test_message_without_trailer(self):
+        """Test a decreasing field number starts a new message"""
+        reader = ProtobufFrameReader()
+        first = ProtobufEncoder.encode_string(16, "a") + ProtobufEncoder.encode_string(100, "b")
+        second = ProtobufEncoder.encode_string(16, "c")
+        reader.feed(first + second)
+        self.assertEqual(reader.next_frame(), first)
+        self.assertIsNone(reader.next_frame())
+        self.assertTrue(reader.at_boundary)
+        self.assertEqual(reader.flush(), second)
+
+    def test_flush_keeps_partial_field(self):
+        """Test flush only returns complete fields"""
+        reader = ProtobufFrameReader()
+        complete = ProtobufEncoder.encode_string(16, "abc")
+        reader.feed(complete + b'\xa2\x06\x13TEST')
+        self.assertFalse(reader.at_boundary)
+        self.assertEqual(reader.flush(), complete)
+        self.assertEqual(reader.pending, 7)
+
+    def test_invalid_data_discarded(self):
+        """Test bytes that cannot start a field are dropped"""
+        reader = ProtobufFrameReader()
+        reader.feed(b'\x07\x00\x00')
+        self.assertIsNone(reader.next_frame())
+        self.assertEqual(reader.pending, 0)
+
+    def test_resync_after_invalid_byte(self):
+        """Test messages around a junk byte in the same read are kept"""
+        reader = ProtobufFrameReader()
+        reader.feed(self._message(1) + b'\x07' + self._message(2) + b'\xff\x07' +
+                    self._message(3))
+        self.assertEqual(list(reader), [self._message(1), self._message(2), self._message(3)])
+        self.assertEqual(reader.pending, 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for binary telemetry recording
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.charger import ChargerStatus
+from duosida_ev.recorder import TelemetryRecorder, TelemetryLog, TelemetrySample, COLUMNS
+
+
+def sample_status(i):
+    return ChargerStatus(conn_status=2, voltage=230.0 + i, current=16.0,
+                         power=3680.0 + i, temperature_station=40.5,
+                         session_energy=0.25 * i)
+
+
+class TestTelemetryRecorder(unittest.TestCase):
+    """Test writing and reading telemetry files"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'charger.tlm')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def record(self, count, start=0, **kwargs):
+        with TelemetryRecorder(self.path, device_id="TEST123", **kwargs) as recorder:
+            for i in range(start, start + count):
+                recorder.append(sample_status(i), timestamp=1000.0 + i)
+        return recorder
+
+    def test_fixed_record_size(self):
+        """Test every sample takes 32 bytes after a 32 byte header"""
+        self.record(10)
+        self.assertEqual(os.path.getsize(self.path), 32 + 10 * 32)
+
+    def test_round_trip(self):
+        """Test samples read back by index"""
+        self.record(3)
+        with TelemetryLog(self.path) as log:
+            self.assertEqual(len(log), 3)
+            self.assertEqual(log.device_id, "TEST123")
+            self.assertEqual(log[1], TelemetrySample(1001.0, 231.0, 16.0, 3681.0, 40.5, 0.25, 2))
+            self.assertEqual(log[-1].timestamp, 1002.0)
+            with self.assertRaises(IndexError):
+                log[3]
+
+    def test_undefined_status_round_trip(self):
+        """Test a conn_status of -1 (undefined) reads back as -1"""
+        with TelemetryRecorder(self.path) as recorder:
+            recorder.append(ChargerStatus(conn_status=-1), timestamp=1000.0)
+            recorder.append(ChargerStatus(conn_status=1000), timestamp=1001.0)
+        with TelemetryLog(self.path) as log:
+            self.assertEqual(log[0].conn_status, -1)
+            self.assertEqual(log[1].conn_status, -1)
+            self.assertEqual(list(log.columns()['conn_status']), [-1, -1])
+
+    def test_range_query(self):
+        """Test start <= timestamp < end selection"""
+        self.record(100)
+        with TelemetryLog(self.path) as log:
+            self.assertEqual(log.index_range(1010.0, 1020.0), (10, 20))
+            self.assertEqual(log.index_range(1010.5, None), (11, 100))
+            self.assertEqual(log.index_range(5000.0, 6000.0), (100, 100))
+            timestamps = [s.timestamp for s in log.query(1050.0, 1053.0)]
+            self.assertEqual(timestamps, [1050.0, 1051.0, 1052.0])
+
+    def test_columns(self):
+        """Test columnar extraction matches per-sample decoding"""
+        self.record(50)
+        with TelemetryLog(self.path) as log:
+            columns = log.columns(1010.0, 1015.0)
+            samples = list(log.query(1010.0, 1015.0))
+
+        self.assertEqual(set(columns), set(COLUMNS))
+        for name in COLUMNS:
+            self.assertEqual(list(columns[name]), [getattr(s, name) for s in samples])
+        self.assertEqual(columns['timestamp'].typecode, 'd')
+        self.assertEqual(columns['power'].typecode, 'f')
+
+    def test_empty_columns(self):
+        """Test columns of an empty range"""
+        self.record(0)
+        with TelemetryLog(self.path) as log:
+            self.assertEqual(len(log), 0)
+            self.assertEqual(len(log.columns()['voltage']), 0)
+
+    def test_append_to_existing(self):
+        """Test reopening appends and drops a partial trailing record"""
+        self.record(5)
+        with open(self.path, 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        self.record(5, start=5)
+
+        with TelemetryLog(self.path) as log:
+            self.assertEqual(len(log), 10)
+            self.assertEqual([s.timestamp for s in log.query()][-1], 1009.0)
+
+    def test_buffered_until_flush(self):
+        """Test samples are buffered up to flush_every"""
+        recorder = TelemetryRecorder(self.path, flush_every=4)
+        for i in range(3):
+            recorder(sample_status(i))
+        self.assertEqual(os.path.getsize(self.path), 32)
+        recorder(sample_status(3))
+        self.assertEqual(os.path.getsize(self.path), 32 + 4 * 32)
+        recorder.close()
+        self.assertEqual(recorder.count, 4)
+
+    def test_not_a_telemetry_file(self):
+        """Test other files are rejected"""
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 64)
+        with self.assertRaises(ValueError):
+            TelemetryLog(self.path)
+        with self.assertRaises(ValueError):
+            TelemetryRecorder(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
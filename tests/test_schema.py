@@ -0,0 +1,138 @@
+"""
+Tests for declarative message schemas
+"""
+
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.protobuf import ProtobufEncoder, ProtobufDecoder, Field, MessageSchema
+from duosida_ev.schema import MESSAGES, FRAME, PAYLOAD, STATUS_DATA, CONFIG_COMMAND
+
+
+INNER = MessageSchema('Inner', [
+    Field(1, 'tag', 'string'),
+])
+
+SAMPLE = MessageSchema('Sample', [
+    Field(3, 'ratio', 'float'),
+    Field(1, 'count', 'varint'),
+    Field(2, 'name', 'string'),
+    Field(4, 'inner', 'message', INNER),
+    Field(5, 'raw', 'bytes'),
+    Field(6, 'enabled', 'bool'),
+    Field(7, 'precise', 'double'),
+    Field(8, 'offset', 'int32'),
+    Field(9, 'delta', 'int64'),
+])
+
+
+class TestMessageSchema(unittest.TestCase):
+    """Test compiled encoding and decoding"""
+
+    def test_encode_matches_generic_encoder(self):
+        """Test fields are encoded in field number order with the right wire types"""
+        data = SAMPLE.encode(ratio=0.5, count=300, name="hi", inner={'tag': "x"})
+        expected = (
+            ProtobufEncoder.encode_varint_field(1, 300) +
+            ProtobufEncoder.encode_string(2, "hi") +
+            ProtobufEncoder.encode_float(3, 0.5) +
+            ProtobufEncoder.encode_embedded_message(4, ProtobufEncoder.encode_string(1, "x"))
+        )
+        self.assertEqual(data, expected)
+
+    def test_round_trip(self):
+        """Test decode() returns what encode() wrote"""
+        data = SAMPLE.encode(count=7, name="hé", raw=b'\xff\x00', enabled=True, precise=1.25)
+        values = SAMPLE.decode(data)
+
+        self.assertEqual(values['count'], 7)
+        self.assertEqual(values['name'], "hé")
+        self.assertEqual(values['raw'].tobytes(), b'\xff\x00')
+        self.assertIs(values['enabled'], True)
+        self.assertEqual(values['precise'], 1.25)
+        self.assertNotIn('ratio', values)
+
+    def test_signed_integers(self):
+        """Test int32 and int64 fields round-trip negative values like protobuf"""
+        data = SAMPLE.encode(offset=-1, delta=-(1 << 40))
+        self.assertEqual(data[:11], ProtobufEncoder.encode_varint_field(8, (1 << 64) - 1))
+        values = SAMPLE.decode(data)
+        self.assertEqual(values['offset'], -1)
+        self.assertEqual(values['delta'], -(1 << 40))
+        self.assertEqual(SAMPLE.decode(SAMPLE.encode(offset=2 ** 31 - 1))['offset'], 2 ** 31 - 1)
+
+    def test_nested_message_is_lazy(self):
+        """Test nested messages are returned as views for later decoding"""
+        values = SAMPLE.decode(SAMPLE.encode(inner={'tag': "abc"}))
+        self.assertIsInstance(values['inner'], memoryview)
+        self.assertEqual(INNER.decode(values['inner']), {'tag': "abc"})
+
+    def test_unknown_fields_skipped(self):
+        """Test undeclared fields and wire type mismatches are skipped"""
+        data = (
+            ProtobufEncoder.encode_varint_field(1, 5) +
+            ProtobufEncoder.encode_string(3, "not a float") +
+            ProtobufEncoder.encode_float(9, 1.0) +
+            ProtobufEncoder.encode_string(2, "ok")
+        )
+        self.assertEqual(SAMPLE.decode(data), {'count': 5, 'name': "ok"})
+
+    def test_truncated_field(self):
+        """Test decoding stops at a truncated field"""
+        data = SAMPLE.encode(count=1, name="hello")[:-2]
+        self.assertEqual(SAMPLE.decode(data), {'count': 1})
+
+        data = SAMPLE.encode(count=1, ratio=2.0)[:-1]
+        self.assertEqual(SAMPLE.decode(data), {'count': 1})
+
+    def test_encoder(self):
+        """Test positional encoders match encode()"""
+        encode = SAMPLE.encoder('name', 'count')
+        self.assertEqual(encode("hi", 3), SAMPLE.encode(name="hi", count=3))
+
+    def test_encoder_unknown_field(self):
+        """Test encoders reject undeclared fields"""
+        with self.assertRaises(ValueError):
+            SAMPLE.encoder('missing')
+
+
+class TestProtocolSchemas(unittest.TestCase):
+    """Test the Duosida message schemas"""
+
+    def test_registry(self):
+        """Test schemas are registered by name"""
+        self.assertIs(MESSAGES['Frame'], FRAME)
+        self.assertIs(MESSAGES['StatusData'], STATUS_DATA)
+
+    def test_config_frame(self):
+        """Test a config command frame matches the generic decoder"""
+        data = FRAME.encode(config={'key': "VendorMaxWorkCurrent", 'value': "16"},
+                            device_id="TEST123", sequence=9)
+        fields = ProtobufDecoder.decode_message(data)
+        self.assertEqual(fields[100], "TEST123")
+        self.assertEqual(fields[101], 9)
+
+        frame = FRAME.decode(data)
+        self.assertEqual(CONFIG_COMMAND.decode(frame['config'])['value'], "16")
+
+    def test_status_payload(self):
+        """Test telemetry decodes by name"""
+        status = (
+            ProtobufEncoder.encode_float(1, 231.0) +
+            ProtobufEncoder.encode_varint_field(17, 2)
+        )
+        payload = (
+            ProtobufEncoder.encode_string(2, "DataVendorStatusReq") +
+            ProtobufEncoder.encode_embedded_message(10, status)
+        )
+        values = PAYLOAD.decode(payload)
+        self.assertEqual(values['type'], "DataVendorStatusReq")
+        self.assertEqual(STATUS_DATA.decode(values['status']),
+                         {'voltage': 231.0, 'conn_status': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
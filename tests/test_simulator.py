@@ -0,0 +1,120 @@
+"""
+Tests for the charger simulator
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.async_charger import AsyncDuosidaCharger
+from duosida_ev.discovery import iter_discover, _get_device_id_via_tcp
+from duosida_ev.simulator import ChargerSimulator
+
+
+class TestChargerSimulator(unittest.TestCase):
+    """Test clients against simulated chargers"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_status_and_commands(self):
+        """Test the handshake, pushed status and acknowledged commands"""
+        async def scenario():
+            async with ChargerSimulator(count=1, push_interval=0.05, seed=1) as simulator:
+                virtual = simulator.chargers[0]
+                async with AsyncDuosidaCharger(virtual.host, virtual.port,
+                                               device_id=virtual.device_id) as charger:
+                    before = await charger.get_status(use_cache=False)
+                    self.assertTrue(await charger.set_max_current(20))
+                    self.assertTrue(await charger.start_charging())
+                    after = None
+                    for _ in range(20):
+                        after = await charger.get_status(use_cache=False)
+                        if after and after.conn_status == 2:
+                            break
+                    stats = charger.stats.snapshot()
+                return virtual, before, after, stats
+
+        virtual, before, after, stats = self.run_async(scenario())
+
+        self.assertEqual(before.device_id, virtual.device_id)
+        self.assertEqual(before.model, "DUOSIDA Simulator")
+        self.assertEqual(before.conn_status, 1)
+        self.assertEqual(virtual.max_current, 20)
+        self.assertEqual(virtual.commands_received, 2)
+        self.assertEqual(after.conn_status, 2)
+        self.assertAlmostEqual(after.current, 20.0, delta=1.0)
+        self.assertGreater(after.timestamp, 0)
+        self.assertEqual(stats.connects, 1)
+        self.assertEqual(stats.commands_sent, 2)
+        self.assertEqual(stats.commands_acknowledged, 2)
+        self.assertGreaterEqual(stats.statuses_decoded, 2)
+
+    def test_many_chargers(self):
+        """Test one process serves many chargers concurrently"""
+        async def scenario():
+            async with ChargerSimulator(count=50, push_interval=0.05) as simulator:
+                chargers = [AsyncDuosidaCharger(c.host, c.port, device_id=c.device_id)
+                            for c in simulator.chargers]
+                await asyncio.gather(*(c.connect() for c in chargers))
+                statuses = await asyncio.gather(*(c.get_status(use_cache=False)
+                                                  for c in chargers))
+                await asyncio.gather(*(c.disconnect() for c in chargers))
+                return simulator, statuses
+
+        simulator, statuses = self.run_async(scenario())
+        self.assertEqual([s.device_id for s in statuses],
+                         [c.device_id for c in simulator.chargers])
+        self.assertEqual(len({c.port for c in simulator.chargers}), 50)
+
+    def test_device_id_lookup(self):
+        """Test the discovery device ID lookup over the handshake"""
+        async def scenario():
+            async with ChargerSimulator(count=1) as simulator:
+                virtual = simulator.chargers[0]
+                device_id = await self.loop.run_in_executor(
+                    None, _get_device_id_via_tcp, virtual.host, virtual.port)
+                return virtual.device_id, device_id
+
+        expected, device_id = self.run_async(scenario())
+        self.assertEqual(device_id, expected)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "needs 127.0.0.0/8 aliases")
+    def test_discovery(self):
+        """Test each simulated charger answers the discovery broadcast"""
+        async def scenario():
+            async with ChargerSimulator(count=3, host=['127.0.0.1', '127.0.0.2', '127.0.0.3'],
+                                        discovery_port=0,
+                                        discovery_host='127.0.0.1') as simulator:
+                devices = await self.loop.run_in_executor(None, lambda: list(iter_discover(
+                    timeout=2, interface='127.0.0.1', get_device_id=False, expected_count=3,
+                    broadcast_address='127.0.0.1', port=simulator.discovery_port)))
+                return simulator, devices
+
+        try:
+            simulator, devices = self.run_async(scenario())
+        except OSError as e:
+            self.skipTest(f"UDP ports not available: {e}")
+
+        self.assertEqual(sorted(d['ip'] for d in devices), ['127.0.0.1', '127.0.0.2', '127.0.0.3'])
+        self.assertEqual(sorted(d['mac'] for d in devices),
+                         sorted(c.mac for c in simulator.chargers))
+        self.assertEqual(devices[0]['type'], 'smart_wifi')
+
+    def test_host_count_mismatch(self):
+        """Test one host per charger is required"""
+        with self.assertRaises(ValueError):
+            ChargerSimulator(count=2, host=['127.0.0.1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,270 @@
+"""
+Tests for solar surplus charging
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from duosida_ev.async_charger import AsyncDuosidaCharger
+from duosida_ev.charger import ChargerStatus
+from duosida_ev.simulator import ChargerSimulator
+from duosida_ev.solar import (
+    SurplusController,
+    PowerSource,
+    FilePowerSource,
+    CallablePowerSource,
+    UnixSocketPowerSource,
+)
+
+
+class FakeCharger:
+    """Stands in for AsyncDuosidaCharger, with a configurable command delay"""
+
+    def __init__(self, status=None, delay=0.0):
+        self.status = status
+        self.delay = delay
+        self.commands = []
+        self.listening = False
+
+    def start_listening(self):
+        self.listening = True
+        return asyncio.ensure_future(asyncio.sleep(0))
+
+    def stop_listening(self):
+        self.listening = False
+
+    async def get_status(self, use_cache=True):
+        await asyncio.sleep(0.01)
+        return self.status
+
+    async def _command(self, command):
+        self.commands.append(command)
+        await asyncio.sleep(self.delay)
+        return True
+
+    async def set_max_current(self, amps):
+        return await self._command(('set', amps))
+
+    async def start_charging(self):
+        return await self._command(('start',))
+
+    async def stop_charging(self):
+        return await self._command(('stop',))
+
+
+def plugged_in(current=0.0, voltage=230.0, conn_status=1):
+    return ChargerStatus(conn_status=conn_status, current=current, voltage=voltage)
+
+
+class TestSurplusDecision(unittest.TestCase):
+    """Test start, follow and stop decisions"""
+
+    def make(self, **kwargs):
+        kwargs.setdefault('start_delay', 10.0)
+        kwargs.setdefault('stop_delay', 10.0)
+        controller = SurplusController(FakeCharger(), CallablePowerSource(lambda: 0), **kwargs)
+        controller.status = plugged_in()
+        return controller
+
+    def test_start_after_delay(self):
+        """Test a session starts once the surplus lasted start_delay"""
+        controller = self.make()
+        self.assertEqual(controller.decide(-2000.0, now=0.0), 0)
+        self.assertEqual(controller.decide(-2000.0, now=5.0), 0)
+        self.assertEqual(controller.decide(-2000.0, now=10.0), 8)
+
+    def test_start_interrupted(self):
+        """Test a dip below the threshold restarts the start delay"""
+        controller = self.make()
+        controller.decide(-2000.0, now=0.0)
+        controller.decide(-500.0, now=5.0)
+        self.assertEqual(controller.decide(-2000.0, now=12.0), 0)
+        self.assertEqual(controller.decide(-2000.0, now=22.0), 8)
+
+    def test_no_vehicle(self):
+        """Test nothing starts without a vehicle"""
+        controller = self.make(start_delay=0.0)
+        controller.status = plugged_in(conn_status=0)
+        self.assertEqual(controller.decide(-5000.0, now=0.0), 0)
+
+    def test_follow_uses_measured_voltage(self):
+        """Test watts are converted with the charger's voltage and phases"""
+        controller = self.make(phases=3)
+        controller.charging = True
+        controller.status = plugged_in(current=10.0, voltage=200.0, conn_status=2)
+        # Draw 6000 W, exporting 1200 W more -> 7200 W / 600 W per amp
+        self.assertEqual(controller.decide(-1200.0, now=0.0), 12)
+        self.assertEqual(controller.decide(-100000.0, now=0.0), 32)
+
+    def test_hold_then_stop(self):
+        """Test min_current is held within stop_threshold, then stopped"""
+        controller = self.make(stop_threshold=300.0)
+        controller.charging = True
+        controller.status = plugged_in(current=6.0, conn_status=2)
+        # Drawing 1380 W, importing 200 W: hold at 6 A
+        self.assertEqual(controller.decide(200.0, now=0.0), 6)
+        # Importing 800 W: stop after stop_delay
+        self.assertEqual(controller.decide(800.0, now=1.0), 6)
+        self.assertEqual(controller.decide(800.0, now=11.0), 0)
+
+
+class TestSurplusController(unittest.TestCase):
+    """Test command handling"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_commands_coalesced(self):
+        """Test targets arriving while a command is in flight replace each other"""
+        readings = iter([-2000.0, -2300.0, -2530.0, -2760.0])
+        charger = FakeCharger(plugged_in(), delay=0.05)
+        controller = SurplusController(charger, CallablePowerSource(lambda: next(readings)),
+                                       start_delay=0.0)
+        controller.status = charger.status
+
+        async def scenario():
+            await controller.step()
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+                await controller.step()
+            await controller._command_task
+
+        self.run_async(scenario())
+        self.assertEqual(charger.commands, [('set', 8), ('start',), ('set', 12)])
+        self.assertEqual(controller.limit, 12)
+        self.assertGreaterEqual(controller.coalesced, 1)
+
+    def test_unchanged_target_not_sent(self):
+        """Test the same target is only sent once"""
+        charger = FakeCharger(plugged_in(current=8.0, conn_status=2))
+        controller = SurplusController(charger, CallablePowerSource(lambda: 0.0))
+        controller.status = charger.status
+        controller.charging = True
+        controller.limit = 8
+        controller._applied = 8
+
+        self.run_async(controller.step())
+        self.assertIsNone(controller._command_task)
+        self.assertEqual(charger.commands, [])
+
+    def test_run_schedule(self):
+        """Test the loop runs on its schedule and reads status in the background"""
+        charger = FakeCharger(plugged_in())
+        controller = SurplusController(charger, CallablePowerSource(lambda: -3000.0),
+                                       start_delay=0.0, interval=0.02)
+        self.run_async(controller.run(duration=0.15))
+
+        self.assertIs(controller.status, charger.status)
+        self.assertEqual(charger.commands, [('set', 13), ('start',)])
+        self.assertLess(controller.max_lateness, 0.1)
+
+    def test_run_against_simulator(self):
+        """Test status reads and commands share one connection"""
+        async def scenario():
+            async with ChargerSimulator(count=1, push_interval=0.05) as simulator:
+                virtual = simulator.chargers[0]
+                async with AsyncDuosidaCharger(virtual.host, virtual.port,
+                                               device_id=virtual.device_id) as charger:
+                    controller = SurplusController(charger,
+                                                   CallablePowerSource(lambda: -3000.0),
+                                                   start_delay=0.0, interval=0.1)
+                    await controller.run(duration=1.0)
+                    return virtual, charger, controller
+
+        virtual, charger, controller = self.run_async(scenario())
+
+        self.assertTrue(controller.charging)
+        self.assertTrue(virtual.charging)
+        self.assertEqual(virtual.max_current, controller.limit)
+        self.assertFalse(charger.listening)
+        stats = charger.stats.snapshot()
+        self.assertGreaterEqual(stats.commands_acknowledged, 2)
+        self.assertEqual(stats.command_timeouts, 0)
+        self.assertEqual(stats.errors, 0)
+
+
+class TestPowerSources(unittest.TestCase):
+    """Test grid power feeds"""
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.tmpdir)
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_file_source(self):
+        """Test readings from a file, ignoring garbage and stale files"""
+        path = os.path.join(self.tmpdir, 'grid')
+        source = FilePowerSource(path, max_age=60.0)
+        self.assertIsNone(self.run_async(source.read()))
+
+        with open(path, 'w') as f:
+            f.write("-1234.5\n")
+        self.assertEqual(self.run_async(source.read()), -1234.5)
+
+        os.utime(path, (0, 0))
+        self.assertIsNone(self.run_async(source.read()))
+
+    def test_incomplete_source_rejected(self):
+        """Test a source without read() cannot be instantiated"""
+        class NoRead(PowerSource):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoRead()
+
+    def test_callable_source(self):
+        """Test plain and coroutine functions"""
+        async def reading():
+            return -50
+
+        self.assertEqual(self.run_async(CallablePowerSource(lambda: 10).read()), 10.0)
+        self.assertEqual(self.run_async(CallablePowerSource(reading).read()), -50.0)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets not available")
+    def test_unix_socket_source(self):
+        """Test readings pushed over a Unix socket"""
+        path = os.path.join(self.tmpdir, 'grid.sock')
+
+        async def handle(reader, writer):
+            writer.write(b"bogus\n-800\n")
+            await writer.drain()
+
+        async def scenario():
+            server = await asyncio.start_unix_server(handle, path)
+            source = UnixSocketPowerSource(path)
+            try:
+                self.assertIsNone(await source.read())
+                for _ in range(50):
+                    await asyncio.sleep(0.01)
+                    value = await source.read()
+                    if value is not None:
+                        return value
+            finally:
+                await source.close()
+                server.close()
+                await server.wait_closed()
+
+        self.assertEqual(self.run_async(scenario()), -800.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
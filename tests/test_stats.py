@@ -0,0 +1,234 @@
+"""
+Tests for connection statistics
+"""
+
+import os
+import socket
+import sys
+import math
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from duosida_ev.charger import DuosidaCharger
+from duosida_ev.protobuf import ProtobufEncoder
+from duosida_ev.stats import ConnectionStats, LatencyHistogram, LatencyStats, StatsSnapshot
+from benchmarks.suite import status_frame
+
+
+def payload_frame(msg_type: str, sequence: int) -> bytes:
+    """A frame whose payload has a type but no telemetry"""
+    payload = ProtobufEncoder.encode_string(2, msg_type)
+    return (
+        ProtobufEncoder.encode_embedded_message(16, payload) +
+        ProtobufEncoder.encode_string(100, "0310107112122360374") +
+        ProtobufEncoder.encode_varint_field(101, sequence)
+    )
+
+
+class TestConnectionStats(unittest.TestCase):
+    """Test the counters themselves"""
+
+    def test_counters_and_snapshot(self):
+        """Test counters start at zero and add up"""
+        stats = ConnectionStats()
+        self.assertEqual(stats.snapshot(), StatsSnapshot(*([0] * len(ConnectionStats.COUNTERS)),
+                                                         None, None))
+        stats.bytes_sent += 100
+        stats.retries += 1
+        stats.retries += 1
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot.bytes_sent, 100)
+        self.assertEqual(snapshot.retries, 2)
+        self.assertEqual(stats.retries, 2)
+
+    def test_snapshot_is_a_copy(self):
+        """Test a snapshot does not change afterwards"""
+        stats = ConnectionStats()
+        snapshot = stats.snapshot()
+        stats.connects += 1
+        self.assertEqual(snapshot.connects, 0)
+        self.assertEqual(snapshot._asdict()['connects'], 0)
+
+    def test_error(self):
+        """Test the last error is remembered"""
+        stats = ConnectionStats()
+        stats.error(ConnectionResetError("reset by peer"))
+        stats.error(ValueError("bad frame"))
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot.errors, 2)
+        self.assertEqual(snapshot.last_error, "ValueError: bad frame")
+        self.assertIsNotNone(snapshot.last_error_time)
+
+    def test_reset(self):
+        """Test reset() clears counters and the last error"""
+        stats = ConnectionStats()
+        stats.frames_received += 5
+        stats.error(OSError("gone"))
+        stats.reset()
+        self.assertEqual(stats.frames_received, 0)
+        self.assertEqual(stats.errors, 0)
+        self.assertIsNone(stats.last_error)
+
+    def test_repr(self):
+        """Test the repr lists counters and the last error"""
+        stats = ConnectionStats()
+        stats.retries += 3
+        self.assertIn("retries=3", repr(stats))
+        self.assertIn("last_error=None", repr(stats))
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test log-scale latency histograms"""
+
+    def test_percentiles_within_one_bucket(self):
+        """Test percentiles overestimate by at most one bucket width"""
+        histogram = LatencyHistogram()
+        samples = [0.001 * 1.01 ** i for i in range(1000)]
+        for sample in samples:
+            histogram.record(sample)
+
+        width = 10 ** (1 / histogram.per_decade)
+        for percentile, exact in ((50, samples[499]), (90, samples[899]), (99, samples[989])):
+            estimate = histogram.percentile(percentile)
+            self.assertGreaterEqual(estimate, exact)
+            self.assertLessEqual(estimate, exact * width)
+        self.assertEqual(histogram.percentile(100), samples[-1])
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.mean, sum(samples) / 1000)
+
+    def test_under_and_overflow(self):
+        """Test samples beyond the bounds are kept in the outer buckets"""
+        histogram = LatencyHistogram(low=0.001, high=10.0)
+        histogram.record(0.00001)
+        histogram.record(500.0)
+
+        buckets = histogram.buckets()
+        self.assertEqual(buckets[0], (0.001, 1))
+        self.assertEqual(buckets[-1], (math.inf, 1))
+        self.assertEqual(histogram.percentile(1), 0.001)
+        self.assertEqual(histogram.percentile(100), 500.0)
+
+    def test_empty(self):
+        """Test a histogram without samples"""
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.percentile(99), 0.0)
+        self.assertEqual(histogram.mean, 0.0)
+        self.assertEqual(histogram.buckets(), [])
+
+    def test_merge(self):
+        """Test merging gives the histogram of all samples"""
+        fast, slow, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(99):
+            fast.record(0.01)
+            both.record(0.01)
+        slow.record(3.0)
+        both.record(3.0)
+
+        fast.merge(slow)
+        self.assertEqual(fast.counts, both.counts)
+        self.assertEqual(fast.count, 100)
+        self.assertEqual(fast.max, 3.0)
+        self.assertEqual(fast.percentile(99), both.percentile(99))
+        self.assertEqual(fast.percentile(100), 3.0)
+
+    def test_merge_different_buckets(self):
+        """Test histograms with different layouts do not merge"""
+        with self.assertRaises(ValueError):
+            LatencyHistogram(per_decade=10).merge(LatencyHistogram())
+
+    def test_stats_merge_and_export(self):
+        """Test LatencyStats merges each phase"""
+        first, second = LatencyStats(), LatencyStats()
+        first.connect.record(0.002)
+        second.connect.record(0.004)
+        second.command.record(0.05)
+
+        merged = LatencyStats().merge(first).merge(second)
+        self.assertEqual(merged.connect.count, 2)
+        self.assertEqual(merged.command.count, 1)
+        summary = merged.to_dict()
+        self.assertEqual(sorted(summary), sorted(LatencyStats.NAMES))
+        self.assertEqual(summary['status']['count'], 0)
+
+
+class TestChargerStats(unittest.TestCase):
+    """Test DuosidaCharger counts what it does"""
+
+    def setUp(self):
+        self.charger = DuosidaCharger(host="127.0.0.1", device_id="0310107112122360374")
+        self.charger.sock, self.peer = socket.socketpair()
+        self.charger.sock.settimeout(1.0)
+
+    def tearDown(self):
+        self.charger.disconnect()
+        self.peer.close()
+
+    def test_frames_counted_by_outcome(self):
+        """Test decoded, rejected and skipped frames and bytes are counted"""
+        data = (payload_frame("DataContinueReq", 1) +
+                payload_frame("DataVendorStatusReq", 2) +
+                status_frame(sequence=3))
+        self.peer.sendall(data)
+
+        status = self.charger.get_status(retries=3, use_cache=False)
+
+        self.assertIsNotNone(status)
+        stats = self.charger.stats.snapshot()
+        self.assertEqual(stats.bytes_received, len(data))
+        self.assertEqual(stats.frames_received, 3)
+        self.assertEqual(stats.continue_frames_skipped, 1)
+        self.assertEqual(stats.frames_rejected, 1)
+        self.assertEqual(stats.statuses_decoded, 1)
+        self.assertEqual(stats.status_requests, 1)
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(self.charger.latency.status.count, 1)
+
+    def test_cache_fallback_and_timeouts(self):
+        """Test timeouts and statuses served from the cache are counted"""
+        self.peer.sendall(status_frame())
+        self.charger.get_status(use_cache=False)
+
+        with patch.object(self.charger, '_recv_frame', side_effect=socket.timeout("timed out")):
+            status = self.charger.get_status(retries=2, use_cache=True)
+        # Only statuses read from the charger count towards the latency
+        self.assertEqual(self.charger.latency.status.count, 1)
+
+        self.assertIsNotNone(status)
+        stats = self.charger.stats.snapshot()
+        self.assertEqual(stats.timeouts, 2)
+        self.assertEqual(stats.cache_fallbacks, 1)
+        self.assertEqual(stats.errors, 0)
+
+    def test_commands_counted(self):
+        """Test sent and acknowledged commands are counted"""
+        self.charger.ack_timeout = 1.0
+        self.peer.sendall(ProtobufEncoder.encode_varint_field(101, self.charger.sequence))
+
+        self.assertTrue(self.charger.set_max_current(16))
+
+        stats = self.charger.stats.snapshot()
+        self.assertEqual(stats.commands_sent, 1)
+        self.assertEqual(stats.commands_acknowledged, 1)
+        self.assertGreater(stats.bytes_sent, 0)
+        self.assertEqual(self.charger.latency.command.count, 1)
+
+    def test_connection_error_recorded(self):
+        """Test a lost connection is recorded as the last error"""
+        self.peer.close()
+        self.charger.sock.close()
+
+        with self.assertRaises(OSError):
+            self.charger.get_status(retries=1, use_cache=False)
+
+        stats = self.charger.stats.snapshot()
+        self.assertEqual(stats.errors, 1)
+        self.assertIn("OSError", stats.last_error)
+
+
+if __name__ == '__main__':
+    unittest.main()
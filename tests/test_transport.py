@@ -0,0 +1,140 @@
+"""
+Tests for fault injection
+"""
+
+import os
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from duosida_ev.charger import DuosidaCharger
+from duosida_ev.transport import FaultInjector
+from benchmarks.suite import running_simulator, status_frame
+
+
+class TestFaultInjector(unittest.TestCase):
+    """Test FaultInjector against a socket pair"""
+
+    def setUp(self):
+        self.peers = []
+
+    def tearDown(self):
+        for peer in self.peers:
+            peer.close()
+
+    def socket_pair(self, address, timeout):
+        """socket_factory connecting to the other end of a socket pair"""
+        local, peer = socket.socketpair()
+        local.settimeout(timeout)
+        self.peers.append(peer)
+        return local
+
+    def charger(self, injector: FaultInjector) -> DuosidaCharger:
+        charger = DuosidaCharger(host="127.0.0.1", device_id="0310107112122360374",
+                                 socket_factory=injector)
+        charger.sock = injector(("127.0.0.1", 9988), 1.0)
+        return charger
+
+    def test_segmented_frames_reassembled(self):
+        """Test frames split into small segments still parse"""
+        injector = FaultInjector(segment_size=5, seed=1, socket_factory=self.socket_pair)
+        charger = self.charger(injector)
+        self.peers[0].sendall(b"".join(status_frame(voltage=220.0 + i, sequence=i)
+                                       for i in range(3)))
+
+        statuses = [charger._get_status_once() for _ in range(3)]
+        self.assertEqual([s.voltage for s in statuses], [220.0, 221.0, 222.0])
+
+    def test_coalesced_frames_separated(self):
+        """Test frames held back and delivered together are separated"""
+        injector = FaultInjector(coalesce=True, seed=1, socket_factory=self.socket_pair)
+        charger = self.charger(injector)
+        self.peers[0].sendall(status_frame(voltage=225.0, sequence=1))
+        self.peers[0].sendall(status_frame(voltage=226.0, sequence=2))
+
+        self.assertEqual(charger._get_status_once().voltage, 225.0)
+        self.assertEqual(charger._get_status_once().voltage, 226.0)
+
+    def test_same_seed_same_segments(self):
+        """Test a seed replays the same sequence of faults"""
+        def segments(seed):
+            injector = FaultInjector(segment_size=8, seed=seed, socket_factory=self.socket_pair)
+            sock = injector(("127.0.0.1", 9988), 1.0)
+            self.peers[-1].sendall(bytes(100))
+            sizes = []
+            while sum(sizes) < 100:
+                sizes.append(len(sock.recv(4096)))
+            sock.close()
+            return sizes
+
+        self.assertEqual(segments(7), segments(7))
+        self.assertNotEqual(segments(7), segments(8))
+
+    def test_dropped_write(self):
+        """Test a dropped write never reaches the peer"""
+        injector = FaultInjector(drop_rate=1.0, socket_factory=self.socket_pair)
+        sock = injector(("127.0.0.1", 9988), 0.1)
+        sock.sendall(b"lost")
+        self.peers[0].settimeout(0.1)
+        with self.assertRaises(socket.timeout):
+            self.peers[0].recv(16)
+        self.assertEqual(injector.dropped, 1)
+
+    def test_latency_beyond_timeout_stalls(self):
+        """Test data delayed past the socket timeout raises socket.timeout"""
+        injector = FaultInjector(latency=0.3, socket_factory=self.socket_pair)
+        sock = injector(("127.0.0.1", 9988), 0.05)
+        self.peers[0].sendall(b"late")
+        with self.assertRaises(socket.timeout):
+            sock.recv(16)
+        self.assertEqual(injector.stalls, 1)
+
+    def test_disconnect(self):
+        """Test an injected reset closes the connection"""
+        injector = FaultInjector(disconnect_rate=1.0, socket_factory=self.socket_pair)
+        charger = self.charger(injector)
+        with self.assertRaises(ConnectionResetError):
+            charger._get_status_once()
+        self.assertEqual(injector.disconnects, 1)
+        self.assertEqual(self.peers[0].recv(16), b"")
+
+    def test_connect_failure(self):
+        """Test an injected connection failure makes connect() fail"""
+        injector = FaultInjector(connect_failure_rate=1.0, socket_factory=self.socket_pair)
+        charger = DuosidaCharger(host="127.0.0.1", device_id="0310107112122360374",
+                                 socket_factory=injector)
+        self.assertFalse(charger.connect())
+        self.assertIsNone(charger.sock)
+        self.assertEqual(injector.connect_failures, 1)
+        self.assertEqual(injector.connections, 0)
+
+
+class TestFaultsAgainstSimulator(unittest.TestCase):
+    """Test retries and reconnects over a faulty connection"""
+
+    def test_get_status_recovers(self):
+        """Test get_status() reconnects after injected resets"""
+        injector = FaultInjector(jitter=0.005, segment_size=32, disconnect_rate=0.02, seed=3)
+        with running_simulator(count=1, push_interval=0.01) as simulator:
+            virtual = simulator.chargers[0]
+            charger = DuosidaCharger(virtual.host, virtual.port, device_id=virtual.device_id,
+                                     auto_reconnect=True, reconnect_delay=0.01,
+                                     socket_factory=injector)
+            try:
+                charger.connect()
+                statuses = [charger.get_status(retries=5, use_cache=False)
+                            for _ in range(20)]
+            finally:
+                charger.disconnect()
+
+        self.assertGreater(injector.disconnects, 0)
+        self.assertGreater(injector.connections, 1)
+        self.assertTrue(all(s is not None and s.device_id == virtual.device_id
+                            for s in statuses))
+
+
+if __name__ == '__main__':
+    unittest.main()